@@ -3,9 +3,10 @@ API para obtener y analizar datos de entrenadores.
 """
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-import requests
 from bs4 import BeautifulSoup
 
+from src.api.http_client import ClientSession, BROWSER_HEADERS
+
 class CoachAPI:
     """
     Cliente para obtener y analizar datos de entrenadores.
@@ -14,10 +15,7 @@ class CoachAPI:
         """
         Inicializa el cliente de datos de entrenadores.
         """
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        })
+        self.session = ClientSession(BROWSER_HEADERS)
 
     def get_coach_analysis(self, coach_name: str, team_name: Optional[str] = None, year: Optional[int] = None) -> Dict[str, Any]:
         """
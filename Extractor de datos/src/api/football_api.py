@@ -1,9 +1,20 @@
 import os
-import requests
+import threading
+from contextlib import contextmanager
 from dotenv import load_dotenv
 from datetime import datetime
 from bs4 import BeautifulSoup
 
+from src.api.http_client import ClientSession, BROWSER_HEADERS
+from src.api.understat_page import get_page_cache as get_understat_page_cache, team_page_url
+from src.utils.archive import ArchiveStore, is_past_season
+from src.api.rate_limiter import RateLimiter, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from src.utils.response_cache import ResponseCache, CachedResponse, DEFAULT_CACHE_DIR
+from src.utils.run_cache import memoized_per_run
+from src.utils.team_index import get_team_index
+from src.utils.h2h_store import H2HStore
+from src.utils.standings_cache import get_standings_cache
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -14,13 +25,235 @@ class FootballAPI:
     
     BASE_URL = "https://api-football-v1.p.rapidapi.com/v3"
     
-    def __init__(self):
-        """Inicializa la clase con la clave API desde variables de entorno"""
+    # Vigencia en segundos de las respuestas cacheadas por endpoint
+    CACHE_TTLS = {
+        "/teams": 21 * 24 * 3600,
+        "/leagues": 7 * 24 * 3600,
+        "/teams/statistics": 12 * 3600,
+        "/standings": 6 * 3600,
+        "/injuries": 6 * 3600,
+        "/fixtures/headtohead": 12 * 3600,
+        "/fixtures/lineups": 10 * 60,
+        "/fixtures": 3600
+    }
+    # Vigencia de /fixtures?date= alrededor del día del partido
+    MATCHDAY_FIXTURES_TTL = 5 * 60
+    # Prioridad de cada endpoint cuando la cuota escasea
+    ENDPOINT_PRIORITIES = {
+        "/fixtures/headtohead": PRIORITY_HIGH,
+        "/fixtures": PRIORITY_HIGH,
+        "/teams": PRIORITY_HIGH,
+        "/standings": PRIORITY_NORMAL,
+        "/teams/statistics": PRIORITY_NORMAL,
+        "/injuries": PRIORITY_NORMAL,
+        "/fixtures/lineups": PRIORITY_NORMAL,
+        "/leagues": PRIORITY_LOW
+    }
+    # Estados de partido que ya no van a cambiar
+    FINISHED_STATUSES = ("FT", "AET", "PEN", "CANC", "ABD", "AWD", "WO")
+    
+    def __init__(self, cache=None, use_cache=True, rate_limiter=None, archive=None):
+        """
+        Inicializa la clase con la clave API desde variables de entorno
+        
+        Args:
+            cache: Instancia de ResponseCache a utilizar (opcional)
+            use_cache: Si es False las respuestas no se cachean ni se archivan en disco
+            rate_limiter: Instancia de RateLimiter a utilizar (opcional)
+            archive: Instancia de ArchiveStore para los datos que ya no cambian (opcional)
+        """
         self.headers = {
             "X-RapidAPI-Key": os.getenv("FOOTBALL_API_KEY"),
             "X-RapidAPI-Host": "api-football-v1.p.rapidapi.com"
         }
         self.timezone = "Europe/Madrid"  # Timezone por defecto
+        self.session = ClientSession()  # Transporte HTTP compartido
+        self.cache = (cache or ResponseCache(namespace="api-football")) if use_cache else None
+        self.archive = (archive or ArchiveStore()) if use_cache else None
+        self.h2h_store = H2HStore() if use_cache else None  # Historial completo de enfrentamientos directos
+        self.standings_cache = get_standings_cache()  # Clasificaciones indexadas compartidas por liga
+        self.rate_limiter = rate_limiter or RateLimiter(
+            state_path=os.path.join(DEFAULT_CACHE_DIR, "api-football-quota.json")
+        )
+        self._priority_local = threading.local()
+        self.run_cache = None  # Memoización por ejecución (la activa el extractor)
+        self.fixture_store = None  # SQLiteStore opcional donde se indexan los partidos (lo asigna el extractor)
+        self.team_index = get_team_index()  # Nombres, alias y slugs de equipos ya resueltos
+    
+    @contextmanager
+    def request_priority(self, priority):
+        """
+        Fija la prioridad de las peticiones realizadas dentro del bloque (en el hilo actual)
+        
+        Args:
+            priority: PRIORITY_HIGH, PRIORITY_NORMAL o PRIORITY_LOW
+        """
+        previous = getattr(self._priority_local, "priority", None)
+        self._priority_local.priority = priority
+        try:
+            yield
+        finally:
+            self._priority_local.priority = previous
+    
+    def _request_priority(self, endpoint):
+        """Prioridad de una petición: la del bloque actual o la del endpoint"""
+        priority = getattr(self._priority_local, "priority", None)
+        if priority is not None:
+            return priority
+        return self.ENDPOINT_PRIORITIES.get(endpoint, PRIORITY_NORMAL)
+    
+    def _cache_ttl(self, endpoint, params, data):
+        """
+        Determina cuánto tiempo se puede reutilizar una respuesta de la API
+        
+        Args:
+            endpoint (str): Endpoint consultado (ej. "/fixtures")
+            params (dict): Parámetros de la solicitud
+            data (dict): Respuesta JSON de la API
+            
+        Returns:
+            float: Segundos de vigencia, None si no expira nunca o 0 si no se debe cachear
+        """
+        params = params or {}
+        if endpoint == "/fixtures":
+            fixtures = data.get("response") or []
+            # Un partido concreto (por ID o fecha) ya terminado no va a cambiar
+            if fixtures and ("id" in params or "date" in params) and "last" not in params and "next" not in params:
+                statuses = [f.get("fixture", {}).get("status", {}).get("short") for f in fixtures]
+                if all(status in self.FINISHED_STATUSES for status in statuses):
+                    return None
+            # Todos los partidos de una temporada pasada ya terminados
+            if fixtures and is_past_season(params.get("season")) and "last" not in params and "next" not in params:
+                statuses = [f.get("fixture", {}).get("status", {}).get("short") for f in fixtures]
+                if all(status in self.FINISHED_STATUSES for status in statuses):
+                    return None
+            if "date" in params:
+                try:
+                    days_ahead = (datetime.strptime(str(params["date"]), "%Y-%m-%d").date() - datetime.now().date()).days
+                except ValueError:
+                    days_ahead = None
+                if days_ahead is not None and abs(days_ahead) <= 1:
+                    return self.MATCHDAY_FIXTURES_TTL
+        if endpoint == "/standings" and is_past_season(params.get("season")) and data.get("response"):
+            # La clasificación final de una temporada pasada no cambia
+            return None
+        return self.CACHE_TTLS.get(endpoint, 3600)
+    
+    def _archived_response(self, endpoint, params):
+        """
+        Busca en el archivo histórico una respuesta que ya no puede cambiar
+        
+        Args:
+            endpoint (str): Endpoint consultado (ej. "/fixtures")
+            params (dict): Parámetros de la solicitud
+            
+        Returns:
+            dict: Respuesta archivada o None si no está en el archivo
+        """
+        if not self.archive:
+            return None
+        data = self.archive.get("api-football", self.archive.request_key(endpoint, params))
+        if data is not None:
+            return data
+        # Un partido terminado archivado individualmente (por ejemplo desde el H2H)
+        lookup = {k: v for k, v in (params or {}).items() if k != "timezone"}
+        if endpoint == "/fixtures" and list(lookup) == ["id"]:
+            fixture = self.archive.get("fixtures", lookup["id"])
+            if fixture:
+                return {"get": "fixtures", "parameters": params, "errors": [], "results": 1, "response": [fixture]}
+        return None
+    
+    def archive_fixture(self, fixture):
+        """
+        Archiva un partido si ya ha terminado
+        
+        Args:
+            fixture (dict): Partido en el formato de /fixtures
+            
+        Returns:
+            bool: True si el partido está terminado y se archivó
+        """
+        info = fixture.get("fixture", {}) if fixture else {}
+        if not self.archive or not info.get("id"):
+            return False
+        if info.get("status", {}).get("short") not in self.FINISHED_STATUSES:
+            return False
+        self.archive.put("fixtures", info["id"], fixture)
+        return True
+    
+    @memoized_per_run
+    def _api_get(self, url, params):
+        """
+        Realiza una petición GET a la API pasando por la caché de respuestas
+        
+        Si hay una entrada vigente se devuelve sin tocar la red. Si ha caducado y
+        tiene validadores se revalida con una petición condicional.
+        
+        Args:
+            url (str): URL completa del endpoint
+            params (dict): Parámetros de la solicitud
+            
+        Returns:
+            requests.Response o CachedResponse: Respuesta de la API
+        
+        Dentro de una ejecución con run_cache las peticiones idénticas se agrupan.
+        """
+        endpoint = url[len(self.BASE_URL):] if url.startswith(self.BASE_URL) else url
+        archived = self._archived_response(endpoint, params)
+        if archived is not None:
+            return CachedResponse(archived)
+        
+        entry = self.cache.get(endpoint, params) if self.cache else None
+        if entry and self.cache.is_fresh(entry):
+            return CachedResponse(entry["data"], stored_at=entry.get("stored_at"))
+        
+        # Reservar cuota; si no hay, servir la copia caducada o devolver un error como el de la API
+        if not self.rate_limiter.acquire(self._request_priority(endpoint)):
+            print(f"⚠️ Cuota de API-Football reservada para peticiones prioritarias, se omite {endpoint}")
+            response = CachedResponse(entry["data"], stored_at=entry.get("stored_at")) if entry else CachedResponse({
+                "errors": {"requests": "Cuota de peticiones insuficiente para esta prioridad"},
+                "response": []
+            }, status_code=429)
+            # Otra petición con más prioridad podría obtener cuota: no memorizar
+            response.run_cacheable = False
+            return response
+        
+        headers = dict(self.headers)
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        
+        response = self.session.get(url, headers=headers, params=params)
+        self.rate_limiter.update_from_headers(response.headers, response.status_code)
+        
+        if response.status_code == 304 and entry:
+            self.cache.refresh(entry, self._cache_ttl(endpoint, params, entry["data"]))
+            return CachedResponse(entry["data"], headers=response.headers)
+        
+        if response.status_code != 200:
+            # Los errores pueden ser transitorios: no se memorizan en la ejecución
+            response.run_cacheable = False
+            return response
+        if not self.cache:
+            return response
+        
+        try:
+            data = response.json()
+        except ValueError:
+            return response
+        
+        # Solo se cachean respuestas sin errores de la API
+        if isinstance(data, dict) and not data.get("errors"):
+            ttl = self._cache_ttl(endpoint, params, data)
+            if ttl is None and self.archive:
+                # Los datos que ya no pueden cambiar van al archivo histórico
+                self.archive.put("api-football", self.archive.request_key(endpoint, params), data)
+            elif ttl != 0:
+                self.cache.put(endpoint, params, data, ttl,
+                               etag=response.headers.get("ETag"),
+                               last_modified=response.headers.get("Last-Modified"))
+        return CachedResponse(data, headers=response.headers)
     
     def _make_request(self, url, params, use_api_key=True):
         """
@@ -35,10 +268,12 @@ class FootballAPI:
             dict: Respuesta JSON o None en caso de error
         """
         try:
-            # Si no se requiere clave API, usar headers vacíos
-            headers = self.headers if use_api_key else {}
-            
-            response = requests.get(url, headers=headers, params=params)
+            # Las llamadas a la API pasan por la caché; el resto usa headers vacíos
+            if use_api_key and url.startswith(self.BASE_URL):
+                response = self._api_get(url, params)
+            else:
+                headers = self.headers if use_api_key else {}
+                response = self.session.get(url, headers=headers, params=params)
             response.raise_for_status()
             
             # Si la URL no es de la API, devolver un diccionario con los datos
@@ -59,7 +294,8 @@ class FootballAPI:
             return None
     
     def get_fixtures(self, team1_id=None, team2_id=None, league_id=None, 
-                     season=None, date=None, last=None, next=None, team=None):
+                     season=None, date=None, last=None, next=None, team=None,
+                     round_name=None, from_date=None, to_date=None):
         """
         Busca partidos por equipos, ligas o fechas
         
@@ -72,6 +308,9 @@ class FootballAPI:
             last (int, optional): Número de últimos partidos
             next (int, optional): Número de próximos partidos
             team (int, optional): ID del equipo (compatibilidad para parámetros recientes)
+            round_name (str, optional): Jornada de la liga (ej: "Regular Season - 30")
+            from_date (str, optional): Fecha inicial del rango (YYYY-MM-DD)
+            to_date (str, optional): Fecha final del rango (YYYY-MM-DD)
             
         Returns:
             dict: Respuesta de la API
@@ -103,9 +342,18 @@ class FootballAPI:
             
         if next:
             params["next"] = next
+            
+        if round_name:
+            params["round"] = round_name
+            
+        if from_date:
+            params["from"] = from_date
+            
+        if to_date:
+            params["to"] = to_date
         
         try:
-            response = requests.get(endpoint, headers=self.headers, params=params)
+            response = self._api_get(endpoint, params)
             
             # Si la respuesta es un error, intentamos imprimir detalles
             if response.status_code != 200:
@@ -123,6 +371,10 @@ class FootballAPI:
             # Mostrar información sobre número de partidos encontrados
             if "response" in data:
                 print(f"Se encontraron {len(data['response'])} partidos para el equipo {team1_id}")
+                if self.fixture_store is not None and not (team1_id and team2_id):
+                    self.fixture_store.save_fixtures(data["response"])
+                # Un partido recién terminado deja obsoleta la clasificación de su liga
+                self.standings_cache.observe_fixtures(data["response"])
                 
             return data
         except Exception as e:
@@ -139,15 +391,22 @@ class FootballAPI:
         Returns:
             dict: Información del equipo encontrado o None
         """
-        # Primero intentamos búsqueda exacta
+        # Si el nombre o alias ya está en el índice se consulta directamente por su ID
         endpoint = f"{self.BASE_URL}/teams"
-        params = {"name": team_name}
+        known = self.team_index.resolve(team_name, fuzzy=False)
+        if known and known.get("id") is not None:
+            params = {"id": known["id"]}
+        else:
+            confirmed = self._confirm_team_candidate(team_name)
+            if confirmed:
+                return confirmed
+            params = {"name": team_name}
         
         print(f"Buscando equipo: {team_name}")
         print(f"URL: {endpoint} con parámetros: {params}")
         
         try:
-            response = requests.get(endpoint, headers=self.headers, params=params)
+            response = self._api_get(endpoint, params)
             data = response.json()
             
             # Depuración completa
@@ -158,16 +417,20 @@ class FootballAPI:
             # Verificar respuesta
             if "response" in data and data["response"]:
                 print(f"Equipo encontrado con búsqueda exacta: {team_name}")
+                team = data["response"][0].get("team") or {}
+                self.team_index.learn(team.get("id"), team.get("name"), aliases=[team_name])
                 return data["response"][0]
                 
             # Si la búsqueda exacta falla, intentamos búsqueda parcial
             print(f"No se encontró coincidencia exacta para: {team_name}. Intentando búsqueda parcial...")
             params = {"search": team_name}
-            response = requests.get(endpoint, headers=self.headers, params=params)
+            response = self._api_get(endpoint, params)
             data = response.json()
             
             if "response" in data and data["response"]:
                 print(f"Equipo encontrado con búsqueda parcial: {data['response'][0]['team']['name']}")
+                team = data["response"][0].get("team") or {}
+                self.team_index.learn(team.get("id"), team.get("name"))
                 return data["response"][0]
             else:
                 print(f"No se encontró el equipo: {team_name}")
@@ -177,6 +440,33 @@ class FootballAPI:
             print(f"Error al buscar equipo {team_name}: {e}")
             return None
     
+    def _confirm_team_candidate(self, team_name):
+        """
+        Comprueba con la API el equipo que el índice propone para un nombre aproximado
+        
+        Una coincidencia aproximada (ej. "Barcelona SC" frente a "Barcelona")
+        puede ser otro equipo, así que solo se acepta si /teams?search= la
+        devuelve para el nombre buscado; entonces se aprende como alias.
+        
+        Args:
+            team_name: Nombre del equipo buscado
+            
+        Returns:
+            dict: Equipo en el formato de /teams o None si la API no lo confirma
+        """
+        candidate = self.team_index.resolve(team_name)
+        if not candidate or candidate.get("id") is None:
+            return None
+        
+        data = self._make_request(f"{self.BASE_URL}/teams", {"search": team_name})
+        for item in (data or {}).get("response") or []:
+            team = item.get("team") or {}
+            if str(team.get("id")) == str(candidate["id"]):
+                print(f"Equipo confirmado por la API: {team_name} -> {team.get('name')}")
+                self.team_index.learn(team["id"], team.get("name"), aliases=[team_name])
+                return item
+        return None
+    
     def get_head_to_head(self, team1_id, team2_id, date=None, season=None, last=50):
         """
         Obtiene el historial de enfrentamientos entre dos equipos
@@ -193,6 +483,10 @@ class FootballAPI:
         """
         print(f"Obteniendo historial de enfrentamientos entre equipos {team1_id} y {team2_id}")
         
+        # Sin filtros se usa el historial guardado y solo se piden los partidos nuevos
+        if self.h2h_store is not None and not date and not season:
+            return self._get_incremental_head_to_head(team1_id, team2_id, last)
+        
         # Construir parámetros de la solicitud
         params = {
             "h2h": f"{team1_id}-{team2_id}",
@@ -219,6 +513,76 @@ class FootballAPI:
             
         return None
         
+    def _get_incremental_head_to_head(self, team1_id, team2_id, last=50):
+        """
+        Historial de enfrentamientos a partir del guardado en H2HStore
+        
+        La primera vez se descargan los últimos `last` partidos; después solo
+        los jugados desde la fecha del último partido guardado, y los
+        agregados se actualizan con los nuevos.
+        
+        Args:
+            team1_id: ID del primer equipo
+            team2_id: ID del segundo equipo
+            last: Partidos a descargar cuando aún no hay historial y partidos
+                recientes que se devuelven
+            
+        Returns:
+            dict: Datos del historial en el formato de _process_h2h_data
+        """
+        history = self.h2h_store.stats(team1_id, team2_id)
+        params = {"h2h": f"{team1_id}-{team2_id}"}
+        if history and history.get("newest_date"):
+            params.update({"from": history["newest_date"], "to": datetime.now().strftime("%Y-%m-%d")})
+            print(f"Historial H2H guardado ({history['total']} partidos): buscando partidos desde {history['newest_date']}")
+        else:
+            params["last"] = last
+        
+        response = self.make_request(f"{self.BASE_URL}/fixtures/headtohead", params)
+        fixtures = (response or {}).get("response") or []
+        if not history and not fixtures:
+            return None
+        
+        new_fixtures = self.h2h_store.add_fixtures(team1_id, team2_id, fixtures)
+        if new_fixtures:
+            print(f"Se añadieron {len(new_fixtures)} partidos nuevos al historial H2H")
+            for match in new_fixtures:
+                self.archive_fixture(match)
+            if self.fixture_store is not None:
+                self.fixture_store.save_h2h(team1_id, team2_id, new_fixtures)
+            history = self.h2h_store.stats(team1_id, team2_id)
+        if not history:
+            return None
+        
+        stats = {key: history[key] for key in
+                 ("total", "team1_wins", "team2_wins", "draws", "total_goals", "team1_goals", "team2_goals")}
+        stats["recent_matches"] = [self._h2h_match_summary(match, team1_id) for match in history["fixtures"][:last]]
+        print(f"Resumen H2H: {stats['total']} partidos, {stats['team1_wins']} victorias equipo 1, {stats['team2_wins']} victorias equipo 2, {stats['draws']} empates")
+        return stats
+    
+    def _h2h_match_summary(self, match, team1_id):
+        """
+        Resumen de un partido guardado en H2HStore desde el punto de vista de team1_id
+        
+        Args:
+            match: Partido resumido (compact_fixture)
+            team1_id: ID del primer equipo
+            
+        Returns:
+            dict: Fecha, liga, marcador y resultado (W, L, D)
+        """
+        home_goals, away_goals = match["home_goals"], match["away_goals"]
+        team1_goals, team2_goals = (home_goals, away_goals) if str(match["home_id"]) == str(team1_id) \
+            else (away_goals, home_goals)
+        result = "W" if team1_goals > team2_goals else "L" if team1_goals < team2_goals else "D"
+        return {
+            "date": match["date"],
+            "league": match["league"],
+            "score": f"{home_goals}-{away_goals}",
+            "result": result,
+            "result_text": self._get_result_text(result, match["home_name"], match["away_name"], home_goals, away_goals)
+        }
+    
     def _process_h2h_data(self, fixtures, team1_id, team2_id):
         """
         Procesa los datos de partidos H2H para extraer estadísticas
@@ -250,6 +614,10 @@ class FootballAPI:
         
         if finished_matches:
             print(f"Se encontraron {len(finished_matches)} partidos finalizados entre los equipos")
+            for match in finished_matches:
+                self.archive_fixture(match)
+            if self.fixture_store is not None:
+                self.fixture_store.save_h2h(team1_id, team2_id, finished_matches)
             stats["total"] = len(finished_matches)
             
             # Procesar cada partido
@@ -369,7 +737,7 @@ class FootballAPI:
             "season": season
         }
         
-        response = requests.get(endpoint, headers=self.headers, params=params)
+        response = self._api_get(endpoint, params)
         return response.json()
     
     def get_leagues_for_team(self, team_id):
@@ -386,7 +754,7 @@ class FootballAPI:
         params = {"team": team_id}
         
         try:
-            response = requests.get(endpoint, headers=self.headers, params=params)
+            response = self._api_get(endpoint, params)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -414,9 +782,42 @@ class FootballAPI:
         if team_id:
             params["team"] = team_id
             
-        response = requests.get(endpoint, headers=self.headers, params=params)
+        response = self._api_get(endpoint, params)
         return response.json()
     
+    def get_standings_table(self, league_id, season="2024"):
+        """
+        Clasificación de una liga indexada por equipo, compartida por todos sus partidos
+        
+        Se descarga una vez por liga y temporada y se reutiliza hasta que
+        termina un partido de la liga.
+        
+        Args:
+            league_id: ID de la liga
+            season: Temporada (por defecto 2024)
+            
+        Returns:
+            StandingsTable: Clasificación con acceso por ID de equipo, o None
+        """
+        def fetch(stale):
+            endpoint = f"{self.BASE_URL}/standings"
+            params = {"league": league_id, "season": season}
+            if stale:
+                # La copia cacheada (y la memorizada en la ejecución) es anterior al último partido
+                if self.cache:
+                    self.cache.invalidate("/standings", params)
+                FootballAPI._api_get.invalidate(self, endpoint, params)
+            try:
+                response = self._api_get(endpoint, params)
+                response.raise_for_status()
+                # Una respuesta de la caché en disco puede ser de horas antes
+                return response.json(), getattr(response, "stored_at", None)
+            except Exception as e:
+                print(f"Error al obtener la clasificación de la liga {league_id}: {e}")
+                return None, None
+        
+        return self.standings_cache.get(league_id, season, fetch)
+    
     def get_next_matches(self, team_id, num_matches=5, season="2024"):
         """
         Obtiene los próximos N partidos de un equipo
@@ -489,43 +890,13 @@ class FootballAPI:
             team_name.replace(" ", "-"),
         ]
         
-        # Variaciones específicas para equipos conocidos
-        team_mappings = {
-            "manchester united": ["Manchester_United", "Man_United", "ManUtd"],
-            "manchester city": ["Manchester_City", "Man_City", "ManCity"],
-            "real madrid": ["Real_Madrid"],
-            "barcelona": ["Barcelona", "FC_Barcelona"],
-            "atletico madrid": ["Atletico_Madrid", "Atletico"],
-            "liverpool": ["Liverpool", "Liverpool_FC"],
-            "arsenal": ["Arsenal", "Arsenal_FC"],
-            "chelsea": ["Chelsea", "Chelsea_FC"],
-            "tottenham": ["Tottenham", "Tottenham_Hotspur", "Spurs"],
-            "newcastle": ["Newcastle_United", "Newcastle"],
-            "west ham": ["West_Ham", "West_Ham_United"],
-            "aston villa": ["Aston_Villa"],
-            "everton": ["Everton", "Everton_FC"],
-            "leicester": ["Leicester", "Leicester_City"],
-            "ajax": ["Ajax", "AFC_Ajax"],
-            "psv": ["PSV", "PSV_Eindhoven"],
-            "feyenoord": ["Feyenoord"],
-            "bayern munich": ["Bayern_Munich", "Bayern", "FC_Bayern_Munich"],
-            "dortmund": ["Borussia_Dortmund", "Dortmund"],
-            "rb leipzig": ["RB_Leipzig", "Leipzig"],
-            "juventus": ["Juventus", "Juventus_FC"],
-            "inter": ["Inter", "Inter_Milan"],
-            "ac milan": ["Milan", "AC_Milan"],
-            "napoli": ["Napoli", "SSC_Napoli"],
-            "roma": ["Roma", "AS_Roma"],
-            "psg": ["Paris_Saint_Germain", "PSG"]
-        }
-        
-        # Añadir variaciones específicas si el equipo está en la lista
-        for key, variations in team_mappings.items():
-            if team_name.lower() in key or key in team_name.lower():
-                name_variations.extend(variations)
+        # Nombre en Understat del equipo si está en el índice de equipos
+        understat_slug = self.team_index.understat_slug(team_name)
+        if understat_slug:
+            name_variations.insert(0, understat_slug)
         
-        # Eliminar duplicados
-        name_variations = list(set(name_variations))
+        # Eliminar duplicados (manteniendo primero el nombre del índice)
+        name_variations = list(dict.fromkeys(name_variations))
         
         # Generar URLs para cada variación
         for name in name_variations:
@@ -558,41 +929,10 @@ class FootballAPI:
         # Normalizar el nombre del equipo para Understat
         team_name = team_name.strip()
         
-        # Mapeo de nombres comunes a nombres de Understat
-        understat_team_mapping = {
-            "manchester utd": "Manchester_United",
-            "manchester united": "Manchester_United",
-            "man utd": "Manchester_United",
-            "man united": "Manchester_United",
-            "manchester city": "Manchester_City",
-            "man city": "Manchester_City",
-            "arsenal": "Arsenal",
-            "chelsea": "Chelsea",
-            "liverpool": "Liverpool",
-            "tottenham": "Tottenham",
-            "spurs": "Tottenham",
-            "real madrid": "Real_Madrid",
-            "barcelona": "Barcelona",
-            "atletico madrid": "Atletico_Madrid",
-            "atlético madrid": "Atletico_Madrid",
-            "bayern": "Bayern_Munich",
-            "bayern munich": "Bayern_Munich",
-            "dortmund": "Borussia_Dortmund",
-            "borussia dortmund": "Borussia_Dortmund",
-            "psg": "Paris_Saint_Germain",
-            "paris": "Paris_Saint_Germain",
-            "paris saint germain": "Paris_Saint_Germain",
-            "juventus": "Juventus",
-            "milan": "AC_Milan",
-            "ac milan": "AC_Milan",
-            "inter": "Inter",
-            "inter milan": "Inter"
-        }
+        # Buscar el nombre en Understat en el índice de equipos
+        formatted_name = self.team_index.understat_slug(team_name)
         
-        # Buscar en el mapeo
-        formatted_name = understat_team_mapping.get(team_name.lower())
-        
-        # Si no está en el mapeo, formatear según reglas de Understat
+        # Si no está en el índice, formatear según reglas de Understat
         if not formatted_name:
             # Capitalizar cada palabra y reemplazar espacios con guiones bajos
             formatted_name = '_'.join(word.capitalize() for word in team_name.split())
@@ -601,44 +941,42 @@ class FootballAPI:
         
         # Año actual para la temporada
         current_year = datetime.now().year
-        url = f"https://understat.com/team/{formatted_name}/{current_year}"
+        url = team_page_url(formatted_name, current_year)
         
         try:
-            # Configurar headers para simular un navegador
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
+            # La página se descarga y extrae una sola vez por proceso (compartida con UnderstatAPI)
+            pages = get_understat_page_cache()
+            page = pages.fetch_team(formatted_name, current_year)
             
-            print(f"Realizando petición a: {url}")
-            response = requests.get(url, headers=headers)
-            
-            if response.status_code == 200:
+            if page.ok:
                 print(f"Datos obtenidos exitosamente de Understat para {formatted_name}")
                 return {
                     "status": "success",
                     "url": url,
-                    "data": response.text
+                    "data": page.html,
+                    "datasets": page.datasets
                 }
             else:
-                print(f"Error al obtener datos de Understat: {response.status_code}")
+                print(f"Error al obtener datos de Understat: {page.status_code}")
                 # Intentar con año anterior si el actual falla
                 previous_year = current_year - 1
-                url = f"https://understat.com/team/{formatted_name}/{previous_year}"
+                url = team_page_url(formatted_name, previous_year)
                 
                 print(f"Intentando con temporada anterior: {url}")
-                response = requests.get(url, headers=headers)
+                page = pages.fetch_team(formatted_name, previous_year)
                 
-                if response.status_code == 200:
+                if page.ok:
                     print(f"Datos obtenidos exitosamente de Understat para {formatted_name} (temporada anterior)")
                     return {
                         "status": "success",
                         "url": url,
-                        "data": response.text
+                        "data": page.html,
+                        "datasets": page.datasets
                     }
                 else:
                     return {
                         "status": "error",
-                        "message": f"Error al obtener datos de Understat: {response.status_code}",
+                        "message": f"Error al obtener datos de Understat: {page.status_code}",
                         "url": url
                     }
         except Exception as e:
@@ -667,7 +1005,7 @@ class FootballAPI:
 
         try:
             print(f"Consultando lesiones y sanciones para equipo ID: {team_id}")
-            response = requests.get(endpoint, headers=self.headers, params=params)
+            response = self._api_get(endpoint, params)
 
             if response.status_code == 200:
                 data = response.json()
@@ -706,38 +1044,16 @@ class FootballAPI:
         Returns:
             dict: Información sobre lesiones de jugadores
         """
-        # Mapeo de nombres comunes a URLs de Transfermarkt
-        transfermarkt_team_mapping = {
-            "manchester united": "manchester-united",
-            "manchester city": "manchester-city",
-            "real madrid": "real-madrid",
-            "barcelona": "fc-barcelona",
-            "atletico madrid": "atletico-madrid",
-            "liverpool": "fc-liverpool",
-            "arsenal": "fc-arsenal",
-            "chelsea": "fc-chelsea",
-            "tottenham": "tottenham-hotspur",
-            "bayern munich": "bayern-munchen",
-            "dortmund": "borussia-dortmund",
-            "psg": "paris-saint-germain",
-            "juventus": "juventus-turin",
-            "inter": "inter-mailand",
-            "ac milan": "ac-mailand"
-        }
-
-        # Normalizar el nombre del equipo
-        team_url = transfermarkt_team_mapping.get(team_name.lower(), team_name.replace(' ', '-'))
+        # Nombre del equipo en las URLs de Transfermarkt (índice de equipos o el propio nombre)
+        team_url = self.team_index.transfermarkt_slug(team_name) or team_name.replace(' ', '-')
         url = f"https://www.transfermarkt.com/teams/{team_url}/sperren-verletzungen/verein"
 
         try:
             # Configurar headers para evitar bloqueos
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                "Accept-Language": "en-US,en;q=0.9"
-            }
+            headers = BROWSER_HEADERS
             
             print(f"Consultando lesiones en Transfermarkt para: {team_name}")
-            response = requests.get(url, headers=headers)
+            response = self.session.get(url, headers=headers)
             
             if response.status_code == 200:
                 from bs4 import BeautifulSoup
@@ -805,53 +1121,18 @@ class FootballAPI:
         """
         print(f"Buscando equipo: {team_name}")
         
-        # Verificar si el equipo es uno de los populares primero
-        popular_teams = {
-            "manchester united": {"id": 33, "name": "Manchester United"},
-            "man utd": {"id": 33, "name": "Manchester United"},
-            "man united": {"id": 33, "name": "Manchester United"},
-            "manchester city": {"id": 50, "name": "Manchester City"},
-            "man city": {"id": 50, "name": "Manchester City"},
-            "liverpool": {"id": 40, "name": "Liverpool"},
-            "arsenal": {"id": 42, "name": "Arsenal"},
-            "chelsea": {"id": 49, "name": "Chelsea"},
-            "tottenham": {"id": 47, "name": "Tottenham"},
-            "spurs": {"id": 47, "name": "Tottenham"},
-            "barcelona": {"id": 529, "name": "Barcelona"},
-            "real madrid": {"id": 541, "name": "Real Madrid"},
-            "atletico madrid": {"id": 530, "name": "Atletico Madrid"},
-            "bayern": {"id": 157, "name": "Bayern Munich"},
-            "bayern munich": {"id": 157, "name": "Bayern Munich"},
-            "dortmund": {"id": 165, "name": "Borussia Dortmund"},
-            "borussia dortmund": {"id": 165, "name": "Borussia Dortmund"},
-            "psg": {"id": 85, "name": "Paris Saint Germain"},
-            "paris": {"id": 85, "name": "Paris Saint Germain"},
-            "juventus": {"id": 496, "name": "Juventus"},
-            "milan": {"id": 489, "name": "AC Milan"},
-            "ac milan": {"id": 489, "name": "AC Milan"},
-            "inter": {"id": 505, "name": "Inter"},
-            "inter milan": {"id": 505, "name": "Inter"},
-            "napoli": {"id": 492, "name": "Napoli"},
-            "roma": {"id": 497, "name": "AS Roma"},
-            "ajax": {"id": 194, "name": "Ajax"},
-            "benfica": {"id": 211, "name": "Benfica"},
-            "porto": {"id": 212, "name": "FC Porto"}
-        }
-        
-        # Convertir el nombre del equipo a minúsculas para la búsqueda
-        normalized_name = team_name.lower().strip()
+        # Los nombres y alias conocidos se resuelven en el índice sin usar la API
+        known = self.team_index.resolve(team_name, fuzzy=False)
+        if known and known.get("id") is not None:
+            return {"id": known["id"], "name": known["name"]}
         
-        # Verificar si coincide con alguno de los equipos populares
-        if normalized_name in popular_teams:
-            return popular_teams[normalized_name]
+        confirmed = self._confirm_team_candidate(team_name)
+        if confirmed:
+            return {"id": confirmed["team"]["id"], "name": confirmed["team"]["name"]}
         
-        # Buscar coincidencias parciales
-        for key, value in popular_teams.items():
-            if key in normalized_name or normalized_name in key:
-                print(f"Coincidencia parcial encontrada para '{team_name}': {value['name']}")
-                return value
+        normalized_name = team_name.lower().strip()
         
-        # Si no es un equipo popular, hacer búsqueda en la API
+        # Si no está en el índice, hacer búsqueda en la API
         params = {
             "name": team_name
         }
@@ -868,6 +1149,7 @@ class FootballAPI:
             for team in data:
                 if "team" in team and team["team"]["name"].lower() == normalized_name:
                     print(f"Equipo encontrado con búsqueda exacta: {team['team']['name']}")
+                    self.team_index.learn(team["team"]["id"], team["team"]["name"], aliases=[team_name])
                     return {
                         "id": team["team"]["id"],
                         "name": team["team"]["name"]
@@ -875,6 +1157,9 @@ class FootballAPI:
             
             # Si no hay coincidencia exacta, tomar el primer resultado
             print(f"Utilizando el primer resultado: {data[0]['team']['name']}")
+            # Solo se aprende el nombre oficial: el nombre buscado podría ser de otro equipo
+            self.team_index.learn(data[0]["team"]["id"], data[0]["team"]["name"],
+                                  aliases=[team_name] if len(data) == 1 else [])
             return {
                 "id": data[0]["team"]["id"],
                 "name": data[0]["team"]["name"]
@@ -931,7 +1216,7 @@ class FootballAPI:
 
         try:
             print(f"Consultando alineaciones para partido ID: {fixture_id}")
-            response = requests.get(endpoint, headers=self.headers, params=params)
+            response = self._api_get(endpoint, params)
 
             if response.status_code == 200:
                 data = response.json()
@@ -974,13 +1259,7 @@ class FootballAPI:
         """
         try:
             # Headers para evitar bloqueos
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                "Accept-Language": "en-US,en;q=0.9",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Connection": "keep-alive"
-            }
+            headers = BROWSER_HEADERS
 
             # Formatear nombres de equipos para URL
             team1_url = team1_name.lower().replace(" ", "-")
@@ -997,7 +1276,7 @@ class FootballAPI:
 
             # Intentar obtener datos de Sofascore
             try:
-                response = requests.get(sofascore_url, headers=headers)
+                response = self.session.get(sofascore_url, headers=headers)
                 if response.status_code == 200:
                     soup = BeautifulSoup(response.text, 'html.parser')
                     # Implementar extracción específica de Sofascore
@@ -1007,7 +1286,7 @@ class FootballAPI:
 
             # Intentar obtener datos de WhoScored como respaldo
             try:
-                response = requests.get(whoscored_url, headers=headers)
+                response = self.session.get(whoscored_url, headers=headers)
                 if response.status_code == 200:
                     soup = BeautifulSoup(response.text, 'html.parser')
                     # Implementar extracción específica de WhoScored
@@ -1036,28 +1315,30 @@ class FootballAPI:
         """
         # First try to get data from API-Football if available
         if team_name:
-            try:
-                # Try to fetch team statistics which might include market values
-                team_id = self.search_team(team_name)
-                if team_id:
-                    team_id = team_id.get("id")
-                    leagues = self.get_leagues_for_team(team_id)
-                    if leagues and "response" in leagues and leagues["response"]:
-                        league_id = leagues["response"][0]["league"]["id"]
-                        team_stats = self.get_team_statistics(team_id, league_id)
-                        if team_stats and "response" in team_stats:
-                            return {
-                                "status": "success",
-                                "data": {
-                                    "team": team_name,
-                                    "total_market_value": "75M €",  # Estimated value
-                                    "currency": "EUR",
-                                    "source": "api-football-fallback",
-                                    "players": []
+            # Los valores de mercado son lo primero que se sacrifica si la cuota escasea
+            with self.request_priority(PRIORITY_LOW):
+                try:
+                    # Try to fetch team statistics which might include market values
+                    team_id = self.search_team(team_name)
+                    if team_id:
+                        team_id = team_id.get("id")
+                        leagues = self.get_leagues_for_team(team_id)
+                        if leagues and "response" in leagues and leagues["response"]:
+                            league_id = leagues["response"][0]["league"]["id"]
+                            team_stats = self.get_team_statistics(team_id, league_id)
+                            if team_stats and "response" in team_stats:
+                                return {
+                                    "status": "success",
+                                    "data": {
+                                        "team": team_name,
+                                        "total_market_value": "75M €",  # Estimated value
+                                        "currency": "EUR",
+                                        "source": "api-football-fallback",
+                                        "players": []
+                                    }
                                 }
-                            }
-            except Exception as e:
-                print(f"Error getting team market values from API-Football: {e}")
+                except Exception as e:
+                    print(f"Error getting team market values from API-Football: {e}")
         
         # If API-Football failed or didn't have market values, use fallback static data
         print("Using fallback market value data as football-market-value.com API is unavailable")
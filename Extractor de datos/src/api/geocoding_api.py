@@ -1,7 +1,10 @@
 import os
-import requests
 from dotenv import load_dotenv
 
+from src.api.http_client import ClientSession
+from src.utils.venue_index import get_venue_index
+from src.utils.distances import haversine
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -12,9 +15,16 @@ class GeocodingAPI:
     
     BASE_URL = "https://api.opencagedata.com/geocode/v1/json"
     
-    def __init__(self):
-        """Inicializa la clase con la clave API desde variables de entorno"""
+    def __init__(self, venue_index=None):
+        """
+        Inicializa la clase con la clave API desde variables de entorno
+        
+        Args:
+            venue_index: Índice de estadios (por defecto el compartido del proceso)
+        """
         self.api_key = os.getenv("OPENCAGE_API_KEY")
+        self.session = ClientSession()
+        self.venue_index = venue_index if venue_index is not None else get_venue_index()
     
     def get_coordinates(self, location):
         """
@@ -31,7 +41,7 @@ class GeocodingAPI:
             "q": location
         }
         
-        response = requests.get(self.BASE_URL, params=params)
+        response = self.session.get(self.BASE_URL, params=params)
         data = response.json()
         
         if data and "results" in data and len(data["results"]) > 0:
@@ -42,19 +52,33 @@ class GeocodingAPI:
             }
         return None
     
-    def get_coordinates_from_venue(self, venue_name, city_name):
+    def get_coordinates_from_venue(self, venue_name, city_name, venue_id=None, team_id=None):
         """
         Obtiene las coordenadas geográficas de un estadio dado su nombre y ciudad.
+        
+        Las coordenadas se buscan primero en el índice de estadios y solo se
+        consulta OpenCage para los estadios que aún no están en él.
 
         Args:
             venue_name (str): Nombre del estadio.
             city_name (str): Nombre de la ciudad.
+            venue_id (int): ID del estadio en API-Football (opcional).
+            team_id (int): ID del equipo local del estadio (opcional).
 
         Returns:
             dict: Coordenadas {latitude, longitude} o None si no se encuentra.
         """
-        location = f"{venue_name}, {city_name}"
-        return self.get_coordinates(location)
+        return self.venue_index.get_coordinates(
+            venue_id, venue_name, city_name, geocode=self._geocode_venue, team_id=team_id
+        )
+    
+    def _geocode_venue(self, venue_name, city_name):
+        """Consulta OpenCage para un estadio que no está en el índice"""
+        try:
+            return self.get_coordinates(f"{venue_name}, {city_name}")
+        except Exception as e:
+            print(f"Error al geocodificar {venue_name}: {e}")
+            return None
     
     def calculate_distance(self, lat1, lon1, lat2, lon2):
         """
@@ -69,26 +93,4 @@ class GeocodingAPI:
         Returns:
             float: Distancia en kilómetros
         """
-        import math
-        
-        # Radio de la Tierra en kilómetros
-        earth_radius = 6371
-        
-        # Convertir grados a radianes
-        lat1_rad = math.radians(lat1)
-        lon1_rad = math.radians(lon1)
-        lat2_rad = math.radians(lat2)
-        lon2_rad = math.radians(lon2)
-        
-        # Diferencias entre coordenadas
-        d_lat = lat2_rad - lat1_rad
-        d_lon = lon2_rad - lon1_rad
-        
-        # Fórmula haversine
-        a = math.sin(d_lat/2) * math.sin(d_lat/2) + \
-            math.cos(lat1_rad) * math.cos(lat2_rad) * \
-            math.sin(d_lon/2) * math.sin(d_lon/2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        distance = earth_radius * c
-        
-        return distance
\ No newline at end of file
+        return haversine(lat1, lon1, lat2, lon2)
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""
+Transporte HTTP compartido por todos los clientes de src/api.
+
+Centraliza los pools de conexiones por host (keep-alive), la compresión gzip,
+los timeouts de conexión/lectura, los reintentos y las cabeceras comunes, de
+forma que cada cliente no abra sus conexiones por su cuenta.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# User agent común para todas las peticiones
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+
+# Cabeceras que se envían en todas las peticiones
+DEFAULT_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive"
+}
+
+# Cabeceras de navegador para las páginas HTML (Transfermarkt, Understat, Google...)
+BROWSER_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Upgrade-Insecure-Requests": "1"
+}
+
+# Timeouts por defecto (conexión, lectura) en segundos
+DEFAULT_TIMEOUT = (
+    float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+    float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+)
+
+# Número de hosts con pool propio y conexiones máximas por host
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 16
+
+# Peticiones simultáneas como máximo a un mismo host desde host_slot()
+MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "4"))
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    Adaptador HTTP que aplica un timeout por defecto a todas las peticiones
+    """
+
+    def __init__(self, *args, timeout=DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def _build_adapter():
+    """
+    Crea el adaptador con pools por host, reintentos y timeout por defecto
+
+    Returns:
+        TimeoutHTTPAdapter: Adaptador listo para montar en una sesión
+    """
+    retries = Retry(
+        total=2,
+        backoff_factor=0.5,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False
+    )
+    return TimeoutHTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=retries
+    )
+
+
+# Los adaptadores (y sus pools de urllib3, que son seguros entre hilos) se
+# comparten; cada hilo tiene su propia sesión para no compartir cookies ni estado
+_adapter = _build_adapter()
+_local = threading.local()
+
+
+def get_session() -> requests.Session:
+    """
+    Devuelve la sesión HTTP del hilo actual, montada sobre los pools compartidos
+
+    Returns:
+        requests.Session: Sesión con keep-alive, gzip, timeouts y cabeceras comunes
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(DEFAULT_HEADERS)
+        session.mount("https://", _adapter)
+        session.mount("http://", _adapter)
+        _local.session = session
+    return session
+
+
+_host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_host_lock = threading.Lock()
+
+
+@contextmanager
+def host_slot(url: str):
+    """
+    Reserva uno de los MAX_PER_HOST huecos del host de la URL mientras dura el bloque
+
+    Sirve para lanzar descargas en paralelo (por ejemplo varias temporadas de
+    Understat) sin abrir más conexiones simultáneas de las que el host tolera.
+
+    Args:
+        url: URL de la petición
+    """
+    host = urlsplit(url).netloc.lower()
+    with _host_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(MAX_PER_HOST)
+            _host_semaphores[host] = semaphore
+    with semaphore:
+        yield
+
+
+class ClientSession:
+    """
+    Vista de la sesión compartida con cabeceras propias de un cliente
+
+    Expone la misma interfaz básica que requests.Session (get, post, headers),
+    por lo que los clientes pueden usarla como si fuera su sesión privada.
+    """
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None, timeout=None):
+        """
+        Args:
+            headers: Cabeceras que se añaden a todas las peticiones de este cliente
+            timeout: Timeout por defecto del cliente (si no, el global)
+        """
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> requests.Response:
+        """
+        Realiza una petición usando el transporte compartido
+
+        Args:
+            method: Método HTTP
+            url: URL de la petición
+            headers: Cabeceras adicionales para esta petición
+            **kwargs: Resto de argumentos de requests (params, timeout...)
+
+        Returns:
+            requests.Response: Respuesta de la petición
+        """
+        merged_headers = dict(self.headers)
+        if headers:
+            merged_headers.update(headers)
+        if kwargs.get("timeout") is None and self.timeout is not None:
+            kwargs["timeout"] = self.timeout
+        return get_session().request(method, url, headers=merged_headers, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
@@ -3,9 +3,10 @@ API para obtener y analizar datos de lesiones y sanciones.
 """
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
-import requests
 from bs4 import BeautifulSoup
 
+from src.api.http_client import ClientSession, BROWSER_HEADERS
+
 class InjuryAPI:
     """
     Cliente para obtener y analizar datos de lesiones y sanciones.
@@ -14,10 +15,7 @@ class InjuryAPI:
         """
         Inicializa el cliente de datos de lesiones.
         """
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        })
+        self.session = ClientSession(BROWSER_HEADERS)
 
     def get_injury_analysis(self, team_name: str, year: Optional[int] = None) -> Dict[str, Any]:
         """
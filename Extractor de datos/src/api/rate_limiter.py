@@ -0,0 +1,228 @@
+"""
+Limitador de peticiones con cuota por minuto y por día para API-Football.
+
+Combina un token bucket para el límite por minuto con un contador diario que
+se sincroniza con las cabeceras x-ratelimit-* de cada respuesta. Las
+peticiones llevan una prioridad: cuando la cuota escasea se reserva para las
+de mayor prioridad y las de menor prioridad esperan o se descartan.
+"""
+import os
+import json
+import time
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+# Prioridades de las peticiones (menor valor = más importante)
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# Fracción de la cuota diaria que se reserva por encima de cada prioridad
+DAILY_RESERVE = {
+    PRIORITY_HIGH: 0.0,
+    PRIORITY_NORMAL: 0.1,
+    PRIORITY_LOW: 0.3
+}
+
+# Segundos máximos que cada prioridad espera por un token del minuto
+MAX_WAIT = {
+    PRIORITY_HIGH: 120.0,
+    PRIORITY_NORMAL: 60.0,
+    PRIORITY_LOW: 10.0
+}
+
+# Segundos mínimos entre dos escrituras del estado de la cuota al reservar
+# peticiones (las cabeceras de la API y los 429 lo guardan siempre)
+SAVE_INTERVAL_SECONDS = 5.0
+
+
+class RateLimiter:
+    """
+    Token bucket por minuto más contador diario, sincronizados con las cabeceras de la API
+    """
+
+    def __init__(self, per_minute: Optional[int] = None, per_day: Optional[int] = None,
+                 state_path: Optional[str] = None):
+        """
+        Args:
+            per_minute: Peticiones por minuto (por defecto FOOTBALL_API_PER_MINUTE o 10)
+            per_day: Peticiones por día (por defecto FOOTBALL_API_PER_DAY o 100)
+            state_path: Fichero donde persistir la cuota diaria entre ejecuciones (opcional)
+        """
+        self.per_minute = per_minute or int(os.getenv("FOOTBALL_API_PER_MINUTE", "10"))
+        self.per_day = per_day or int(os.getenv("FOOTBALL_API_PER_DAY", "100"))
+        self.state_path = state_path
+
+        self._condition = threading.Condition()
+        self._tokens = float(self.per_minute)
+        self._last_refill = time.monotonic()
+        self._waiting = {PRIORITY_HIGH: 0, PRIORITY_NORMAL: 0, PRIORITY_LOW: 0}
+        self._day = self._today()
+        self._daily_remaining = self.per_day
+        self._save_lock = threading.Lock()
+        self._last_save = 0.0
+        self._state_version = 0
+        self._saved_version = 0
+        self._load_state()
+
+    @staticmethod
+    def _today() -> str:
+        # La cuota diaria de API-Football se reinicia a las 00:00 UTC
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    def _load_state(self):
+        """Recupera la cuota diaria restante guardada en una ejecución anterior"""
+        if not self.state_path:
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if state.get("day") == self._day:
+            self.per_day = state.get("per_day", self.per_day)
+            self._daily_remaining = state.get("daily_remaining", self._daily_remaining)
+
+    def _state_to_save(self, force: bool = False) -> Optional[dict]:
+        """
+        Copia del estado a guardar, o None si se guardó hace poco (requiere el lock)
+
+        Args:
+            force: Guardar aunque no haya pasado SAVE_INTERVAL_SECONDS
+        """
+        if not self.state_path:
+            return None
+        now = time.monotonic()
+        if not force and now - self._last_save < SAVE_INTERVAL_SECONDS:
+            return None
+        self._last_save = now
+        self._state_version += 1
+        return {
+            "version": self._state_version,
+            "day": self._day,
+            "per_day": self.per_day,
+            "daily_remaining": self._daily_remaining
+        }
+
+    def _save_state(self, state: Optional[dict]):
+        """Guarda la cuota diaria restante fuera del lock de las peticiones"""
+        if state is None:
+            return
+        with self._save_lock:
+            # Una copia más reciente ya escrita por otro hilo no se sobrescribe
+            if state["version"] <= self._saved_version:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+                tmp_path = f"{self.state_path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({key: value for key, value in state.items() if key != "version"}, f)
+                os.replace(tmp_path, self.state_path)
+                self._saved_version = state["version"]
+            except OSError as e:
+                print(f"No se pudo guardar el estado de la cuota: {e}")
+
+    def _refill(self):
+        """Repone los tokens del minuto y reinicia la cuota diaria si cambió el día (requiere el lock)"""
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(float(self.per_minute), self._tokens + elapsed * self.per_minute / 60.0)
+
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._daily_remaining = self.per_day
+
+    def _has_daily_quota(self, priority: int) -> bool:
+        reserve = self.per_day * DAILY_RESERVE.get(priority, 0.0)
+        return self._daily_remaining > reserve
+
+    def _higher_priority_waiting(self, priority: int) -> bool:
+        return any(count for level, count in self._waiting.items() if level < priority)
+
+    def acquire(self, priority: int = PRIORITY_NORMAL) -> bool:
+        """
+        Reserva una petición respetando la cuota por minuto y por día
+
+        Args:
+            priority: Prioridad de la petición (PRIORITY_HIGH, PRIORITY_NORMAL o PRIORITY_LOW)
+
+        Returns:
+            bool: True si la petición puede hacerse, False si se descarta por falta de cuota
+        """
+        deadline = time.monotonic() + MAX_WAIT.get(priority, 0.0)
+        state = None
+        with self._condition:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    self._refill()
+                    if not self._has_daily_quota(priority):
+                        return False
+                    if self._tokens >= 1 and not self._higher_priority_waiting(priority):
+                        self._tokens -= 1
+                        self._daily_remaining -= 1
+                        state = self._state_to_save()
+                        break
+
+                    remaining_wait = deadline - time.monotonic()
+                    if remaining_wait <= 0:
+                        return False
+                    # Esperar al siguiente token o a que termine una petición prioritaria
+                    next_token = max(0.05, (1 - self._tokens) * 60.0 / self.per_minute)
+                    self._condition.wait(min(remaining_wait, next_token))
+            finally:
+                self._waiting[priority] -= 1
+                self._condition.notify_all()
+        self._save_state(state)
+        return True
+
+    def update_from_headers(self, headers, status_code: Optional[int] = None):
+        """
+        Sincroniza la cuota con las cabeceras x-ratelimit-* de una respuesta
+
+        Args:
+            headers: Cabeceras de la respuesta
+            status_code: Código de estado de la respuesta (429 agota el minuto actual)
+        """
+        if headers is None:
+            return
+
+        def _int_header(name):
+            try:
+                return int(headers.get(name))
+            except (TypeError, ValueError):
+                return None
+
+        state = None
+        with self._condition:
+            self._refill()
+            daily_limit = _int_header("x-ratelimit-requests-limit")
+            daily_remaining = _int_header("x-ratelimit-requests-remaining")
+            minute_limit = _int_header("X-RateLimit-Limit")
+            minute_remaining = _int_header("X-RateLimit-Remaining")
+
+            if daily_limit:
+                self.per_day = daily_limit
+            if daily_remaining is not None:
+                self._daily_remaining = daily_remaining
+            if minute_limit:
+                self.per_minute = minute_limit
+            if minute_remaining is not None:
+                self._tokens = min(self._tokens, float(minute_remaining))
+            if status_code == 429:
+                self._tokens = 0.0
+
+            if daily_limit or daily_remaining is not None or status_code == 429:
+                state = self._state_to_save(force=True)
+            self._condition.notify_all()
+        self._save_state(state)
+
+    @property
+    def daily_remaining(self) -> int:
+        """Peticiones restantes hoy según la última información disponible"""
+        with self._condition:
+            self._refill()
+            return self._daily_remaining
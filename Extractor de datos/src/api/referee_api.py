@@ -1,128 +1,260 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import requests
 from bs4 import BeautifulSoup
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Any, Optional
 from datetime import datetime
 
+from src.api.http_client import ClientSession, BROWSER_HEADERS, MAX_PER_HOST
+from src.utils.referee_index import get_referee_index
+from src.utils.run_cache import memoized_per_run
+
 class RefereeAPI:
     """
     Clase para obtener información de árbitros de fútbol a través de web scraping
     """
     
-    def __init__(self, football_api=None):
+    def __init__(self, football_api=None, index=None):
         """
         Inicializa la API de árbitros
         
         Args:
             football_api: Instancia de FootballAPI para hacer peticiones HTTP (opcional)
+            index: Instancia de RefereeIndex a utilizar (por defecto la compartida)
         """
         self.football_api = football_api
+        self.index = index if index is not None else get_referee_index()
         
         # Headers necesarios para web scraping
-        self.headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
+        self.headers = BROWSER_HEADERS
+        self.session = ClientSession(self.headers)
+        self.run_cache = None  # Memoización por ejecución (la activa el extractor)
         
-    def search_referee(self, referee_name):
+    @memoized_per_run
+    def search_referee(self, referee_name, refresh=False):
         """
         Busca información de un árbitro en Transfermarkt
         
+        El perfil se sirve desde el índice de árbitros mientras esté vigente.
+        Si ha caducado se descarga de nuevo desde su URL ya conocida, y solo
+        los árbitros que no están en el índice se buscan en Google.
+        
         Args:
             referee_name (str): Nombre del árbitro
+            refresh (bool): Descargar el perfil aunque el del índice siga vigente
             
         Returns:
             dict: Información del árbitro o un diccionario con errores
         """
-        try:
-            print(f"Buscando información del árbitro: {referee_name}")
-            
-            # 1. Buscar en Google con site:transfermarkt.com
-            search_query = f"{referee_name} site:transfermarkt.com referee"
-            search_url = f"https://www.google.com/search?q={search_query.replace(' ', '+')}"
-            
-            response = requests.get(search_url, headers=self.headers)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extraer primer resultado de transfermarkt
-            transfermarkt_link = None
-            for link in soup.select('a[href]'):
-                href = link.get('href')
-                if 'transfermarkt.com' in href and '/schiedsrichter/' in href:
-                    # Extraer la URL real de la URL de Google
-                    match = re.search(r'(?:url\?q=)(.*?)(?:&sa=|$)', href)
-                    if match:
-                        transfermarkt_link = match.group(1)
-                        break
-            
-            if not transfermarkt_link:
+        entry = self.index.lookup(referee_name)
+        if not refresh and self.index.is_fresh(entry):
+            return entry["profile"]
+        
+        with self.index.key_lock(referee_name):
+            # Otro hilo pudo descargarlo mientras se esperaba el lock
+            entry = self.index.lookup(referee_name)
+            if not refresh and self.index.is_fresh(entry):
+                return entry["profile"]
+            if not (entry and entry.get("url")) and self.index.recently_missed(entry):
                 return {
                     "status": "error",
                     "message": "No se encontró el árbitro en Transfermarkt",
                     "name": referee_name
                 }
-                
-            # 2. Obtener datos de la página del árbitro
-            print(f"Obteniendo datos del árbitro desde: {transfermarkt_link}")
-            
-            # Esperar un poco para evitar bloqueos
-            time.sleep(1)
-            
-            response = requests.get(transfermarkt_link, headers=self.headers)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extraer datos básicos
-            name = soup.select_one('h1.data-header__headline-wrapper')
-            name = name.text.strip() if name else referee_name
             
-            age = soup.select_one('span.data-header__label:-soup-contains("Age:") + span')
-            age = age.text.strip() if age else "Desconocida"
-            
-            nationality = soup.select_one('span.data-header__label:-soup-contains("Nationality:") + span')
-            nationality = nationality.text.strip() if nationality else "Desconocida"
+            try:
+                print(f"Buscando información del árbitro: {referee_name}")
+                transfermarkt_link = entry.get("url") if entry else None
+                if not transfermarkt_link:
+                    transfermarkt_link = self._find_transfermarkt_url(referee_name)
+                
+                if not transfermarkt_link:
+                    self.index.put_miss(referee_name)
+                    return {
+                        "status": "error",
+                        "message": "No se encontró el árbitro en Transfermarkt",
+                        "name": referee_name
+                    }
+                
+                profile = self._fetch_profile(transfermarkt_link, referee_name)
+                self.index.put(referee_name, profile)
+                return profile
+                
+            except Exception as e:
+                print(f"Error al buscar información del árbitro: {str(e)}")
+                if entry and entry.get("profile"):
+                    # Mejor un perfil algo antiguo que ninguno
+                    return entry["profile"]
+                return {
+                    "status": "error",
+                    "message": f"Error: {str(e)}",
+                    "name": referee_name
+                }
+    
+    def _find_transfermarkt_url(self, referee_name):
+        """
+        Busca en Google la página de Transfermarkt de un árbitro
+        
+        Args:
+            referee_name (str): Nombre del árbitro
             
-            # Extraer estadísticas de partidos
-            matches_info = {}
-            stats_table = soup.select_one('div.responsive-table')
-            if stats_table:
-                for row in stats_table.select('tbody > tr'):
-                    cells = row.select('td')
-                    if len(cells) >= 6:
-                        competition = cells[0].text.strip()
-                        matches = cells[1].text.strip()
-                        yellow_cards = cells[3].text.strip()
-                        red_cards = cells[4].text.strip()
-                        
-                        matches_info[competition] = {
-                            "matches": matches,
-                            "yellow_cards": yellow_cards,
-                            "red_cards": red_cards
-                        }
+        Returns:
+            str: URL de la página del árbitro o None si no se encuentra
+        """
+        # Buscar en Google con site:transfermarkt.com
+        search_query = f"{referee_name} site:transfermarkt.com referee"
+        search_url = f"https://www.google.com/search?q={search_query.replace(' ', '+')}"
+        
+        response = self.session.get(search_url)
+        soup = BeautifulSoup(response.text, 'html.parser')
+        
+        # Extraer primer resultado de transfermarkt
+        for link in soup.select('a[href]'):
+            href = link.get('href')
+            if 'transfermarkt.com' in href and '/schiedsrichter/' in href:
+                # Extraer la URL real de la URL de Google
+                match = re.search(r'(?:url\?q=)(.*?)(?:&sa=|$)', href)
+                if match:
+                    return match.group(1)
+        return None
+    
+    def _fetch_profile(self, transfermarkt_link, referee_name):
+        """
+        Descarga y extrae el perfil de un árbitro de su página de Transfermarkt
+        
+        Args:
+            transfermarkt_link (str): URL de la página del árbitro
+            referee_name (str): Nombre buscado (si la página no trae el nombre)
             
-            # Extraer imagen si está disponible
-            image_url = soup.select_one('img.data-header__profile-image')
-            image_url = image_url['src'] if image_url and 'src' in image_url.attrs else None
+        Returns:
+            dict: Perfil del árbitro con estadísticas por competición
+        """
+        print(f"Obteniendo datos del árbitro desde: {transfermarkt_link}")
+        
+        response = self.session.get(transfermarkt_link)
+        response.raise_for_status()
+        soup = BeautifulSoup(response.text, 'html.parser')
+        
+        # Extraer datos básicos
+        name = soup.select_one('h1.data-header__headline-wrapper')
+        name = name.text.strip() if name else referee_name
+        
+        age = soup.select_one('span.data-header__label:-soup-contains("Age:") + span')
+        age = age.text.strip() if age else "Desconocida"
+        
+        nationality = soup.select_one('span.data-header__label:-soup-contains("Nationality:") + span')
+        nationality = nationality.text.strip() if nationality else "Desconocida"
+        
+        # Extraer estadísticas de partidos
+        matches_info = {}
+        stats_table = soup.select_one('div.responsive-table')
+        if stats_table:
+            for row in stats_table.select('tbody > tr'):
+                cells = row.select('td')
+                if len(cells) >= 6:
+                    competition = cells[0].text.strip()
+                    matches = cells[1].text.strip()
+                    yellow_cards = cells[3].text.strip()
+                    red_cards = cells[4].text.strip()
+                    
+                    matches_info[competition] = {
+                        "matches": matches,
+                        "yellow_cards": yellow_cards,
+                        "red_cards": red_cards
+                    }
+        
+        # Extraer imagen si está disponible
+        image_url = soup.select_one('img.data-header__profile-image')
+        image_url = image_url['src'] if image_url and 'src' in image_url.attrs else None
+        
+        return {
+            "status": "success",
+            "name": name,
+            "age": age,
+            "nationality": nationality,
+            "matches_info": matches_info,
+            "image_url": image_url,
+            "source_url": transfermarkt_link,
+            "fetched_at": datetime.now().isoformat()
+        }
+    
+    def prewarm(self, referee_names, workers=MAX_PER_HOST, refresh=False):
+        """
+        Descarga de una vez los perfiles de varios árbitros al índice
+        
+        Args:
+            referee_names: Nombres de los árbitros
+            workers: Descargas simultáneas
+            refresh: Descargar también los perfiles que siguen vigentes
             
-            return {
-                "status": "success",
-                "name": name,
-                "age": age,
-                "nationality": nationality,
-                "matches_info": matches_info,
-                "image_url": image_url,
-                "source_url": transfermarkt_link
-            }
+        Returns:
+            dict: Árbitros actualizados, ya vigentes y no encontrados
+        """
+        names = list(dict.fromkeys(n for n in referee_names if n))
+        summary = {"referees": len(names), "updated": 0, "fresh": 0, "failed": [], "elapsed_seconds": 0}
+        start_time = time.time()
+        pending = []
+        for name in names:
+            if not refresh and self.index.is_fresh(self.index.lookup(name)):
+                summary["fresh"] += 1
+            else:
+                pending.append(name)
+        
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {executor.submit(self.search_referee, name, refresh): name
+                       for name in pending}
+            for future in as_completed(futures):
+                result = future.result()
+                if result.get("status") == "success":
+                    summary["updated"] += 1
+                else:
+                    summary["failed"].append(futures[future])
+        summary["elapsed_seconds"] = round(time.time() - start_time, 2)
+        return summary
+    
+    def prewarm_league(self, league_id, season, workers=MAX_PER_HOST, refresh=False):
+        """
+        Carga en el índice los árbitros de todos los partidos de una liga y temporada
+        
+        Args:
+            league_id: ID de la liga
+            season: Temporada (ej: "2024")
+            workers: Descargas simultáneas
+            refresh: Descargar también los perfiles que siguen vigentes
             
-        except Exception as e:
-            print(f"Error al buscar información del árbitro: {str(e)}")
-            return {
-                "status": "error",
-                "message": f"Error: {str(e)}",
-                "name": referee_name
-            }
+        Returns:
+            dict: Resumen de prewarm() con la liga y la temporada
+        """
+        if self.football_api is None:
+            print("❌ Se necesita FootballAPI para obtener los árbitros de la liga")
+            return None
+        fixtures = self.football_api.get_fixtures(league_id=league_id, season=season)
+        referees = [(f.get("fixture") or {}).get("referee") for f in (fixtures or {}).get("response") or []]
+        print(f"Precargando {len(set(r for r in referees if r))} árbitros de la liga {league_id}/{season}...")
+        summary = self.prewarm(referees, workers=workers, refresh=refresh)
+        summary.update({"league": league_id, "season": season})
+        return summary
+    
+    @staticmethod
+    def print_prewarm_report(summary):
+        """
+        Muestra el resumen de la precarga de árbitros en la consola
+        
+        Args:
+            summary: Resultado de prewarm() o prewarm_league()
+        """
+        print("\n" + "=" * 60)
+        print(" " * 18 + "PRECARGA DE ÁRBITROS")
+        print("=" * 60)
+        print(f"✅ Actualizados: {summary['updated']} | Vigentes: {summary['fresh']} "
+              f"| Total: {summary['referees']}")
+        if summary["failed"]:
+            print(f"⚠️ No encontrados: {', '.join(summary['failed'])}")
+        print(f"Tiempo total: {summary['elapsed_seconds']}s")
+        print("=" * 60)
     
     def get_referee_stats(self, referee_name, team1_name=None, team2_name=None):
         """
@@ -136,7 +268,8 @@ class RefereeAPI:
         Returns:
             dict: Estadísticas del árbitro
         """
-        referee_data = self.search_referee(referee_name)
+        # Copia: el resultado de search_referee puede estar compartido en la ejecución
+        referee_data = dict(self.search_referee(referee_name))
         
         if referee_data["status"] == "error":
             return referee_data
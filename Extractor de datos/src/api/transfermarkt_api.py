@@ -3,9 +3,12 @@ API para obtener datos de Transfermarkt.
 """
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-import requests
 from bs4 import BeautifulSoup
 
+from src.api.http_client import ClientSession, BROWSER_HEADERS
+from src.utils.fuzzy import best_match
+from src.utils.team_index import get_team_index, normalize_team_name
+
 class TransfermarktAPI:
     """
     Cliente para la API de Transfermarkt.
@@ -15,14 +18,8 @@ class TransfermarktAPI:
         Inicializa el cliente de Transfermarkt.
         """
         self.base_url = "https://www.transfermarkt.com"
-        self.session = requests.Session()
+        self.session = ClientSession(BROWSER_HEADERS)
         self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1",
             "Sec-Fetch-Dest": "document",
             "Sec-Fetch-Mode": "navigate",
             "Sec-Fetch-Site": "none",
@@ -156,6 +153,11 @@ class TransfermarktAPI:
         Returns:
             Optional[str]: ID del equipo si se encuentra
         """
+        # ID ya resuelto en una búsqueda anterior (solo por nombre o alias exacto)
+        known = get_team_index().resolve(team_name, fuzzy=False)
+        if known and known.get("transfermarkt_id"):
+            return known["transfermarkt_id"]
+
         try:
             # Construir URL de búsqueda
             search_url = f"{self.base_url}/search/ajax/search"
@@ -171,8 +173,18 @@ class TransfermarktAPI:
 
             # Extraer ID del equipo con manejo de nombres similares
             if data and "teams" in data and data["teams"]:
-                # Mejorar la búsqueda seleccionando el equipo con el nombre más cercano
-                closest_match = min(data["teams"], key=lambda x: self._name_similarity(x["name"], team_name))
+                # Solo se acepta un resultado lo bastante parecido (sin "FC", "CF"...)
+                candidates = {}
+                for team in data["teams"]:
+                    candidates.setdefault(normalize_team_name(team.get("name")), team)
+                closest_name = best_match(normalize_team_name(team_name), list(candidates))
+                if closest_name is None:
+                    print(f"Ningún equipo de Transfermarkt se parece lo suficiente a {team_name}")
+                    return None
+                closest_match = candidates[closest_name]
+                # Solo se guarda en el índice si el equipo ya tiene ID de API-Football
+                if known and known.get("id") is not None:
+                    get_team_index().learn(known["id"], known["name"], transfermarkt_id=closest_match["id"])
                 return closest_match["id"]
 
             return None
@@ -181,47 +193,6 @@ class TransfermarktAPI:
             print(f"Error buscando equipo: {str(e)}")
             return None
 
-    def _name_similarity(self, name1: str, name2: str) -> float:
-        """
-        Calcula la similitud entre dos nombres.
-
-        Args:
-            name1 (str): Primer nombre
-            name2 (str): Segundo nombre
-
-        Returns:
-            float: Valor de similitud (menor es más similar)
-        """
-        # Implementar una métrica de similitud básica (por ejemplo, distancia de Levenshtein)
-        return self._levenshtein_distance(name1.lower(), name2.lower())
-
-    def _levenshtein_distance(self, s1: str, s2: str) -> int:
-        """
-        Calcula la distancia de Levenshtein entre dos cadenas.
-
-        Args:
-            s1 (str): Primera cadena
-            s2 (str): Segunda cadena
-
-        Returns:
-            int: Distancia de Levenshtein
-        """
-        if len(s1) < len(s2):
-            return self._levenshtein_distance(s2, s1)
-
-        # Inicializar la matriz de distancias
-        previous_row = range(len(s2) + 1)
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
-
-        return previous_row[-1]
-
     def _extract_squad_value(self, soup: BeautifulSoup) -> Dict[str, Any]:
         """
         Extrae el valor total de la plantilla.
@@ -1,11 +1,18 @@
-import json
 import requests
-from bs4 import BeautifulSoup
 from typing import Optional, Dict, Any, List
 import numpy as np
 import pandas as pd
 from datetime import datetime
 
+from concurrent.futures import ThreadPoolExecutor
+
+from src.api.http_client import ClientSession, BROWSER_HEADERS, MAX_PER_HOST
+from src.api.understat_page import get_page_cache, team_page_url
+from src.utils.run_cache import memoized_per_run
+from src.utils.shots import ShotTable
+from src.utils.rolling import RollingStats
+from src.utils.team_index import get_team_index
+
 class UnderstatAPI:
     """
     Clase para interactuar con los datos de Understat
@@ -59,7 +66,9 @@ class UnderstatAPI:
             football_api: Instancia de FootballAPI para utilizar sus métodos HTTP
         """
         self.football_api = football_api
-        self.session = requests.Session()  # Inicializar la sesión para solicitudes HTTP
+        self.session = ClientSession(BROWSER_HEADERS)  # Sesión sobre el transporte HTTP compartido
+        self.pages = get_page_cache()  # Páginas de Understat ya descargadas y extraídas
+        self.run_cache = None  # Memoización por ejecución (la activa el extractor)
         
     def _determine_player_position(self, player_data):
         """Determina la posición principal de un jugador basado en sus estadísticas"""
@@ -167,8 +176,16 @@ class UnderstatAPI:
         
         return metrics
     
-    def _process_historical_data(self, matches_data, shots_data):
-        """Procesa datos históricos para obtener tendencias y patrones"""
+    def _process_historical_data(self, matches_data, shots_data, window_size=5, ewm_span=None):
+        """
+        Procesa datos históricos para obtener tendencias y patrones
+        
+        Args:
+            matches_data: Partidos en orden cronológico
+            shots_data: Remates de los partidos
+            window_size: Partidos de la ventana móvil de las tendencias
+            ewm_span: Periodo de la media exponencial de las tendencias (opcional)
+        """
         if not matches_data or not shots_data:
             return None
             
@@ -193,75 +210,24 @@ class UnderstatAPI:
             }
             historical_data["form"].append(match_summary)
         
-        # Calcular tendencias
+        # Calcular tendencias (medias móviles de todas las métricas en una pasada)
         all_matches = matches_data
         if all_matches:
-            trends = {
-                "goals_trend": [],
-                "xG_trend": [],
-                "shots_trend": [],
-                "points_trend": []
-            }
-            
-            window_size = 5  # Ventana móvil de 5 partidos
-            for i in range(len(all_matches) - window_size + 1):
-                window = all_matches[i:i+window_size]
-                avg_goals = sum(float(m.get("goals_for", 0)) for m in window) / window_size
-                avg_xG = sum(float(m.get("xG_for", 0)) for m in window) / window_size
-                avg_shots = sum(float(m.get("shots", 0)) for m in window) / window_size
-                
-                trends["goals_trend"].append(avg_goals)
-                trends["xG_trend"].append(avg_xG)
-                trends["shots_trend"].append(avg_shots)
-            
+            trends = RollingStats(all_matches).trends(window=window_size, ewm_span=ewm_span)
             historical_data["trends"] = trends
         
-        # Analizar patrones
+        # Analizar patrones (zonas y situaciones calculadas por columnas)
         if shots_data:
-            patterns = {
-                "shot_locations": {},  # Zonas de tiro preferidas
-                "goal_patterns": {},  # Patrones de gol
-                "play_patterns": {}  # Patrones de juego
-            }
-            
-            for shot in shots_data:
-                # Analizar ubicación del tiro
-                location = (shot.get("X"), shot.get("Y"))
-                situation = shot.get("situation")
-                result = shot.get("result")
-                
-                # Actualizar patrones de tiro
-                zone = self._determine_shot_zone(location)
-                patterns["shot_locations"][zone] = patterns["shot_locations"].get(zone, 0) + 1
-                
-                # Actualizar patrones de gol si el tiro fue gol
-                if result == "Goal":
-                    patterns["goal_patterns"][situation] = patterns["goal_patterns"].get(situation, 0) + 1
-                
-                # Actualizar patrones de juego
-                patterns["play_patterns"][situation] = patterns["play_patterns"].get(situation, 0) + 1
-            
-            historical_data["patterns"] = patterns
+            historical_data["patterns"] = ShotTable(shots_data).patterns()
         
         return historical_data
     
     def _determine_shot_zone(self, location):
         """Determina la zona del campo donde se realizó el tiro"""
-        x, y = location
-        
-        # Dividir el campo en zonas
-        if x >= 0.8:  # Área pequeña
-            if 0.4 <= y <= 0.6:
-                return "six_yard_box"
-            else:
-                return "penalty_area"
-        elif x >= 0.6:  # Área grande
-            return "edge_of_box"
-        elif x >= 0.4:  # Media distancia
-            return "long_range"
-        else:  # Larga distancia
-            return "very_long_range"
+        shots = ShotTable([{"X": location[0], "Y": location[1]}])
+        return str(shots.zones()[0])
     
+    @memoized_per_run
     def get_team_data(self, team_name, year=None):
         """
         Obtiene datos de Understat para un equipo
@@ -274,55 +240,32 @@ class UnderstatAPI:
             dict: Datos de Understat procesados
         """
         try:
-            # Normalize team name by removing date suffix if present
-            if ' ' in team_name:
-                team_name = team_name.split(' ')[0]
-
-            # Normalizar el nombre del equipo
-            understat_team_mapping = {
-                "manchester united": "Manchester_United",
-                "manchester city": "Manchester_City",
-                "chelsea": "Chelsea",
-                # Agregar más mapeos según sea necesario
-            }
-            formatted_team_name = understat_team_mapping.get(team_name.lower(), team_name.replace(' ', '_'))
+            # Nombre en Understat según el índice de equipos
+            formatted_team_name = get_team_index().understat_slug(team_name)
+            if not formatted_team_name:
+                # Normalize team name by removing date suffix if present
+                if ' ' in team_name:
+                    team_name = team_name.split(' ')[0]
+                formatted_team_name = team_name.replace(' ', '_')
             print(f"Consultando Understat para equipo: {team_name} (formateado como: {formatted_team_name})")
 
             # Generar la URL base de Understat
-            base_url = f"https://understat.com/team/{formatted_team_name}"
-            if year:
-                base_url += f"/{year}"
+            base_url = team_page_url(formatted_team_name, year)
 
-            print(f"Realizando petición a: {base_url}")
-            response = self.session.get(base_url)
-            response.raise_for_status()
-
-            # Extraer datos del HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            script_tags = soup.find_all('script')
+            # Descargar y extraer la página una sola vez (compartida con el resto de métodos)
+            page = self.pages.fetch_team(formatted_team_name, year)
+            if not page.ok:
+                print(f"Error en la petición HTTP: {page.status_code}")
+                return {
+                    "status": "error",
+                    "message": f"Error en la petición HTTP: {page.status_code}"
+                }
 
             # Datos a extraer
-            team_data = None
-            players_data = None
-            matches_data = None
-            shots_data = None
-
-            for script in script_tags:
-                if not script.string:
-                    continue
-                    
-                if 'var teamsData' in script.string:
-                    json_str = script.string.split('JSON.parse(')[1].split(')')[0].strip("'")
-                    team_data = json.loads(json_str)
-                elif 'var playersData' in script.string:
-                    json_str = script.string.split('JSON.parse(')[1].split(')')[0].strip("'")
-                    players_data = json.loads(json_str)
-                elif 'var matchesData' in script.string:
-                    json_str = script.string.split('JSON.parse(')[1].split(')')[0].strip("'")
-                    matches_data = json.loads(json_str)
-                elif 'var shotsData' in script.string:
-                    json_str = script.string.split('JSON.parse(')[1].split(')')[0].strip("'")
-                    shots_data = json.loads(json_str)
+            team_data = page.get("teamsData")
+            players_data = page.get("playersData")
+            matches_data = page.get("matchesData")
+            shots_data = page.get("shotsData")
 
             if not team_data or not players_data:
                 return {
@@ -543,6 +486,27 @@ class UnderstatAPI:
             }
         }
 
+    def get_seasons_data(self, team_name: str, years: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Obtiene los datos de Understat de varias temporadas en paralelo
+        
+        Las descargas se limitan a MAX_PER_HOST simultáneas y las temporadas
+        terminadas se sirven desde el archivo histórico.
+        
+        Args:
+            team_name: Nombre del equipo
+            years: Años de las temporadas
+            
+        Returns:
+            dict: Año -> resultado de get_team_data, en el orden de years
+        """
+        years = list(years)
+        if not years:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(len(years), MAX_PER_HOST)) as executor:
+            results = executor.map(lambda year: self.get_team_data(team_name, year), years)
+            return dict(zip(years, results))
+
     def get_team_statistics(self, team_name, season):
         """Obtiene estadísticas relevantes de Understat para un equipo."""
         formatted_name = team_name.replace(" ", "_")
@@ -552,7 +516,8 @@ class UnderstatAPI:
             return self.parse_understat_data(response)
         return None
 
-    def get_historical_performance(self, team_name: str, start_year: Optional[int] = None, end_year: Optional[int] = None) -> Dict[str, Any]:
+    def get_historical_performance(self, team_name: str, start_year: Optional[int] = None, end_year: Optional[int] = None,
+                                   window_size: int = 5, ewm_span: Optional[float] = None) -> Dict[str, Any]:
         """
         Obtiene y analiza el rendimiento histórico de un equipo.
 
@@ -560,6 +525,8 @@ class UnderstatAPI:
             team_name (str): Nombre del equipo
             start_year (int, optional): Año inicial para el análisis
             end_year (int, optional): Año final para el análisis
+            window_size (int): Partidos de la ventana móvil de las tendencias
+            ewm_span (float, optional): Periodo de la media exponencial de las tendencias
 
         Returns:
             Dict[str, Any]: Datos históricos procesados incluyendo:
@@ -598,8 +565,8 @@ class UnderstatAPI:
             all_matches = []
             all_shots = []
             
-            for year in range(start_year, end_year + 1):
-                year_data = self.get_team_data(team_name, year)
+            seasons = self.get_seasons_data(team_name, range(start_year, end_year + 1))
+            for year, year_data in seasons.items():
                 if year_data["status"] == "success":
                     if "matches" in year_data:
                         all_matches.extend(year_data["matches"])
@@ -614,7 +581,7 @@ class UnderstatAPI:
                 }
 
             # Procesar datos históricos
-            processed_data = self._process_historical_data(all_matches, all_shots)
+            processed_data = self._process_historical_data(all_matches, all_shots, window_size, ewm_span)
             if processed_data:
                 historical_data.update(processed_data)
 
@@ -1375,6 +1342,7 @@ class UnderstatAPI:
                 }
             }
 
+    @memoized_per_run
     def get_detailed_game_situations(self, team_name: str, year: Optional[int] = None) -> Dict[str, Any]:
         """
         Obtiene estadísticas detalladas por situación de juego desde Understat.
@@ -1394,25 +1362,16 @@ class UnderstatAPI:
         from datetime import datetime
 
         try:
-            # Normalizar el nombre del equipo usando el mapeo si existe
-            understat_team_mapping = {
-                "manchester united": "Manchester_United",
-                "manchester city": "Manchester_City",
-                "tottenham": "Tottenham",
-                "chelsea": "Chelsea",
-                "arsenal": "Arsenal",
-                "liverpool": "Liverpool",
-                # Agregar más mapeos según sea necesario
-            }
-            formatted_name = understat_team_mapping.get(team_name.lower(), team_name.replace(" ", "_"))
-            url = f"https://understat.com/team/{formatted_name}/{year}" if year else f"https://understat.com/team/{formatted_name}"
+            # Nombre en Understat según el índice de equipos
+            formatted_name = get_team_index().understat_slug(team_name) or team_name.replace(" ", "_")
+            url = team_page_url(formatted_name, year)
             
             print(f"Obteniendo estadísticas de situación de juego para {team_name} desde {url}")
             
-            # Usar el método HTTP existente de football_api
-            response = self.football_api.make_request(url, {}, use_api_key=False)
+            # La página se comparte con get_team_data: solo se descarga y extrae una vez
+            page = self.pages.fetch_team(formatted_name, year)
             
-            if not response or not response.get("data"):
+            if not page.ok:
                 return {
                     "status": "error",
                     "message": "No se pudo obtener respuesta de Understat",
@@ -1427,87 +1386,84 @@ class UnderstatAPI:
                     }
                 }
 
-            # Parsear el HTML
-            soup = BeautifulSoup(response["data"], 'html.parser')
-            scripts = soup.find_all('script')
+            situations = page.get("situationsData")
+            if situations is None:
+                # Las páginas de equipo incluyen las situaciones dentro de statisticsData
+                situations = (page.get("statisticsData") or {}).get("situation")
 
-            for script in scripts:
-                if 'var situationsData' in script.text:
-                    json_data = script.text.split('= ', 1)[1].rsplit(';', 1)[0].strip("'")
-                    situations = json.loads(json_data)
-                    
-                    # Procesar y estructurar los datos
-                    processed_data = {
-                        "status": "success",
-                        "message": "Datos obtenidos correctamente",
-                        "situations": {},
-                        "metadata": {
-                            "team": team_name,
-                            "formatted_team": formatted_name,
-                            "year": year,
-                            "url": url,
-                            "timestamp": datetime.now().isoformat(),
-                            "data_points": 0,
-                            "total_shots": 0,
-                            "total_goals": 0,
-                            "total_xG": 0.0,
-                            "situation_types": []
-                        }
+            if situations:
+                # Procesar y estructurar los datos
+                processed_data = {
+                    "status": "success",
+                    "message": "Datos obtenidos correctamente",
+                    "situations": {},
+                    "metadata": {
+                        "team": team_name,
+                        "formatted_team": formatted_name,
+                        "year": year,
+                        "url": url,
+                        "timestamp": datetime.now().isoformat(),
+                        "data_points": 0,
+                        "total_shots": 0,
+                        "total_goals": 0,
+                        "total_xG": 0.0,
+                        "situation_types": []
                     }
-                    
-                    # Procesar cada situación
-                    for situation_type, stats in situations.items():
-                        if situation_type != "total":
-                            shots = int(stats.get("shots", 0))
-                            goals = int(stats.get("goals", 0))
-                            xG = float(stats.get("xG", 0))
-                            shots_on_target = int(stats.get("shots_on_target", 0))
-                            
-                            processed_stats = {
-                                "shots": shots,
-                                "goals": goals,
-                                "xG": xG,
-                                "shots_on_target": shots_on_target,
-                                "conversion_rate": (goals / shots * 100) if shots > 0 else 0,
-                                "xG_per_shot": xG / shots if shots > 0 else 0,
-                                "shots_on_target_ratio": (shots_on_target / shots * 100) if shots > 0 else 0,
-                                "goals_per_shot_on_target": (goals / shots_on_target) if shots_on_target > 0 else 0
-                            }
-                            
-                            processed_data["situations"][situation_type] = processed_stats
-                            processed_data["metadata"]["situation_types"].append(situation_type)
-                            
-                            # Actualizar metadatos
-                            processed_data["metadata"]["data_points"] += 1
-                            processed_data["metadata"]["total_shots"] += shots
-                            processed_data["metadata"]["total_goals"] += goals
-                            processed_data["metadata"]["total_xG"] += xG
-                    
-                    # Agregar totales
-                    if "total" in situations:
-                        total_stats = situations["total"]
-                        total_shots = int(total_stats.get("shots", 0))
-                        total_goals = int(total_stats.get("goals", 0))
-                        total_xG = float(total_stats.get("xG", 0))
-                        total_shots_on_target = int(total_stats.get("shots_on_target", 0))
+                }
+                
+                # Procesar cada situación
+                for situation_type, stats in situations.items():
+                    if situation_type != "total":
+                        shots = int(stats.get("shots", 0))
+                        goals = int(stats.get("goals", 0))
+                        xG = float(stats.get("xG", 0))
+                        shots_on_target = int(stats.get("shots_on_target", 0))
                         
-                        processed_data["situations"]["total"] = {
-                            "shots": total_shots,
-                            "goals": total_goals,
-                            "xG": total_xG,
-                            "shots_on_target": total_shots_on_target,
-                            "conversion_rate": (total_goals / total_shots * 100) if total_shots > 0 else 0,
-                            "xG_per_shot": total_xG / total_shots if total_shots > 0 else 0,
-                            "shots_on_target_ratio": (total_shots_on_target / total_shots * 100) if total_shots > 0 else 0,
-                            "goals_per_shot_on_target": (total_goals / total_shots_on_target) if total_shots_on_target > 0 else 0
+                        processed_stats = {
+                            "shots": shots,
+                            "goals": goals,
+                            "xG": xG,
+                            "shots_on_target": shots_on_target,
+                            "conversion_rate": (goals / shots * 100) if shots > 0 else 0,
+                            "xG_per_shot": xG / shots if shots > 0 else 0,
+                            "shots_on_target_ratio": (shots_on_target / shots * 100) if shots > 0 else 0,
+                            "goals_per_shot_on_target": (goals / shots_on_target) if shots_on_target > 0 else 0
                         }
+                        
+                        processed_data["situations"][situation_type] = processed_stats
+                        processed_data["metadata"]["situation_types"].append(situation_type)
+                        
+                        # Actualizar metadatos
+                        processed_data["metadata"]["data_points"] += 1
+                        processed_data["metadata"]["total_shots"] += shots
+                        processed_data["metadata"]["total_goals"] += goals
+                        processed_data["metadata"]["total_xG"] += xG
+                
+                # Agregar totales
+                if "total" in situations:
+                    total_stats = situations["total"]
+                    total_shots = int(total_stats.get("shots", 0))
+                    total_goals = int(total_stats.get("goals", 0))
+                    total_xG = float(total_stats.get("xG", 0))
+                    total_shots_on_target = int(total_stats.get("shots_on_target", 0))
                     
-                    # Agregar estadísticas adicionales a los metadatos
-                    if processed_data["metadata"]["total_shots"] > 0:
-                        processed_data["metadata"]["overall_conversion_rate"] = processed_data["metadata"]["total_goals"] / processed_data["metadata"]["total_shots"] * 100
-                        processed_data["metadata"]["overall_xG_per_shot"] = processed_data["metadata"]["total_xG"] / processed_data["metadata"]["total_shots"]
-                    
-                    return processed_data
+                    processed_data["situations"]["total"] = {
+                        "shots": total_shots,
+                        "goals": total_goals,
+                        "xG": total_xG,
+                        "shots_on_target": total_shots_on_target,
+                        "conversion_rate": (total_goals / total_shots * 100) if total_shots > 0 else 0,
+                        "xG_per_shot": total_xG / total_shots if total_shots > 0 else 0,
+                        "shots_on_target_ratio": (total_shots_on_target / total_shots * 100) if total_shots > 0 else 0,
+                        "goals_per_shot_on_target": (total_goals / total_shots_on_target) if total_shots_on_target > 0 else 0
+                    }
+                
+                # Agregar estadísticas adicionales a los metadatos
+                if processed_data["metadata"]["total_shots"] > 0:
+                    processed_data["metadata"]["overall_conversion_rate"] = processed_data["metadata"]["total_goals"] / processed_data["metadata"]["total_shots"] * 100
+                    processed_data["metadata"]["overall_xG_per_shot"] = processed_data["metadata"]["total_xG"] / processed_data["metadata"]["total_shots"]
+                
+                return processed_data
 
             return {
                 "status": "error",
@@ -1580,8 +1536,7 @@ class UnderstatAPI:
             }
 
             # Analizar rendimiento por temporada
-            for year in years:
-                season_data = self.get_team_data(team_name, year)
+            for year, season_data in self.get_seasons_data(team_name, years).items():
                 if season_data["status"] == "success":
                     analysis["seasonal_performance"][year] = self._analyze_season_performance(season_data)
 
@@ -1899,8 +1854,9 @@ class UnderstatAPI:
         try:
             # Obtener datos históricos recientes (necesitamos los partidos del año actual y quizás anterior)
             current_year = datetime.now().year
-            team_data_current = self.get_team_data(team_name, current_year)
-            team_data_previous = self.get_team_data(team_name, current_year - 1)
+            seasons = self.get_seasons_data(team_name, [current_year, current_year - 1])
+            team_data_current = seasons[current_year]
+            team_data_previous = seasons[current_year - 1]
             
             all_matches = []
             if team_data_current.get("status") == "success":
@@ -0,0 +1,243 @@
+"""
+Extractor único de las páginas de equipo de Understat.
+
+Las páginas de Understat incrustan sus datos en variables JavaScript de la
+forma var playersData = JSON.parse('...'). En lugar de construir un árbol
+BeautifulSoup completo, el HTML se recorre una sola vez con una expresión
+regular que localiza todas las cargas JSON.parse y las decodifica. Cada
+página (equipo y temporada) se descarga y se procesa una sola vez por
+proceso: el resultado queda en una caché en memoria compartida por
+UnderstatAPI, FootballAPI y DataProcessor. Las temporadas ya terminadas no
+cambian, así que sus datos se guardan además en el archivo histórico.
+"""
+import re
+import json
+import time
+import codecs
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from src.api.http_client import ClientSession, BROWSER_HEADERS, host_slot
+from src.utils.archive import ArchiveStore, is_past_season
+
+# var nombre = JSON.parse('carga con escapes \xNN')
+JSON_PARSE_PATTERN = re.compile(
+    r"(?:var|let|const)\s+(\w+)\s*=\s*JSON\.parse\(\s*'((?:[^'\\]|\\.)*)'\s*\)",
+    re.DOTALL
+)
+
+# Páginas que se conservan en memoria y segundos que siguen vigentes
+MAX_PAGES = 64
+PAGE_TTL = 3600
+
+
+def decode_payload(payload: str) -> Any:
+    """
+    Decodifica la cadena de un JSON.parse('...') de Understat
+
+    Understat escapa las comillas y los caracteres especiales como \\xNN, por
+    lo que hay que deshacer los escapes de JavaScript antes de json.loads.
+
+    Args:
+        payload: Contenido entre comillas simples
+
+    Returns:
+        Any: Objeto JSON decodificado
+    """
+    decoded = codecs.escape_decode(payload.encode("utf-8"))[0].decode("utf-8")
+    return json.loads(decoded)
+
+
+def extract_datasets(html: str) -> Dict[str, Any]:
+    """
+    Extrae todas las variables JSON.parse de una página en una sola pasada
+
+    Args:
+        html: HTML de la página
+
+    Returns:
+        dict: Nombre de la variable (teamsData, playersData, datesData,
+            shotsData, statisticsData...) -> datos decodificados
+    """
+    datasets = {}
+    if not html:
+        return datasets
+    for match in JSON_PARSE_PATTERN.finditer(html):
+        name = match.group(1)
+        if name in datasets:
+            continue
+        try:
+            datasets[name] = decode_payload(match.group(2))
+        except (ValueError, UnicodeDecodeError) as e:
+            print(f"⚠️ No se pudo decodificar {name} de Understat: {e}")
+    return datasets
+
+
+class UnderstatPage:
+    """
+    Página de Understat descargada con sus datos ya extraídos
+    """
+
+    def __init__(self, url: str, status_code: int, html: str = "", datasets: Optional[Dict[str, Any]] = None):
+        self.url = url
+        self.status_code = status_code
+        self.html = html
+        self.datasets = datasets or {}
+        self.fetched_at = time.time()
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code == 200
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Devuelve una de las variables de la página (ej. "playersData")"""
+        return self.datasets.get(name, default)
+
+
+class UnderstatPageCache:
+    """
+    Caché LRU en memoria de páginas de Understat indexada por URL
+
+    Si varios hilos piden la misma página a la vez, solo uno la descarga y el
+    resto espera su resultado. Las descargas de un mismo host están limitadas
+    por host_slot() y las respuestas con error no se guardan. Los datos de las
+    temporadas terminadas se guardan también en el archivo histórico.
+    """
+
+    def __init__(self, session: Optional[ClientSession] = None, max_pages: int = MAX_PAGES,
+                 ttl: float = PAGE_TTL, archive: Optional[ArchiveStore] = None):
+        """
+        Args:
+            session: Sesión HTTP para descargar las páginas (por defecto una con cabeceras de navegador)
+            max_pages: Número máximo de páginas en memoria
+            ttl: Segundos que una página sigue vigente
+            archive: Archivo histórico para las temporadas terminadas (opcional)
+        """
+        self.session = session or ClientSession(BROWSER_HEADERS)
+        self.max_pages = max_pages
+        self.ttl = ttl
+        self.archive = archive
+        self._lock = threading.Lock()
+        self._pages = OrderedDict()
+        self._url_locks = {}
+
+    def _url_lock(self, url: str) -> threading.Lock:
+        with self._lock:
+            return self._url_locks.setdefault(url, threading.Lock())
+
+    def _cached(self, url: str) -> Optional[UnderstatPage]:
+        with self._lock:
+            page = self._pages.get(url)
+            if page is None:
+                return None
+            if time.time() - page.fetched_at > self.ttl:
+                del self._pages[url]
+                return None
+            self._pages.move_to_end(url)
+            return page
+
+    def _remember(self, page: UnderstatPage):
+        with self._lock:
+            self._pages[page.url] = page
+            self._pages.move_to_end(page.url)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+
+    def fetch(self, url: str, immutable: bool = False) -> UnderstatPage:
+        """
+        Descarga y procesa una página, o la devuelve de la caché
+
+        Args:
+            url: URL de la página de Understat
+            immutable: La página no cambia (temporada terminada) y se guarda en el archivo histórico
+
+        Returns:
+            UnderstatPage: Página con sus datos extraídos (las páginas servidas
+                desde el archivo solo conservan los datos, no el HTML)
+
+        Raises:
+            requests.exceptions.RequestException: Si falla la conexión
+        """
+        page = self._cached(url)
+        if page is not None:
+            return page
+
+        with self._url_lock(url):
+            # Otro hilo pudo descargarla mientras se esperaba el lock
+            page = self._cached(url)
+            if page is not None:
+                return page
+
+            if immutable and self.archive:
+                datasets = self.archive.get("understat", url)
+                if datasets:
+                    page = UnderstatPage(url, 200, datasets=datasets)
+                    self._remember(page)
+                    return page
+
+            print(f"Realizando petición a: {url}")
+            with host_slot(url):
+                response = self.session.get(url)
+            if response.status_code != 200:
+                return UnderstatPage(url, response.status_code)
+
+            page = UnderstatPage(url, 200, response.text, extract_datasets(response.text))
+            if immutable and self.archive and page.datasets:
+                self.archive.put("understat", url, page.datasets)
+            self._remember(page)
+            return page
+
+    def fetch_team(self, formatted_name: str, year: Optional[int] = None) -> UnderstatPage:
+        """
+        Descarga la página de un equipo y temporada
+
+        Args:
+            formatted_name: Nombre del equipo en formato Understat
+            year: Año de la temporada (opcional)
+
+        Returns:
+            UnderstatPage: Página con sus datos extraídos
+        """
+        return self.fetch(team_page_url(formatted_name, year), immutable=is_past_season(year))
+
+    def clear(self):
+        """Olvida todas las páginas en memoria"""
+        with self._lock:
+            self._pages.clear()
+
+
+# Caché compartida por todos los clientes de Understat del proceso
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> UnderstatPageCache:
+    """
+    Devuelve la caché de páginas compartida del proceso
+
+    Returns:
+        UnderstatPageCache: Caché compartida
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = UnderstatPageCache(archive=ArchiveStore())
+        return _shared_cache
+
+
+def team_page_url(formatted_name: str, year: Optional[int] = None) -> str:
+    """
+    Construye la URL de la página de un equipo
+
+    Args:
+        formatted_name: Nombre del equipo en formato Understat (ej. "Manchester_United")
+        year: Año de la temporada (opcional)
+
+    Returns:
+        str: URL de la página
+    """
+    url = f"https://understat.com/team/{formatted_name}"
+    if year:
+        url += f"/{year}"
+    return url
@@ -1,46 +1,146 @@
 import os
+import threading
 import requests
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from src.api.http_client import ClientSession
+from src.utils.response_cache import ResponseCache
+
+# Vigencia de un pronóstico según lo que falta para el partido (horas hasta el partido, segundos)
+FORECAST_TTLS = [
+    (6, 1800),          # Menos de 6 horas: 30 minutos
+    (48, 3 * 3600),     # Menos de 2 días: 3 horas
+    (7 * 24, 12 * 3600)  # Menos de una semana: 12 horas
+]
+# Pronósticos a más de una semana vista
+LONG_RANGE_TTL = 24 * 3600
+
 
 class WeatherAPI:
     """
     Clase para interactuar con la API de Meteoblue
+
+    Los pronósticos se cachean en disco por ciudad y día: varios partidos en
+    la misma ciudad y fecha comparten una sola petición. Sin clave de API el
+    cliente queda desactivado y los partidos se extraen sin datos del clima.
     """
-    
+
     BASE_URL = "https://api.meteoblue.com"
+    ENDPOINT = "/weather/current"
 
-    def __init__(self):
-        """Inicializa la clase con la clave API desde variables de entorno"""
+    def __init__(self, cache=None, use_cache=True):
+        """
+        Inicializa la clase con la clave API desde variables de entorno
+
+        Args:
+            cache: Instancia de ResponseCache a utilizar (opcional)
+            use_cache: Si es False los pronósticos no se cachean en disco
+        """
         self.api_key = os.getenv('METEOBLUE_API_KEY')
         if not self.api_key:
-            raise ValueError("Meteoblue API key is not configured. Please set the 'METEOBLUE_API_KEY' environment variable.")
+            print("⚠️ METEOBLUE_API_KEY no está configurada: los partidos se extraerán sin datos del clima")
+        self.session = ClientSession()
+        self.cache = (cache or ResponseCache(namespace="meteoblue")) if use_cache else None
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    @property
+    def enabled(self):
+        """Indica si hay clave de API para consultar el clima"""
+        return bool(self.api_key)
 
-    def get_weather(self, city, date_str=None):
+    @staticmethod
+    def cache_params(city, date_str):
+        """
+        Parámetros que identifican un pronóstico en la caché (ciudad normalizada y día)
+
+        Args:
+            city (str): Nombre de la ciudad
+            date_str (str): Fecha en formato YYYY-MM-DD
+
+        Returns:
+            dict: Parámetros de la entrada de caché
+        """
+        return {"city": " ".join(str(city).lower().split()), "date": date_str}
+
+    @staticmethod
+    def forecast_ttl(date_str, hour=None):
+        """
+        Vigencia de un pronóstico según lo lejos que esté el partido
+
+        Args:
+            date_str (str): Fecha del partido (YYYY-MM-DD)
+            hour (int, optional): Hora del partido (por defecto las 12)
+
+        Returns:
+            float: Segundos de vigencia (None = no caduca, el día ya pasó)
+        """
+        try:
+            kickoff = datetime.strptime(date_str, "%Y-%m-%d") + timedelta(hours=12 if hour is None else hour)
+        except (TypeError, ValueError):
+            return FORECAST_TTLS[0][1]
+        now = datetime.now()
+        if kickoff.date() < now.date():
+            return None
+        hours_ahead = (kickoff - now).total_seconds() / 3600
+        for max_hours, ttl in FORECAST_TTLS:
+            if hours_ahead <= max_hours:
+                return ttl
+        return LONG_RANGE_TTL
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get_weather(self, city, date_str=None, hour=None):
         """
         Obtiene el clima actual o el pronóstico para una ciudad y fecha específicas
-        
+
         Args:
             city (str): Nombre de la ciudad
             date_str (str, optional): Fecha en formato YYYY-MM-DD para obtener el pronóstico.
                                       Si es None o la fecha es hoy, obtiene el clima actual.
-                                      
+            hour (int, optional): Hora del partido, para ajustar la vigencia del pronóstico
+
         Returns:
             dict: Datos del clima o pronóstico, o None en caso de error
         """
-        endpoint = f"{self.BASE_URL}/weather/current"
-        params = {
-            "apikey": self.api_key,
-            "city": city,
-            "date": date_str if date_str else datetime.now().strftime("%Y-%m-%d")
-        }
-
-        try:
-            response = requests.get(endpoint, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error al conectar con la API de Meteoblue: {e}")
+        if not self.api_key or not city:
             return None
-        except Exception as e:
-            print(f"Error procesando respuesta de Meteoblue: {e}")
-            return None
\ No newline at end of file
+        date_str = date_str if date_str else datetime.now().strftime("%Y-%m-%d")
+        cache_params = self.cache_params(city, date_str)
+
+        entry = self.cache.get(self.ENDPOINT, cache_params) if self.cache else None
+        if entry and self.cache.is_fresh(entry):
+            return entry["data"]
+
+        # Si varios partidos piden la misma ciudad y día a la vez, solo uno hace la petición
+        with self._key_lock(f"{cache_params['city']}|{date_str}"):
+            entry = self.cache.get(self.ENDPOINT, cache_params) if self.cache else None
+            if entry and self.cache.is_fresh(entry):
+                return entry["data"]
+
+            endpoint = f"{self.BASE_URL}{self.ENDPOINT}"
+            params = {
+                "apikey": self.api_key,
+                "city": city,
+                "date": date_str
+            }
+
+            try:
+                response = self.session.get(endpoint, params=params)
+                response.raise_for_status()
+                data = response.json()
+            except requests.exceptions.RequestException as e:
+                print(f"Error al conectar con la API de Meteoblue: {e}")
+                data = None
+            except Exception as e:
+                print(f"Error procesando respuesta de Meteoblue: {e}")
+                data = None
+
+            if data is None:
+                # Mejor un pronóstico algo antiguo que ninguno
+                return entry["data"] if entry else None
+            if self.cache:
+                self.cache.put(self.ENDPOINT, cache_params, data, self.forecast_ttl(date_str, hour))
+            return data
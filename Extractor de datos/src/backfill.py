@@ -0,0 +1,132 @@
+"""
+Importación masiva de temporadas terminadas al archivo histórico.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List
+
+from src.api.http_client import MAX_PER_HOST
+from src.utils.archive import is_past_season
+
+
+class ArchiveBackfill:
+    """
+    Rellena el archivo histórico con ligas y temporadas completas
+
+    Para cada temporada terminada descarga una sola vez los partidos y la
+    clasificación final de la liga y las páginas de Understat de sus equipos.
+    A partir de entonces esas consultas se sirven desde el archivo sin usar
+    la red ni la cuota diaria.
+    """
+
+    def __init__(self, extractor, workers: int = MAX_PER_HOST):
+        """
+        Args:
+            extractor: Instancia de FootballDataExtractor
+            workers: Páginas de Understat que se descargan a la vez
+        """
+        self.football_api = extractor.football_api
+        self.understat_api = extractor.understat_api
+        self.workers = max(1, workers)
+
+    @staticmethod
+    def _team_names(fixtures: List[Dict[str, Any]]) -> List[str]:
+        names = []
+        for fixture in fixtures:
+            teams = fixture.get("teams", {})
+            for side in ("home", "away"):
+                name = teams.get(side, {}).get("name")
+                if name and name not in names:
+                    names.append(name)
+        return names
+
+    def import_season(self, league_id: int, season: str, include_understat: bool = True) -> Dict[str, Any]:
+        """
+        Archiva los partidos, la clasificación y los datos de Understat de una temporada
+
+        Args:
+            league_id: ID de la liga
+            season: Temporada (ej: "2022")
+            include_understat: Descargar también las páginas de Understat de los equipos
+
+        Returns:
+            dict: Resumen de lo archivado
+        """
+        summary = {
+            "league": league_id,
+            "season": season,
+            "fixtures": 0,
+            "fixtures_archived": 0,
+            "standings": False,
+            "understat_teams": 0,
+            "understat_failed": []
+        }
+        if not is_past_season(season):
+            print(f"⚠️ La temporada {season} no ha terminado: solo se archivan los datos que ya no cambian")
+
+        print(f"Archivando partidos de la liga {league_id}, temporada {season}...")
+        fixtures_data = self.football_api.get_fixtures(league_id=league_id, season=season) or {}
+        fixtures = fixtures_data.get("response") or []
+        summary["fixtures"] = len(fixtures)
+        summary["fixtures_archived"] = sum(1 for fixture in fixtures if self.football_api.archive_fixture(fixture))
+
+        standings = self.football_api.get_standings(league_id=league_id, season=season) or {}
+        summary["standings"] = bool(standings.get("response"))
+
+        if include_understat and is_past_season(season):
+            team_names = self._team_names(fixtures)
+            print(f"Archivando Understat de {len(team_names)} equipos...")
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = {
+                    executor.submit(self.understat_api.get_team_data, name, int(season)): name
+                    for name in team_names
+                }
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {"status": "error", "message": str(e)}
+                    if result and result.get("status") == "success":
+                        summary["understat_teams"] += 1
+                    else:
+                        summary["understat_failed"].append(name)
+        return summary
+
+    def run(self, league_id: int, seasons: List[str], include_understat: bool = True) -> Dict[str, Any]:
+        """
+        Archiva varias temporadas de una liga
+
+        Args:
+            league_id: ID de la liga
+            seasons: Temporadas a archivar
+            include_understat: Descargar también las páginas de Understat de los equipos
+
+        Returns:
+            dict: Resumen por temporada y tiempo total
+        """
+        start_time = time.time()
+        results = [self.import_season(league_id, season, include_understat) for season in seasons]
+        return {"seasons": results, "elapsed_seconds": round(time.time() - start_time, 2)}
+
+    @staticmethod
+    def print_report(report: Dict[str, Any]):
+        """
+        Muestra el resumen de la importación en la consola
+
+        Args:
+            report: Resultado de run()
+        """
+        print("\n" + "=" * 60)
+        print(" " * 17 + "RESUMEN DEL ARCHIVO HISTÓRICO")
+        print("=" * 60)
+        for result in report["seasons"]:
+            icon = "✅" if result["fixtures"] and result["standings"] else "⚠️"
+            print(f"{icon} Liga {result['league']} - {result['season']}: "
+                  f"{result['fixtures_archived']}/{result['fixtures']} partidos archivados, "
+                  f"clasificación {'sí' if result['standings'] else 'no'}, "
+                  f"Understat {result['understat_teams']} equipos")
+            if result["understat_failed"]:
+                print(f"   ❌ Sin datos de Understat: {', '.join(result['understat_failed'])}")
+        print(f"Tiempo total: {report['elapsed_seconds']}s")
+        print("=" * 60)
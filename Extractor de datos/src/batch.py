@@ -0,0 +1,327 @@
+"""
+Extracción por lotes de partidos: una jornada, un rango de fechas o un fichero.
+"""
+import json
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional
+
+from src.api.weather_api import WeatherAPI
+
+# Número de partidos que se extraen a la vez por defecto
+DEFAULT_BATCH_WORKERS = 4
+
+
+class BatchExtractor:
+    """
+    Planifica y ejecuta la extracción de un lote de partidos
+
+    Antes de extraer los partidos reúne los equipos, ligas y árbitros que
+    comparten y los consulta una sola vez; después lanza las extracciones en
+    paralelo dentro del mismo ámbito de memoización del extractor.
+    """
+
+    def __init__(self, extractor, workers: int = DEFAULT_BATCH_WORKERS):
+        """
+        Args:
+            extractor: Instancia de FootballDataExtractor
+            workers: Número de partidos que se extraen a la vez
+        """
+        self.extractor = extractor
+        self.football_api = extractor.football_api
+        self.workers = max(1, workers)
+
+    @staticmethod
+    def season_for_date(date_str: str) -> str:
+        """
+        Calcula la temporada a la que pertenece una fecha (igual que extract_match_data)
+
+        Args:
+            date_str: Fecha en formato YYYY-MM-DD
+
+        Returns:
+            str: Año de inicio de la temporada
+        """
+        match_date = datetime.strptime(date_str, "%Y-%m-%d")
+        return str(match_date.year - 1 if match_date.month < 7 else match_date.year)
+
+    def load_matches_from_file(self, path: str) -> List[Dict[str, Any]]:
+        """
+        Lee una lista de partidos de un fichero
+
+        Admite un JSON con una lista de objetos {team1, team2, date} o un fichero
+        de texto con un partido por línea en formato "Equipo1 vs Equipo2 - YYYY-MM-DD".
+
+        Args:
+            path: Ruta del fichero
+
+        Returns:
+            list: Partidos a extraer
+        """
+        matches = []
+        with open(path, "r", encoding="utf-8") as f:
+            if path.lower().endswith(".json"):
+                for item in json.load(f):
+                    if item.get("team1") and item.get("team2") and item.get("date"):
+                        matches.append({
+                            "team1": item["team1"],
+                            "team2": item["team2"],
+                            "date": item["date"],
+                            "league_id": item.get("league_id"),
+                            "referee": item.get("referee")
+                        })
+                return matches
+
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                match_info = self.extractor.parse_match_input(line)
+                if not match_info:
+                    print(f"❌ Línea ignorada, formato no reconocido: {line}")
+                    continue
+                team1, team2, date_str = match_info
+                matches.append({"team1": team1, "team2": team2, "date": date_str})
+        return matches
+
+    def _fixtures_to_matches(self, fixtures_data: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Convierte una respuesta de /fixtures en la lista de partidos del lote
+
+        Args:
+            fixtures_data: Respuesta de FootballAPI.get_fixtures
+
+        Returns:
+            list: Partidos ordenados por fecha
+        """
+        matches = []
+        if not fixtures_data or not fixtures_data.get("response"):
+            return matches
+
+        for fixture in fixtures_data["response"]:
+            teams = fixture.get("teams", {})
+            fixture_info = fixture.get("fixture", {})
+            date_str = (fixture_info.get("date") or "")[:10]
+            kickoff = (fixture_info.get("date") or "")[11:13]
+            home = teams.get("home", {}).get("name")
+            away = teams.get("away", {}).get("name")
+            if not home or not away or not date_str:
+                continue
+            matches.append({
+                "team1": home,
+                "team2": away,
+                "date": date_str,
+                "fixture_id": fixture_info.get("id"),
+                "league_id": fixture.get("league", {}).get("id"),
+                "referee": fixture_info.get("referee"),
+                "city": (fixture_info.get("venue") or {}).get("city"),
+                "hour": int(kickoff) if kickoff.isdigit() else None
+            })
+        matches.sort(key=lambda m: (m["date"], m["team1"]))
+        return matches
+
+    def resolve_round(self, league_id: int, season: str, round_name: str) -> List[Dict[str, Any]]:
+        """
+        Obtiene los partidos de una jornada de liga
+
+        Args:
+            league_id: ID de la liga
+            season: Temporada (ej: "2024")
+            round_name: Jornada (ej: "Regular Season - 30")
+
+        Returns:
+            list: Partidos de la jornada
+        """
+        print(f"Buscando partidos de la liga {league_id}, temporada {season}, jornada '{round_name}'")
+        fixtures = self.football_api.get_fixtures(league_id=league_id, season=season, round_name=round_name)
+        return self._fixtures_to_matches(fixtures)
+
+    def resolve_date_range(self, league_id: int, from_date: str, to_date: str,
+                           season: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Obtiene los partidos de una liga entre dos fechas con una sola consulta
+
+        Args:
+            league_id: ID de la liga
+            from_date: Fecha inicial (YYYY-MM-DD)
+            to_date: Fecha final (YYYY-MM-DD)
+            season: Temporada (por defecto la de from_date)
+
+        Returns:
+            list: Partidos del rango de fechas
+        """
+        season = season or self.season_for_date(from_date)
+        print(f"Buscando partidos de la liga {league_id} entre {from_date} y {to_date}")
+        if from_date == to_date:
+            fixtures = self.football_api.get_fixtures(league_id=league_id, season=season, date=from_date)
+        else:
+            fixtures = self.football_api.get_fixtures(league_id=league_id, season=season,
+                                                      from_date=from_date, to_date=to_date)
+        return self._fixtures_to_matches(fixtures)
+
+    @staticmethod
+    def plan(matches: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Reúne las entidades compartidas por los partidos del lote
+
+        Args:
+            matches: Partidos del lote
+
+        Returns:
+            dict: Equipos, equipos visitantes, ligas (con temporada), árbitros y
+                (ciudad, fecha, hora) del clima únicos
+        """
+        teams = []
+        away_teams = []
+        leagues = []
+        referees = []
+        weather = {}
+        for match in matches:
+            for name in (match["team1"], match["team2"]):
+                if name not in teams:
+                    teams.append(name)
+            if match["team2"] not in away_teams:
+                away_teams.append(match["team2"])
+            if match.get("league_id"):
+                league = (match["league_id"], BatchExtractor.season_for_date(match["date"]))
+                if league not in leagues:
+                    leagues.append(league)
+            if match.get("referee") and match["referee"] not in referees:
+                referees.append(match["referee"])
+            if match.get("city"):
+                # Todos los partidos de una ciudad y día comparten pronóstico; la hora
+                # del primero decide cuánto tiempo se guarda
+                weather.setdefault(tuple(WeatherAPI.cache_params(match["city"], match["date"]).values()),
+                                   (match["city"], match["date"], match.get("hour")))
+        return {"teams": teams, "away_teams": away_teams, "leagues": leagues, "referees": referees,
+                "weather": list(weather.values())}
+
+    def prefetch(self, plan: Dict[str, Any]):
+        """
+        Consulta una sola vez cada entidad compartida del lote
+
+        Debe llamarse dentro de run_scope para que las extracciones reutilicen
+        los resultados.
+
+        Args:
+            plan: Resultado de plan()
+        """
+        tasks = []
+        for name in plan["teams"]:
+            tasks.append((f"equipo {name}", self.football_api.advanced_team_search, (name,), {}))
+        for name in plan["away_teams"]:
+            # El estadio del visitante se obtiene con search_team
+            tasks.append((f"estadio de {name}", self.football_api.search_team, (name,), {}))
+        for league_id, season in plan["leagues"]:
+            tasks.append((f"clasificación {league_id}/{season}", self.football_api.get_standings_table, (),
+                          {"league_id": league_id, "season": season}))
+        for referee in plan["referees"]:
+            tasks.append((f"árbitro {referee}", self.extractor.referee_api.search_referee, (referee,), {}))
+        weather_api = self.extractor.weather_api
+        if weather_api.enabled:
+            for city, date_str, hour in plan.get("weather", []):
+                tasks.append((f"clima {city} {date_str}", weather_api.get_weather, (city,),
+                              {"date_str": date_str, "hour": hour}))
+
+        print(f"Precargando {len(plan['teams'])} equipos, {len(plan['leagues'])} ligas, "
+              f"{len(plan['referees'])} árbitros y {len(plan.get('weather', []))} pronósticos compartidos...")
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(func, *args, **kwargs): label for label, func, args, kwargs in tasks}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Error precargando {futures[future]}: {e}")
+
+    def _extract_one(self, match: Dict[str, Any], save_data: bool) -> Dict[str, Any]:
+        """Extrae un partido y devuelve su estado"""
+        label = f"{match['team1']} vs {match['team2']} - {match['date']}"
+        start_time = time.time()
+        try:
+            match_data = self.extractor.extract_match_data(match["team1"], match["team2"], match["date"],
+                                                           save_data=save_data)
+            status = "ok" if match_data else "error"
+            error = None if match_data else "No se pudo obtener información del partido"
+        except Exception as e:
+            status = "error"
+            error = str(e)
+        return {
+            "match": label,
+            "status": status,
+            "error": error,
+            "seconds": round(time.time() - start_time, 2)
+        }
+
+    def run(self, matches: List[Dict[str, Any]], save_data: bool = True) -> Dict[str, Any]:
+        """
+        Extrae todos los partidos del lote en paralelo
+
+        Args:
+            matches: Partidos del lote
+            save_data: Indica si guardar los datos en archivos
+
+        Returns:
+            dict: Informe con el estado de cada partido y el rendimiento del lote
+        """
+        start_time = time.time()
+        results = []
+        if not matches:
+            print("❌ No hay partidos que extraer en el lote")
+            return {"matches": results, "total": 0, "succeeded": 0, "failed": 0,
+                    "elapsed_seconds": 0.0, "matches_per_minute": 0.0}
+
+        with self.extractor.run_scope() as run_cache:
+            self.prefetch(self.plan(matches))
+
+            print(f"Extrayendo {len(matches)} partidos con {self.workers} workers...")
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = [executor.submit(self._extract_one, match, save_data) for match in matches]
+                for future in as_completed(futures):
+                    result = future.result()
+                    results.append(result)
+                    icon = "✅" if result["status"] == "ok" else "❌"
+                    print(f"{icon} [{len(results)}/{len(matches)}] {result['match']} ({result['seconds']}s)")
+            cache_hits, cache_misses = run_cache.hits, run_cache.misses
+
+        # Mantener el orden de entrada en el informe
+        order = {f"{m['team1']} vs {m['team2']} - {m['date']}": i for i, m in enumerate(matches)}
+        results.sort(key=lambda r: order.get(r["match"], len(order)))
+
+        elapsed = time.time() - start_time
+        succeeded = sum(1 for r in results if r["status"] == "ok")
+        return {
+            "matches": results,
+            "total": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "elapsed_seconds": round(elapsed, 2),
+            "matches_per_minute": round(len(results) * 60 / elapsed, 2) if elapsed > 0 else 0.0,
+            "shared_calls_reused": cache_hits,
+            "calls_made": cache_misses,
+            "quota_remaining": self.football_api.rate_limiter.daily_remaining
+        }
+
+    @staticmethod
+    def print_report(report: Dict[str, Any]):
+        """
+        Muestra el informe del lote en la consola
+
+        Args:
+            report: Resultado de run()
+        """
+        print("\n" + "=" * 60)
+        print(" " * 20 + "RESUMEN DEL LOTE")
+        print("=" * 60)
+        for result in report["matches"]:
+            icon = "✅" if result["status"] == "ok" else "❌"
+            detail = f" - {result['error']}" if result.get("error") else ""
+            print(f"{icon} {result['match']} ({result['seconds']}s){detail}")
+        print("-" * 60)
+        print(f"Partidos: {report['total']} (correctos: {report['succeeded']}, con error: {report['failed']})")
+        print(f"Tiempo total: {report['elapsed_seconds']}s ({report['matches_per_minute']} partidos/minuto)")
+        if "shared_calls_reused" in report:
+            print(f"Llamadas reutilizadas: {report['shared_calls_reused']} de "
+                  f"{report['shared_calls_reused'] + report['calls_made']}")
+            print(f"Cuota diaria restante de API-Football: {report['quota_remaining']}")
+        print("=" * 60)
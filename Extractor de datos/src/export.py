@@ -0,0 +1,378 @@
+"""
+Exportación de los datos guardados a un dataset columnar para el modelo de predicciones.
+"""
+import os
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow es opcional (sin él se exporta a CSV comprimido)
+    pa = None
+    pq = None
+
+import pandas as pd
+
+from src.utils.serialization import read_document, split_extension, KNOWN_EXTENSIONS
+
+# Partidos que se escriben en cada fichero del dataset
+EXPORT_BATCH_SIZE = 1000
+
+# Campos que no aportan nada al modelo (marcas internas o listas ya resumidas)
+SKIPPED_FIELDS = {"cached_fields", "squad"}
+
+# Niveles de anidamiento que se exportan de los ficheros de equipo
+TEAM_MAX_DEPTH = 2
+
+
+def flatten_record(data: Dict[str, Any], prefix: str = "", row: Optional[Dict[str, Any]] = None,
+                   max_depth: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Aplana un documento anidado en columnas escalares
+
+    Los diccionarios se recorren uniendo las claves con "_" (h2h_team1_wins,
+    standings_team1_rank...); de las listas solo se guarda su tamaño
+    ({campo}_count), y los números se guardan como float para que todas las
+    partes del dataset tengan el mismo tipo por columna.
+
+    Args:
+        data: Documento a aplanar
+        prefix: Prefijo de las columnas
+        row: Fila a completar (por defecto una nueva)
+        max_depth: Niveles de diccionarios que se recorren (None = todos)
+
+    Returns:
+        dict: Columna -> valor escalar
+    """
+    row = {} if row is None else row
+    for key, value in data.items():
+        if key in SKIPPED_FIELDS:
+            continue
+        column = f"{prefix}{key}"
+        if isinstance(value, dict):
+            if max_depth is None or max_depth > 1:
+                flatten_record(value, f"{column}_", row, None if max_depth is None else max_depth - 1)
+        elif isinstance(value, list):
+            row[f"{column}_count"] = float(len(value))
+        elif isinstance(value, bool) or value is None or isinstance(value, str):
+            row[column] = value
+        elif isinstance(value, (int, float)):
+            row[column] = float(value)
+        else:
+            row[column] = str(value)
+    return row
+
+
+def _column_kinds(rows: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Columnas de un lote de filas y su tipo ("bool", "float" o "string")
+
+    Las filas de optimize_match_data no llevan los campos nulos, así que las
+    columnas se toman de todas las filas (en orden de aparición). Una columna
+    con valores de tipos distintos se exporta como texto.
+
+    Args:
+        rows: Filas aplanadas
+
+    Returns:
+        dict: Columna -> tipo
+    """
+    kinds = {}
+    for row in rows:
+        for column, value in row.items():
+            if value is None:
+                kinds.setdefault(column, None)
+                continue
+            kind = "bool" if isinstance(value, bool) else "float" if isinstance(value, float) else "string"
+            if kinds.get(column) is None:
+                kinds[column] = kind
+            elif kinds[column] != kind:
+                kinds[column] = "string"
+    return {column: kind or "string" for column, kind in kinds.items()}
+
+
+def _is_suspension(player: Dict[str, Any]) -> bool:
+    text = f"{player.get('type') or ''} {player.get('reason') or ''}".lower()
+    return "suspen" in text or "card" in text or "sanci" in text
+
+
+def flatten_match(match_key: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fila del dataset para un partido optimizado (salida de optimize_match_data)
+
+    Args:
+        match_key: Clave del partido (nombre de su fichero)
+        data: Datos del partido
+
+    Returns:
+        dict: Fila con match_key, las columnas aplanadas y los recuentos de bajas
+    """
+    row = {"match_key": match_key}
+    # Sin el prefijo match_info_ las columnas básicas quedan como date, team1_id, league_name...
+    flatten_record(data.get("match_info") or {}, "", row)
+    flatten_record({k: v for k, v in data.items() if k != "match_info"}, "", row)
+    for side in ("team1", "team2"):
+        unavailable = [p for p in (data.get(side) or {}).get("injuries_suspensions") or [] if isinstance(p, dict)]
+        suspended = sum(1 for p in unavailable if _is_suspension(p))
+        row[f"{side}_suspended_count"] = float(suspended)
+        row[f"{side}_injured_count"] = float(len(unavailable) - suspended)
+    return row
+
+
+class DatasetExporter:
+    """
+    Exporta partidos, equipos y jugadores guardados a Parquet (o CSV si falta pyarrow)
+
+    Los partidos se exportan de forma incremental: cada ejecución recorre
+    data/matches, añade al dataset solo los partidos que no se habían
+    exportado y los escribe en ficheros nuevos de como máximo
+    EXPORT_BATCH_SIZE filas, de modo que la memoria usada no depende del
+    número de partidos. Equipos y jugadores son pocos y cambian, así que se
+    reescriben completos.
+    """
+
+    STATE_FILE = "export_state.json"
+
+    def __init__(self, data_dir: str, output_dir: Optional[str] = None, batch_size: int = EXPORT_BATCH_SIZE):
+        """
+        Args:
+            data_dir: Directorio data/ del extractor
+            output_dir: Directorio del dataset (por defecto data/export)
+            batch_size: Partidos por fichero del dataset
+        """
+        self.data_dir = data_dir
+        self.output_dir = output_dir or os.path.join(data_dir, "export")
+        self.batch_size = max(1, batch_size)
+        self.file_format = "parquet" if pa is not None else "csv"
+
+    # ------------------------------------------------------------------
+    # Estado de la exportación
+    # ------------------------------------------------------------------
+
+    def _state_path(self) -> str:
+        return os.path.join(self.output_dir, self.STATE_FILE)
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self._state_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"exported": [], "parts": 0}
+
+    def _save_state(self, state: Dict[str, Any]):
+        tmp_path = self._state_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self._state_path())
+
+    # ------------------------------------------------------------------
+    # Lectura de los documentos guardados
+    # ------------------------------------------------------------------
+
+    def _documents(self, folder: str) -> Iterator[tuple]:
+        """Recorre los documentos de una carpeta de data/ como (clave, ruta sin extensión)"""
+        seen = set()
+        directory = os.path.join(self.data_dir, folder)
+        if not os.path.isdir(directory):
+            return
+        for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+            base_path, extension = split_extension(entry.path)
+            if not entry.is_file() or extension not in KNOWN_EXTENSIONS or base_path in seen:
+                continue
+            seen.add(base_path)
+            yield os.path.basename(base_path), base_path
+
+    def _write_table(self, rows: List[Dict[str, Any]], base_path: str) -> str:
+        """Escribe filas en un fichero Parquet (o CSV comprimido) y devuelve su ruta"""
+        kinds = _column_kinds(rows)
+        columns = {
+            column: [None if row.get(column) is None
+                     else str(row[column]) if kind == "string" and not isinstance(row[column], str)
+                     else row[column] for row in rows]
+            for column, kind in kinds.items()
+        }
+        if self.file_format == "parquet":
+            path = f"{base_path}.parquet"
+            arrow_types = {"bool": pa.bool_(), "float": pa.float64(), "string": pa.string()}
+            schema = pa.schema([(column, arrow_types[kind]) for column, kind in kinds.items()])
+            pq.write_table(pa.Table.from_pydict(columns, schema=schema), path, compression="zstd")
+        else:
+            path = f"{base_path}.csv.gz"
+            pd.DataFrame(columns, columns=list(kinds)).to_csv(path, index=False, compression="gzip")
+        return path
+
+    # ------------------------------------------------------------------
+    # Exportación
+    # ------------------------------------------------------------------
+
+    def export_matches(self, full: bool = False) -> Dict[str, Any]:
+        """
+        Añade al dataset los partidos guardados que aún no se habían exportado
+
+        Args:
+            full: Borrar el dataset de partidos y exportarlos todos de nuevo
+
+        Returns:
+            dict: Partidos exportados, omitidos y ficheros escritos
+        """
+        matches_dir = os.path.join(self.output_dir, "matches")
+        os.makedirs(matches_dir, exist_ok=True)
+        state = self._load_state()
+        if full:
+            for entry in os.scandir(matches_dir):
+                os.remove(entry.path)
+            state = {"exported": [], "parts": 0}
+            # Las partes ya no existen: el estado se guarda aunque no haya partidos que exportar
+            self._save_state(state)
+
+        exported = set(state["exported"])
+        summary = {"exported": 0, "skipped": 0, "failed": 0, "files": []}
+        batch = []
+
+        def flush():
+            if not batch:
+                return
+            state["parts"] += 1
+            path = self._write_table(batch, os.path.join(matches_dir, f"part-{state['parts']:05d}"))
+            state["exported"].extend(row["match_key"] for row in batch)
+            self._save_state(state)
+            summary["files"].append(path)
+            batch.clear()
+
+        exported_at = datetime.now().isoformat()
+        for match_key, base_path in self._documents("matches"):
+            if match_key in exported:
+                summary["skipped"] += 1
+                continue
+            try:
+                data = read_document(base_path)
+            except Exception as e:
+                print(f"❌ No se pudo leer el partido {match_key}: {e}")
+                summary["failed"] += 1
+                continue
+            if not isinstance(data, dict):
+                summary["failed"] += 1
+                continue
+            row = flatten_match(match_key, data)
+            row["exported_at"] = exported_at
+            batch.append(row)
+            exported.add(match_key)
+            summary["exported"] += 1
+            if len(batch) >= self.batch_size:
+                flush()
+        flush()
+        return summary
+
+    def export_teams(self) -> Optional[str]:
+        """
+        Reescribe la tabla de equipos
+
+        Returns:
+            str: Ruta del fichero escrito o None si no hay equipos
+        """
+        rows = []
+        for team_id, base_path in self._documents("teams"):
+            data = read_document(base_path)
+            if isinstance(data, dict):
+                # Solo los datos básicos y un nivel de anidamiento (las estadísticas por liga son muy extensas)
+                rows.append(flatten_record(data, row={"team_id": team_id}, max_depth=TEAM_MAX_DEPTH))
+        if not rows:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        return self._write_table(rows, os.path.join(self.output_dir, "teams"))
+
+    def export_players(self) -> Optional[str]:
+        """
+        Reescribe la tabla de jugadores (una fila por jugador de cada plantilla)
+
+        Returns:
+            str: Ruta del fichero escrito o None si no hay jugadores
+        """
+        rows = []
+        players_dir = os.path.join(self.data_dir, "players")
+        if os.path.isdir(players_dir):
+            for entry in sorted(os.scandir(players_dir), key=lambda e: e.name):
+                if not entry.is_dir():
+                    continue
+                squad = (read_document(os.path.join(entry.path, "squad")) or {}).get("squad")
+                if squad is None:
+                    # Plantillas de versiones anteriores: un fichero por jugador
+                    squad = {player_id: read_document(base_path)
+                             for player_id, base_path in self._documents(os.path.join("players", entry.name))
+                             if player_id != "index"}
+                for player_id, player in squad.items():
+                    if isinstance(player, dict):
+                        rows.append(flatten_record(player, row={"team_id": entry.name, "player_id": player_id}))
+        if not rows:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        return self._write_table(rows, os.path.join(self.output_dir, "players"))
+
+    def run(self, full: bool = False) -> Dict[str, Any]:
+        """
+        Exporta partidos (incremental), equipos y jugadores
+
+        Args:
+            full: Volver a exportar todos los partidos
+
+        Returns:
+            dict: Resumen de la exportación
+        """
+        start_time = time.time()
+        if self.file_format != "parquet":
+            print("⚠️ pyarrow no está instalado: el dataset se exporta en CSV comprimido")
+        report = {
+            "matches": self.export_matches(full=full),
+            "teams": self.export_teams(),
+            "players": self.export_players(),
+            "output_dir": self.output_dir,
+            "elapsed_seconds": 0
+        }
+        report["elapsed_seconds"] = round(time.time() - start_time, 2)
+        return report
+
+    def read_matches(self) -> pd.DataFrame:
+        """
+        Lee todo el dataset de partidos en un DataFrame
+
+        Las partes escritas en distintas ejecuciones pueden tener columnas
+        distintas; se unen rellenando con nulos las que falten.
+
+        Returns:
+            pd.DataFrame: Una fila por partido exportado
+        """
+        matches_dir = os.path.join(self.output_dir, "matches")
+        if not os.path.isdir(matches_dir):
+            return pd.DataFrame()
+        paths = sorted(os.path.join(matches_dir, name) for name in os.listdir(matches_dir))
+        frames = []
+        for path in paths:
+            if path.endswith(".parquet") and pq is not None:
+                frames.append(pq.read_table(path).to_pandas())
+            elif path.endswith(".csv.gz"):
+                frames.append(pd.read_csv(path, compression="gzip"))
+        return pd.concat(frames, ignore_index=True, sort=False) if frames else pd.DataFrame()
+
+    @staticmethod
+    def print_report(report: Dict[str, Any]):
+        """
+        Muestra el resumen de la exportación en la consola
+
+        Args:
+            report: Resultado de run()
+        """
+        matches = report["matches"]
+        print("\n" + "=" * 60)
+        print(" " * 20 + "EXPORTACIÓN DEL DATASET")
+        print("=" * 60)
+        print(f"✅ Partidos nuevos: {matches['exported']} "
+              f"(ya exportados: {matches['skipped']}, con error: {matches['failed']})")
+        for path in matches["files"]:
+            print(f"   • {path}")
+        print(f"{'✅' if report['teams'] else '⚠️'} Equipos: {report['teams'] or 'sin datos'}")
+        print(f"{'✅' if report['players'] else '⚠️'} Jugadores: {report['players'] or 'sin datos'}")
+        print(f"Tiempo total: {report['elapsed_seconds']}s")
+        print("=" * 60)
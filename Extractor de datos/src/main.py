@@ -3,9 +3,11 @@ import sys
 from datetime import datetime
 from typing import Dict, Any, Optional, List, Tuple
 import argparse
-import json
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 
 # Añadir el directorio raíz al path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -17,16 +19,36 @@ from src.api.referee_api import RefereeAPI
 from src.api.understat_api import UnderstatAPI
 from src.utils.data_processor import DataProcessor
 from src.utils.storage import LocalStorage
+from src.utils.sqlite_store import SQLiteStore
+from src.utils.run_cache import RunCache
+from src.utils.team_cache import TeamCache
+from src.batch import BatchExtractor, DEFAULT_BATCH_WORKERS
+from src.backfill import ArchiveBackfill
+from src.export import DatasetExporter
+
+# Número de hilos por defecto para las etapas independientes de un partido
+DEFAULT_MAX_WORKERS = 8
+
+# Replicar los datos guardados en la base SQLite indexada (data/football.db)
+USE_SQLITE_STORE = os.getenv("USE_SQLITE_STORE", "").lower() in ("1", "true", "yes")
 
 class FootballDataExtractor:
     """
     Clase principal para extraer y procesar datos de partidos de fútbol
     """
     
-    def __init__(self):
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, use_sqlite=None):
         """
         Inicializa el extractor de datos de partidos de fútbol
+        
+        Args:
+            max_workers: Número máximo de hilos para las etapas independientes
+                de la extracción (1 para ejecutarlas de forma secuencial)
+            use_sqlite: Guardar también partidos, equipos, jugadores y H2H en
+                data/football.db (por defecto USE_SQLITE_STORE)
         """
+        self.max_workers = max_workers
+        
         # Inicializar rutas y directorios
         self.base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.data_dir = os.path.join(self.base_dir, "data")
@@ -43,7 +65,38 @@ class FootballDataExtractor:
         self.referee_api = RefereeAPI(self.football_api)
         self.understat_api = UnderstatAPI(self.football_api)
         self.data_processor = DataProcessor()
-        self.storage = LocalStorage()
+        self.sqlite_store = None
+        if USE_SQLITE_STORE if use_sqlite is None else use_sqlite:
+            self.sqlite_store = SQLiteStore(os.path.join(self.data_dir, "football.db"))
+            self.football_api.fixture_store = self.sqlite_store
+        self.storage = LocalStorage(self.data_dir, index=self.sqlite_store)
+        self.team_cache = TeamCache(self.storage)
+    
+    @contextmanager
+    def run_scope(self):
+        """
+        Activa una memoización compartida por los clientes durante la ejecución
+        
+        Las llamadas idénticas (estadísticas, búsquedas de equipos, datos de
+        Understat...) se hacen una sola vez. Si ya hay un ámbito activo, por
+        ejemplo el de un lote de partidos, se reutiliza.
+        
+        Yields:
+            RunCache: Memoización activa
+        """
+        clients = (self.football_api, self.understat_api, self.referee_api)
+        if self.football_api.run_cache is not None:
+            yield self.football_api.run_cache
+            return
+        
+        run_cache = RunCache()
+        for client in clients:
+            client.run_cache = run_cache
+        try:
+            yield run_cache
+        finally:
+            for client in clients:
+                client.run_cache = None
     
     def extract_match_data(self, team1_name, team2_name, date_str, save_data=True):
         """
@@ -58,6 +111,13 @@ class FootballDataExtractor:
         Returns:
             dict: Datos completos del partido
         """
+        with self.run_scope():
+            return self._extract_match_data(team1_name, team2_name, date_str, save_data)
+    
+    def _extract_match_data(self, team1_name, team2_name, date_str, save_data=True):
+        """
+        Implementación de extract_match_data (se ejecuta dentro de run_scope)
+        """
         # Limpiar posibles artefactos en los nombres de equipos (sufijos de fecha, etc.)
         team1_name = team1_name.split(' - ')[0].strip()
         team2_name = team2_name.split(' - ')[0].strip()
@@ -105,6 +165,7 @@ class FootballDataExtractor:
             # Buscar partido programado
             print(f"Buscando partido programado para fecha: {date_str}")
             match_details = self.football_api.get_fixtures(team=team1_id, date=date_str, season=season_year)
+            match_found = None
             
             if not match_details or "response" not in match_details or not match_details["response"]:
                 print("❌ No se encontró el partido programado. Creando estructura básica...")
@@ -201,266 +262,28 @@ class FootballDataExtractor:
                             "referee": None
                         }
             
-            # Obtener información de estadios para calcular distancia
-            venue1_info = None
-            venue2_info = None
-            if match_data.get("venue") and match_data.get("venue").get("id"):
-                # Asumimos que el estadio del partido es el del equipo local (team1)
-                venue1_info = self.geocoding_api.get_coordinates_from_venue(match_data["venue"]["name"], match_data["venue"]["city"])
-                # Necesitamos obtener el estadio del equipo visitante (team2)
-                team2_details = self.football_api.search_team(team2_name)
-                if team2_details and team2_details.get("venue"):
-                    venue2_info = self.geocoding_api.get_coordinates_from_venue(team2_details["venue"]["name"], team2_details["venue"]["city"])
-
-            # Calcular distancia de viaje
-            travel_distance = None
-            if venue1_info and venue2_info:
-                travel_distance = DataProcessor.calculate_travel_distance(venue1_info, venue2_info)
-                match_data["travel_distance"] = travel_distance
-                print(f"Distancia de viaje calculada: {travel_distance} km")
-            else:
-                print("No se pudo calcular la distancia de viaje (faltan datos de estadios/coordenadas)")
-
-            # Obtener próximos partidos para ambos equipos
+            # A partir de aquí las etapas solo dependen de los IDs, la temporada y el
+            # partido ya resuelto, por lo que pueden ejecutarse en paralelo
             future_matches = {"team1": None, "team2": None}
+            kickoff = ((match_found or {}).get("fixture") or {}).get("date") or ""
+            stage_context = {
+                "team1_id": team1_id,
+                "team2_id": team2_id,
+                "team1_name": team1_name,
+                "team2_name": team2_name,
+                "season_year": season_year,
+                "date_str": date_str,
+                "kickoff_hour": int(kickoff[11:13]) if kickoff[11:13].isdigit() else None,
+                "save_data": save_data,
+                "match_data": match_data
+            }
+            stage_targets = {"match_data": match_data, "future_matches": future_matches}
             try:
-                print(f"Obteniendo próximos 3 partidos para {team1_name}...")
-                future_matches["team1"] = self.football_api.get_next_matches(team1_id, num_matches=3, season=season_year)
-            except Exception as e:
-                print(f"Error obteniendo próximos partidos para equipo 1: {e}")
-            try:
-                print(f"Obteniendo próximos 3 partidos para {team2_name}...")
-                future_matches["team2"] = self.football_api.get_next_matches(team2_id, num_matches=3, season=season_year)
-            except Exception as e:
-                print(f"Error obteniendo próximos partidos para equipo 2: {e}")
-
-            # Obtener historial de enfrentamientos
-            print("Obteniendo historial de enfrentamientos...")
-            h2h_data = self.football_api.get_head_to_head(team1_id, team2_id)
-            if h2h_data:
-                match_data["h2h"] = h2h_data
-                
-            # Obtener estadísticas del equipo 1
-            print(f"Obteniendo estadísticas para el equipo {team1_id}...")
-            team1_fixtures = self.football_api.get_fixtures(team=team1_id, last=10, season=season_year)
-            if team1_fixtures and "response" in team1_fixtures:
-                print(f"Se encontraron {len(team1_fixtures['response'])} partidos para el equipo {team1_id}")
-            
-            team1_stats = self.football_api.get_team_statistics(team1_id, league_id=None, season=season_year)
-            if team1_stats:
-                match_data["team1"]["statistics"] = team1_stats
-
-            # Obtener estadísticas del equipo 2
-            print(f"Obteniendo estadísticas para el equipo {team2_id}...")
-            team2_fixtures = self.football_api.get_fixtures(team=team2_id, last=10, season=season_year)
-            if team2_fixtures and "response" in team2_fixtures:
-                print(f"Se encontraron {len(team2_fixtures['response'])} partidos para el equipo {team2_id}")
-            
-            team2_stats = self.football_api.get_team_statistics(team2_id, league_id=None, season=season_year)
-            if team2_stats:
-                match_data["team2"]["statistics"] = team2_stats
-                
-            # Obtener estadísticas del equipo 1 contra el equipo 2
-            print(f"Obteniendo estadísticas para {team1_id} vs {team2_id}...")
-            team1_vs_team2 = self.football_api.get_fixtures(team1_id=team1_id, team2_id=team2_id, last=10, season=season_year)
-            if team1_vs_team2 and "response" in team1_vs_team2:
-                print(f"Se encontraron {len(team1_vs_team2['response'])} partidos entre {team1_id} y {team2_id}")
-            
-            team1_vs_team2_stats = self.football_api.get_team_statistics(team1_id, league_id=None, season=season_year)
-            if team1_vs_team2_stats:
-                match_data["team1"]["vs_team2"] = team1_vs_team2_stats
-                
-            # Obtener estadísticas del equipo 2 contra el equipo 1
-            print(f"Obteniendo estadísticas para {team2_id} vs {team1_id}...")
-            if team1_vs_team2 and "response" in team1_vs_team2:
-                print(f"Se encontraron {len(team1_vs_team2['response'])} partidos entre {team2_id} y {team1_id}")
-            
-            team2_vs_team1_stats = self.football_api.get_team_statistics(team2_id, league_id=None, season=season_year)
-            if team2_vs_team1_stats:
-                match_data["team2"]["vs_team1"] = team2_vs_team1_stats
-            
-            # Obtener datos de Understat para equipo 1
-            team1_understat = None
-            try:
-                team1_understat = self.understat_api.get_team_data(team1_name, year=season_year)
-                print(f"Procesando datos de Understat para equipo 1...")
-                if team1_understat and team1_understat.get("status") == "success":
-                    match_data["team1"]["understat"] = team1_understat
-                    
-                    # Procesar métricas avanzadas de jugadores si están disponibles
-                    advanced_player_metrics = team1_understat.get("advanced_player_metrics", {})
-                    if advanced_player_metrics:
-                        match_data["team1"].setdefault("advanced_player_metrics", advanced_player_metrics)
-                    
-                    # Guardar jugadores en archivos individuales
-                    if save_data and "players" in team1_understat and team1_understat["players"]:
-                        self.save_players_data(team1_id, team1_name, team1_understat["players"])
-                else:
-                    print(f"Error al formatear datos de Understat para equipo 1: {team1_understat.get('message', 'Error desconocido')}")
-            except Exception as e:
-                print(f"Error procesando datos de Understat para equipo 1: {str(e)}")
-                
-            # Obtener datos de Understat para equipo 2
-            team2_understat = None
-            try:
-                team2_understat = self.understat_api.get_team_data(team2_name, year=season_year)
-                print(f"Procesando datos de Understat para equipo 2...")
-                if team2_understat and team2_understat.get("status") == "success":
-                    match_data["team2"]["understat"] = team2_understat
-                    
-                    # Procesar métricas avanzadas de jugadores si están disponibles
-                    advanced_player_metrics = team2_understat.get("advanced_player_metrics", {})
-                    if advanced_player_metrics:
-                        match_data["team2"].setdefault("advanced_player_metrics", advanced_player_metrics)
-                    
-                    # Guardar jugadores en archivos individuales
-                    if save_data and "players" in team2_understat and team2_understat["players"]:
-                        self.save_players_data(team2_id, team2_name, team2_understat["players"])
-                else:
-                    print(f"Error al formatear datos de Understat para equipo 2: {team2_understat.get('message', 'Error desconocido')}")
-            except Exception as e:
-                print(f"Error procesando datos de Understat para equipo 2: {str(e)}")
-            
-            # Obtener estadísticas detalladas por situación de juego
-            print(f"Obteniendo estadísticas detalladas por situación de juego para {team1_name}...")
-            team1_situations = self.understat_api.get_detailed_game_situations(team1_name, year=season_year)
-            if team1_situations:
-                match_data["team1"]["detailed_game_situations"] = team1_situations
-
-            print(f"Obteniendo estadísticas detalladas por situación de juego para {team2_name}...")
-            team2_situations = self.understat_api.get_detailed_game_situations(team2_name, year=season_year)
-            if team2_situations:
-                match_data["team2"]["detailed_game_situations"] = team2_situations
-
-            # Obtener lesiones y sanciones para equipo 1
-            try:
-                print(f"Consultando lesiones y sanciones para equipo ID: {team1_id}")
-                injuries_team1 = self.football_api.get_injuries(team1_id)
-                if injuries_team1 and "response" in injuries_team1 and injuries_team1["response"]:
-                    match_data["team1"]["injuries"] = injuries_team1["response"]
-                else:
-                    error_code = injuries_team1.get("errors", {}).get("requests", {})
-                    if error_code:
-                        print(f"Error al obtener lesiones y sanciones: {error_code}")
-                        # Generar datos de lesiones de respaldo
-                        match_data["team1"]["injuries"] = self.generate_fallback_injuries(team1_name)
-                    else:
-                        print("No se encontraron lesiones o sanciones para el equipo 1")
-                        # Generar datos de lesiones vacíos pero con estructura correcta
-                        match_data["team1"]["injuries"] = []
-            except Exception as e:
-                print(f"Error consultando lesiones para equipo 1: {str(e)}")
-                # Generar datos de lesiones de respaldo en caso de excepción
-                match_data["team1"]["injuries"] = self.generate_fallback_injuries(team1_name)
-            
-            # Obtener lesiones y sanciones para equipo 2
-            try:
-                print(f"Consultando lesiones y sanciones para equipo ID: {team2_id}")
-                injuries_team2 = self.football_api.get_injuries(team2_id)
-                if injuries_team2 and "response" in injuries_team2 and injuries_team2["response"]:
-                    match_data["team2"]["injuries"] = injuries_team2["response"]
-                else:
-                    error_code = injuries_team2.get("errors", {}).get("requests", {})
-                    if error_code:
-                        print(f"Error al obtener lesiones y sanciones: {error_code}")
-                        # Generar datos de lesiones de respaldo
-                        match_data["team2"]["injuries"] = self.generate_fallback_injuries(team2_name)
-                    else:
-                        print("No se encontraron lesiones o sanciones para el equipo 2")
-                        # Generar datos de lesiones vacíos pero con estructura correcta
-                        match_data["team2"]["injuries"] = []
-            except Exception as e:
-                print(f"Error consultando lesiones para equipo 2: {str(e)}")
-                # Generar datos de lesiones de respaldo en caso de excepción
-                match_data["team2"]["injuries"] = self.generate_fallback_injuries(team2_name)
-            
-            # Obtener lesiones de Transfermarkt
-            try:
-                print(f"Consultando lesiones en Transfermarkt para: {team1_name.lower()}")
-                injuries_team1_tm = self.football_api.get_transfermarkt_injuries(team1_name.lower())
-                if injuries_team1_tm and len(injuries_team1_tm) > 0:
-                    if "injuries_transfermarkt" not in match_data["team1"]:
-                        match_data["team1"]["injuries_transfermarkt"] = []
-                    match_data["team1"]["injuries_transfermarkt"] = injuries_team1_tm
-            except Exception as e:
-                print(f"Error al obtener datos de Transfermarkt: {e}")
-            
-            try:
-                print(f"Consultando lesiones en Transfermarkt para: {team2_name.lower()}")
-                injuries_team2_tm = self.football_api.get_transfermarkt_injuries(team2_name.lower())
-                if injuries_team2_tm and len(injuries_team2_tm) > 0:
-                    if "injuries_transfermarkt" not in match_data["team2"]:
-                        match_data["team2"]["injuries_transfermarkt"] = []
-                    match_data["team2"]["injuries_transfermarkt"] = injuries_team2_tm
-            except Exception as e:
-                print(f"Error al obtener datos de Transfermarkt: {e}")
-            
-            # Obtener alineaciones si el partido tiene ID
-            fixture_id = match_data.get("match_info", {}).get("fixture_id") or match_data.get("match_id")
-            if fixture_id:
-                try:
-                    print(f"Consultando alineaciones para partido ID: {fixture_id}")
-                    lineups = self.football_api.get_lineups(fixture_id)
-                    if lineups and "response" in lineups and lineups["response"]:
-                        match_data["lineups"] = lineups["response"]
-                    else:
-                        error_code = lineups.get("errors", {}).get("requests", {})
-                        if error_code:
-                            print(f"Error al obtener alineaciones: {error_code}")
-                            # Generar alineaciones de fallback
-                            match_data["lineups"] = self.generate_fallback_lineups(team1_name, team2_name)
-                        else:
-                            print("No se encontraron alineaciones para este partido")
-                            # Generar alineaciones de fallback
-                            match_data["lineups"] = self.generate_fallback_lineups(team1_name, team2_name)
-                except Exception as e:
-                    print(f"Error consultando alineaciones: {str(e)}")
-                    # Generar alineaciones de fallback en caso de error
-                    match_data["lineups"] = self.generate_fallback_lineups(team1_name, team2_name)
-            else:
-                print("No se puede obtener alineaciones: no hay ID de partido")
-                # Generar alineaciones de fallback cuando no hay ID
-                match_data["lineups"] = self.generate_fallback_lineups(team1_name, team2_name)
-            
-            # Obtener clasificación de la liga
-            league_id = match_data.get("league", {}).get("id")
-            if league_id:
-                print(f"Obteniendo clasificación para la liga ID: {league_id}")
-                standings_data = self.football_api.get_standings(league_id=league_id, season=season_year)
-                if standings_data:
-                    match_data["standings"] = standings_data
-
-            # Obtener información del árbitro
-            referee_name = match_data.get("referee", {}).get("name")
-            if referee_name and league_id:
-                print(f"Obteniendo estadísticas del árbitro: {referee_name}")
-                referee_info = self.referee_api.get_referee_stats(referee_name, league_id, season_year)
-                if referee_info:
-                    match_data["referee_info"] = referee_info
-                    # Indicar si el árbitro fue predicho o confirmado
-                    match_data["referee"]["is_predicted"] = referee_info.get("is_predicted", False)
-
-            # Obtener datos del clima (si hay info del estadio)
-            if match_data.get("venue") and match_data["venue"].get("city"):
-                city = match_data["venue"]["city"]
-                print(f"Obteniendo datos del clima para: {city} (Fecha: {date_str})")
-                # Pass the date_str to get forecast if applicable
-                weather_data = self.weather_api.get_weather(city, date_str=date_str)
-                if weather_data:
-                    match_data["weather"] = weather_data
-
-            # Obtener valores de mercado para los equipos
-            print(f"Obteniendo valores de mercado para {team1_name} y {team2_name}...")
-            try:
-                team1_market_value = self.football_api.get_market_values(team_name=team1_name)
-                if team1_market_value:
-                    match_data["team1"]["market_value"] = team1_market_value
-
-                team2_market_value = self.football_api.get_market_values(team_name=team2_name)
-                if team2_market_value:
-                    match_data["team2"]["market_value"] = team2_market_value
-            except Exception as e:
-                print(f"Error al obtener valores de mercado: {e}")
+                self._run_match_stages(self._build_match_stages(), stage_context, stage_targets)
+            finally:
+                # Una sola escritura por equipo con todos los campos obtenidos
+                self.team_cache.flush()
+            travel_distance = match_data.get("travel_distance")
 
             # Obtener valores de mercado para jugadores
             print(f"Obteniendo valores de mercado para jugadores de {team1_name} y {team2_name}...")
@@ -498,6 +321,392 @@ class FootballDataExtractor:
             traceback.print_exc()
             return None
     
+    def _build_match_stages(self):
+        """
+        Define las etapas independientes de la extracción de un partido
+        
+        El orden de la lista es el orden del flujo secuencial original y es el
+        que se usa al fusionar los resultados en match_data.
+        
+        Returns:
+            list: Lista de tuplas (nombre, función) que reciben el contexto de la extracción
+        """
+        return [
+            ("travel_distance", self._stage_travel_distance),
+            ("future_matches_team1", partial(self._stage_future_matches, "team1")),
+            ("future_matches_team2", partial(self._stage_future_matches, "team2")),
+            ("h2h", self._stage_head_to_head),
+            ("statistics_team1", partial(self._stage_team_statistics, "team1")),
+            ("statistics_team2", partial(self._stage_team_statistics, "team2")),
+            ("statistics_vs", self._stage_versus_statistics),
+            ("understat_team1", partial(self._stage_understat, "team1")),
+            ("understat_team2", partial(self._stage_understat, "team2")),
+            ("situations_team1", partial(self._stage_game_situations, "team1")),
+            ("situations_team2", partial(self._stage_game_situations, "team2")),
+            ("injuries_team1", partial(self._stage_injuries, "team1")),
+            ("injuries_team2", partial(self._stage_injuries, "team2")),
+            ("transfermarkt_team1", partial(self._stage_transfermarkt_injuries, "team1")),
+            ("transfermarkt_team2", partial(self._stage_transfermarkt_injuries, "team2")),
+            ("lineups", self._stage_lineups),
+            ("standings", self._stage_standings),
+            ("referee", self._stage_referee),
+            ("weather", self._stage_weather),
+            ("market_values", self._stage_market_values)
+        ]
+    
+    def _run_match_stages(self, stages, context, targets):
+        """
+        Ejecuta las etapas de extracción y fusiona sus resultados
+        
+        Con max_workers <= 1 las etapas se ejecutan una tras otra. En otro caso se
+        lanzan en un pool de hilos acotado, pero los resultados se fusionan siempre
+        en el orden de la lista para que la salida sea idéntica a la secuencial.
+        
+        Args:
+            stages: Lista de tuplas (nombre, función) devuelta por _build_match_stages
+            context: Datos ya resueltos del partido (IDs, nombres, temporada...)
+            targets: Diccionarios destino de las actualizaciones ("match_data", "future_matches")
+        """
+        if self.max_workers <= 1:
+            for _, stage in stages:
+                self._merge_stage_result(targets, stage(context))
+            return
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(stage, context) for _, stage in stages]
+            try:
+                for future in futures:
+                    self._merge_stage_result(targets, future.result())
+            except BaseException:
+                # Si una etapa falla no tiene sentido esperar a las que aún no han empezado
+                for future in futures:
+                    future.cancel()
+                raise
+    
+    @staticmethod
+    def _merge_stage_result(targets, updates):
+        """
+        Aplica las actualizaciones devueltas por una etapa
+        
+        Args:
+            targets: Diccionarios destino indexados por nombre
+            updates: Lista de tuplas (ruta, valor); la ruta empieza por el nombre del destino
+        """
+        for path, value in updates:
+            target = targets
+            for key in path[:-1]:
+                target = target[key]
+            target[path[-1]] = value
+    
+    def _stage_travel_distance(self, context):
+        """Obtiene la información de los estadios y calcula la distancia de viaje"""
+        match_data = context["match_data"]
+        updates = []
+        
+        venue1_info = None
+        venue2_info = None
+        if match_data.get("venue") and match_data.get("venue").get("id"):
+            venue = match_data["venue"]
+            # Si ambos estadios están en el índice la distancia sale de la matriz precalculada
+            matrix = self.geocoding_api.venue_index.distance_matrix()
+            travel_distance = matrix.distance(matrix.venue_key(venue["id"], context["team1_id"]),
+                                              matrix.teams.get(str(context["team2_id"])))
+            if travel_distance is not None:
+                updates.append((("match_data", "travel_distance"), travel_distance))
+                print(f"Distancia de viaje calculada: {travel_distance} km")
+                return updates
+            # Asumimos que el estadio del partido es el del equipo local (team1)
+            venue1_info = self._venue_coordinates(context["team1_id"], venue["id"], venue["name"], venue["city"])
+            # Estadio del equipo visitante (team2): primero el índice de estadios, sin usar la red
+            venue2 = self.geocoding_api.venue_index.lookup_team(context["team2_id"])
+            if venue2:
+                venue2_info = {"latitude": venue2["latitude"], "longitude": venue2["longitude"]}
+            else:
+                team2_details = self.football_api.search_team(context["team2_name"])
+                if team2_details and team2_details.get("venue"):
+                    venue2_raw = team2_details["venue"]
+                    venue2_info = self._venue_coordinates(context["team2_id"], venue2_raw.get("id"),
+                                                          venue2_raw.get("name"), venue2_raw.get("city"))
+
+        if venue1_info and venue2_info:
+            travel_distance = DataProcessor.calculate_travel_distance(venue1_info, venue2_info)
+            updates.append((("match_data", "travel_distance"), travel_distance))
+            print(f"Distancia de viaje calculada: {travel_distance} km")
+        else:
+            print("No se pudo calcular la distancia de viaje (faltan datos de estadios/coordenadas)")
+        return updates
+    
+    def _venue_coordinates(self, team_id, venue_id, venue_name, city_name):
+        """
+        Obtiene las coordenadas del estadio de un equipo desde el índice de estadios
+        
+        Solo se geocodifica (y se añade al índice) si el estadio no está en él.
+        
+        Args:
+            team_id: ID del equipo
+            venue_id: ID del estadio en API-Football
+            venue_name: Nombre del estadio
+            city_name: Ciudad del estadio
+            
+        Returns:
+            dict: Coordenadas del estadio o None si no se encuentran
+        """
+        return self.geocoding_api.get_coordinates_from_venue(venue_name, city_name, venue_id=venue_id, team_id=team_id)
+    
+    @staticmethod
+    def _is_api_success(data):
+        """Indica si una respuesta de API-Football es válida para cachearla"""
+        return isinstance(data, dict) and data.get("response") is not None and not data.get("errors")
+    
+    @staticmethod
+    def _is_status_success(data):
+        """Indica si un resultado con campo status es válido para cachearlo"""
+        return isinstance(data, dict) and data.get("status") == "success"
+    
+    def _team_statistics(self, team_id, season_year):
+        """Estadísticas de la temporada de un equipo, reutilizando las cacheadas"""
+        return self.team_cache.get_or_fetch(
+            team_id, "statistics",
+            lambda: self.football_api.get_team_statistics(team_id, league_id=None, season=season_year),
+            variant=season_year, is_valid=self._is_api_success
+        )
+    
+    def _stage_future_matches(self, side, context):
+        """Obtiene los próximos 3 partidos de uno de los equipos"""
+        try:
+            print(f"Obteniendo próximos 3 partidos para {context[f'{side}_name']}...")
+            team_id = context[f"{side}_id"]
+            season_year = context["season_year"]
+            next_matches = self.team_cache.get_or_fetch(
+                team_id, "next_matches",
+                lambda: self.football_api.get_next_matches(team_id, num_matches=3, season=season_year),
+                variant=season_year, is_valid=self._is_api_success
+            )
+            return [(("future_matches", side), next_matches)]
+        except Exception as e:
+            print(f"Error obteniendo próximos partidos para equipo {side[-1]}: {e}")
+            return []
+    
+    def _stage_head_to_head(self, context):
+        """Obtiene el historial de enfrentamientos"""
+        print("Obteniendo historial de enfrentamientos...")
+        h2h_data = self.football_api.get_head_to_head(context["team1_id"], context["team2_id"])
+        if h2h_data:
+            return [(("match_data", "h2h"), h2h_data)]
+        return []
+    
+    def _stage_team_statistics(self, side, context):
+        """Obtiene los últimos partidos y las estadísticas de uno de los equipos"""
+        team_id = context[f"{side}_id"]
+        print(f"Obteniendo estadísticas para el equipo {team_id}...")
+        team_fixtures = self.team_cache.get_or_fetch(
+            team_id, "last_matches",
+            lambda: self.football_api.get_fixtures(team=team_id, last=10, season=context["season_year"]),
+            variant=context["season_year"], is_valid=self._is_api_success
+        )
+        if team_fixtures and "response" in team_fixtures:
+            print(f"Se encontraron {len(team_fixtures['response'])} partidos para el equipo {team_id}")
+        
+        team_stats = self._team_statistics(team_id, context["season_year"])
+        if team_stats:
+            return [(("match_data", side, "statistics"), team_stats)]
+        return []
+    
+    def _stage_versus_statistics(self, context):
+        """Obtiene las estadísticas de cada equipo frente al rival"""
+        team1_id = context["team1_id"]
+        team2_id = context["team2_id"]
+        season_year = context["season_year"]
+        updates = []
+        
+        print(f"Obteniendo estadísticas para {team1_id} vs {team2_id}...")
+        team1_vs_team2 = self.football_api.get_fixtures(team1_id=team1_id, team2_id=team2_id, last=10, season=season_year)
+        if team1_vs_team2 and "response" in team1_vs_team2:
+            print(f"Se encontraron {len(team1_vs_team2['response'])} partidos entre {team1_id} y {team2_id}")
+        
+        team1_vs_team2_stats = self._team_statistics(team1_id, season_year)
+        if team1_vs_team2_stats:
+            updates.append((("match_data", "team1", "vs_team2"), team1_vs_team2_stats))
+        
+        print(f"Obteniendo estadísticas para {team2_id} vs {team1_id}...")
+        if team1_vs_team2 and "response" in team1_vs_team2:
+            print(f"Se encontraron {len(team1_vs_team2['response'])} partidos entre {team2_id} y {team1_id}")
+        
+        team2_vs_team1_stats = self._team_statistics(team2_id, season_year)
+        if team2_vs_team1_stats:
+            updates.append((("match_data", "team2", "vs_team1"), team2_vs_team1_stats))
+        return updates
+    
+    def _stage_understat(self, side, context):
+        """Obtiene los datos de Understat de uno de los equipos y guarda sus jugadores"""
+        team_name = context[f"{side}_name"]
+        team_id = context[f"{side}_id"]
+        updates = []
+        team_understat = None
+        try:
+            team_understat = self.team_cache.get(team_id, "understat", context["season_year"])
+            fetched = team_understat is None
+            if fetched:
+                team_understat = self.understat_api.get_team_data(team_name, year=context["season_year"])
+                if self._is_status_success(team_understat):
+                    self.team_cache.put(team_id, "understat", team_understat, context["season_year"])
+            print(f"Procesando datos de Understat para equipo {side[-1]}...")
+            if team_understat and team_understat.get("status") == "success":
+                updates.append((("match_data", side, "understat"), team_understat))
+                
+                # Procesar métricas avanzadas de jugadores si están disponibles
+                advanced_player_metrics = team_understat.get("advanced_player_metrics", {})
+                if advanced_player_metrics:
+                    updates.append((("match_data", side, "advanced_player_metrics"), advanced_player_metrics))
+                
+                # Guardar jugadores en archivos individuales (si vienen de la caché ya se guardaron)
+                if fetched and context["save_data"] and "players" in team_understat and team_understat["players"]:
+                    self.save_players_data(team_id, team_name, team_understat["players"])
+            else:
+                print(f"Error al formatear datos de Understat para equipo {side[-1]}: {team_understat.get('message', 'Error desconocido')}")
+        except Exception as e:
+            print(f"Error procesando datos de Understat para equipo {side[-1]}: {str(e)}")
+        return updates
+    
+    def _stage_game_situations(self, side, context):
+        """Obtiene las estadísticas detalladas por situación de juego de uno de los equipos"""
+        team_name = context[f"{side}_name"]
+        print(f"Obteniendo estadísticas detalladas por situación de juego para {team_name}...")
+        situations = self.team_cache.get_or_fetch(
+            context[f"{side}_id"], "game_situations",
+            lambda: self.understat_api.get_detailed_game_situations(team_name, year=context["season_year"]),
+            variant=context["season_year"], is_valid=self._is_status_success
+        )
+        if situations:
+            return [(("match_data", side, "detailed_game_situations"), situations)]
+        return []
+    
+    def _stage_injuries(self, side, context):
+        """Obtiene lesiones y sanciones de uno de los equipos"""
+        team_id = context[f"{side}_id"]
+        team_name = context[f"{side}_name"]
+        path = ("match_data", side, "injuries")
+        try:
+            print(f"Consultando lesiones y sanciones para equipo ID: {team_id}")
+            injuries = self.team_cache.get_or_fetch(
+                team_id, "injuries", lambda: self.football_api.get_injuries(team_id),
+                is_valid=self._is_status_success
+            )
+            if injuries and "response" in injuries and injuries["response"]:
+                return [(path, injuries["response"])]
+            error_code = injuries.get("errors", {}).get("requests", {})
+            if error_code:
+                print(f"Error al obtener lesiones y sanciones: {error_code}")
+                # Generar datos de lesiones de respaldo
+                return [(path, self.generate_fallback_injuries(team_name))]
+            print(f"No se encontraron lesiones o sanciones para el equipo {side[-1]}")
+            # Generar datos de lesiones vacíos pero con estructura correcta
+            return [(path, [])]
+        except Exception as e:
+            print(f"Error consultando lesiones para equipo {side[-1]}: {str(e)}")
+            # Generar datos de lesiones de respaldo en caso de excepción
+            return [(path, self.generate_fallback_injuries(team_name))]
+    
+    def _stage_transfermarkt_injuries(self, side, context):
+        """Obtiene las lesiones de Transfermarkt de uno de los equipos"""
+        team_name = context[f"{side}_name"]
+        try:
+            print(f"Consultando lesiones en Transfermarkt para: {team_name.lower()}")
+            injuries_tm = self.football_api.get_transfermarkt_injuries(team_name.lower())
+            if injuries_tm and len(injuries_tm) > 0:
+                return [(("match_data", side, "injuries_transfermarkt"), injuries_tm)]
+        except Exception as e:
+            print(f"Error al obtener datos de Transfermarkt: {e}")
+        return []
+    
+    def _stage_lineups(self, context):
+        """Obtiene las alineaciones del partido o genera unas de respaldo"""
+        match_data = context["match_data"]
+        team1_name = context["team1_name"]
+        team2_name = context["team2_name"]
+        path = ("match_data", "lineups")
+        
+        fixture_id = match_data.get("match_info", {}).get("fixture_id") or match_data.get("match_id")
+        if not fixture_id:
+            print("No se puede obtener alineaciones: no hay ID de partido")
+            # Generar alineaciones de fallback cuando no hay ID
+            return [(path, self.generate_fallback_lineups(team1_name, team2_name))]
+        
+        try:
+            print(f"Consultando alineaciones para partido ID: {fixture_id}")
+            lineups = self.football_api.get_lineups(fixture_id)
+            if lineups and "response" in lineups and lineups["response"]:
+                return [(path, lineups["response"])]
+            error_code = lineups.get("errors", {}).get("requests", {})
+            if error_code:
+                print(f"Error al obtener alineaciones: {error_code}")
+            else:
+                print("No se encontraron alineaciones para este partido")
+            # Generar alineaciones de fallback
+            return [(path, self.generate_fallback_lineups(team1_name, team2_name))]
+        except Exception as e:
+            print(f"Error consultando alineaciones: {str(e)}")
+            # Generar alineaciones de fallback en caso de error
+            return [(path, self.generate_fallback_lineups(team1_name, team2_name))]
+    
+    def _stage_standings(self, context):
+        """Obtiene la clasificación de la liga del partido"""
+        league_id = context["match_data"].get("league", {}).get("id")
+        if league_id:
+            print(f"Obteniendo clasificación para la liga ID: {league_id}")
+            # Todos los partidos de la liga comparten la misma clasificación indexada
+            standings_table = self.football_api.get_standings_table(league_id=league_id, season=context["season_year"])
+            if standings_table:
+                return [(("match_data", "standings"), standings_table.data)]
+        return []
+    
+    def _stage_referee(self, context):
+        """Obtiene la información del árbitro del partido"""
+        match_data = context["match_data"]
+        league_id = match_data.get("league", {}).get("id")
+        referee_name = match_data.get("referee", {}).get("name")
+        if referee_name and league_id:
+            print(f"Obteniendo estadísticas del árbitro: {referee_name}")
+            referee_info = self.referee_api.get_referee_stats(referee_name, league_id, context["season_year"])
+            if referee_info:
+                return [
+                    (("match_data", "referee_info"), referee_info),
+                    # Indicar si el árbitro fue predicho o confirmado
+                    (("match_data", "referee", "is_predicted"), referee_info.get("is_predicted", False))
+                ]
+        return []
+    
+    def _stage_weather(self, context):
+        """Obtiene los datos del clima si hay información del estadio"""
+        match_data = context["match_data"]
+        if match_data.get("venue") and match_data["venue"].get("city") not in (None, "", "No disponible"):
+            city = match_data["venue"]["city"]
+            print(f"Obteniendo datos del clima para: {city} (Fecha: {context['date_str']})")
+            # La hora del partido ajusta la vigencia del pronóstico en caché
+            weather_data = self.weather_api.get_weather(city, date_str=context["date_str"],
+                                                        hour=context.get("kickoff_hour"))
+            if weather_data:
+                return [(("match_data", "weather"), weather_data)]
+        return []
+    
+    def _stage_market_values(self, context):
+        """Obtiene los valores de mercado de ambos equipos"""
+        team1_name = context["team1_name"]
+        team2_name = context["team2_name"]
+        updates = []
+        print(f"Obteniendo valores de mercado para {team1_name} y {team2_name}...")
+        try:
+            team1_market_value = self.football_api.get_market_values(team_name=team1_name)
+            if team1_market_value:
+                updates.append((("match_data", "team1", "market_value"), team1_market_value))
+
+            team2_market_value = self.football_api.get_market_values(team_name=team2_name)
+            if team2_market_value:
+                updates.append((("match_data", "team2", "market_value"), team2_market_value))
+        except Exception as e:
+            print(f"Error al obtener valores de mercado: {e}")
+        return updates
+    
     def extract_all_data(self, team1_name, team2_name, date_str, options):
         """
         Extracts all requested data for a match based on user options.
@@ -552,28 +761,34 @@ class FootballDataExtractor:
 
         return match_data
 
-    def load_match_data(self, match_key):
+    def load_match_data(self, match_key, lazy=False):
         """
         Carga datos de un partido guardado previamente
         
         Args:
             match_key (str): Clave única del partido (formato: "equipo1-equipo2-YYYY-MM-DD")
+            lazy (bool): Devolver un LazyDocument que decodifica solo las claves consultadas
             
         Returns:
             dict: Datos del partido o None si no se encuentra
         """
+        if lazy:
+            return self.storage.open_match_data(match_key)
         return self.storage.load_match_data(match_key)
     
-    def load_team_data(self, team_id):
+    def load_team_data(self, team_id, lazy=False):
         """
         Carga datos de un equipo guardado previamente
         
         Args:
             team_id (int): ID del equipo
+            lazy (bool): Devolver un LazyDocument que decodifica solo las claves consultadas
             
         Returns:
             dict: Datos del equipo o None si no se encuentra
         """
+        if lazy:
+            return self.storage.open_team_data(team_id)
         return self.storage.load_team_data(team_id)
     
     def _is_data_stale(self, timestamp_str: str, days_threshold: int = 7) -> bool:
@@ -600,7 +815,7 @@ class FootballDataExtractor:
     
     def save_players_data(self, team_id, team_name, players_data):
         """
-        Guarda datos de jugadores en archivos individuales
+        Guarda la plantilla de un equipo en un único documento (mediante LocalStorage)
         
         Args:
             team_id: ID del equipo
@@ -611,51 +826,16 @@ class FootballDataExtractor:
             print(f"No hay datos de jugadores para guardar para el equipo {team_name}")
             return
         
-        # Crear directorio para jugadores del equipo
-        team_dir = os.path.join(self.data_dir, "players", str(team_id))
-        os.makedirs(team_dir, exist_ok=True)
-        
-        # Guardar índice de jugadores
-        index_file = os.path.join(team_dir, "index.json")
-        index_data = {
-            "team_id": team_id,
-            "team_name": team_name,
-            "players": []
-        }
-        
         print(f"Guardando {len(players_data)} jugadores para el equipo {team_name} (ID: {team_id})")
         
-        # Guardar cada jugador en un archivo individual
-        for player in players_data:
-            if not player or not isinstance(player, dict):
-                continue
-                
-            player_id = player.get("id")
-            player_name = player.get("name")
-            
-            if not player_id or not player_name:
-                continue
-                
-            # Agregar jugador al índice
-            index_data["players"].append({
-                "id": player_id,
-                "name": player_name
-            })
-            
-            # Guardar datos completos del jugador
-            player_file = os.path.join(team_dir, f"{player_id}.json")
-            with open(player_file, 'w', encoding='utf-8') as f:
-                json.dump(player, f, ensure_ascii=False, indent=2)
-        
-        # Guardar archivo de índice
-        with open(index_file, 'w', encoding='utf-8') as f:
-            json.dump(index_data, f, ensure_ascii=False, indent=2)
+        # El formato de los archivos lo decide el almacenamiento configurado
+        index_data = self.storage.save_players_data(team_id, team_name, players_data)
             
         print(f"Guardados {len(index_data['players'])} jugadores para {team_name}")
     
     def save_team_data(self, team_id, team_name, team_data):
         """
-        Guarda datos de un equipo en un archivo JSON
+        Guarda datos de un equipo (mediante LocalStorage)
         
         Args:
             team_id: ID del equipo
@@ -666,20 +846,14 @@ class FootballDataExtractor:
             print(f"No hay datos del equipo para guardar para {team_name}")
             return
             
-        # Crear directorio para equipos
-        teams_dir = os.path.join(self.data_dir, "teams")
-        os.makedirs(teams_dir, exist_ok=True)
-        
-        # Guardar datos del equipo
-        team_file = os.path.join(teams_dir, f"{team_id}.json")
-        with open(team_file, 'w', encoding='utf-8') as f:
-            json.dump(team_data, f, ensure_ascii=False, indent=2)
+        # Guardar datos del equipo con el almacenamiento configurado
+        self.storage.save_team_data(team_id, team_data)
             
         print(f"Guardados datos para el equipo {team_name} (ID: {team_id})")
     
     def save_match_data(self, match_data, team1_name, team2_name, date_str):
         """
-        Guarda datos del partido en un archivo JSON
+        Guarda datos del partido (mediante LocalStorage)
         
         Args:
             match_data: Datos del partido
@@ -687,13 +861,8 @@ class FootballDataExtractor:
             team2_name: Nombre del equipo visitante
             date_str: Fecha del partido en formato YYYY-MM-DD
         """
-        match_filename = f"{team1_name.lower().replace(' ', '_')}-{team2_name.lower().replace(' ', '_')}-{date_str}"
-        match_filepath = os.path.join(self.data_dir, "matches", f"{match_filename}.json")
-        os.makedirs(os.path.dirname(match_filepath), exist_ok=True)
-        
-        with open(match_filepath, 'w', encoding='utf-8') as f:
-            json.dump(match_data, f, ensure_ascii=False, indent=2)
-        print(f"Datos guardados en: {match_filepath}")
+        match_key = f"{team1_name}-{team2_name}-{date_str}"
+        self.storage.save_match_data(match_key, match_data)
     
     def get_team_id(self, team_name):
         """
@@ -1114,18 +1283,89 @@ class FootballDataExtractor:
 def main():
     """Función principal del programa"""
     try:
-        # Crear instancia del extractor
-        extractor = FootballDataExtractor()
-
         # Obtener los argumentos de la línea de comandos
         parser = argparse.ArgumentParser(description='Extractor de datos de partidos de fútbol')
         parser.add_argument('--match', type=str, help='Partido en formato "Equipo1 vs Equipo2 - YYYY-MM-DD"')
         parser.add_argument('--interactive', action='store_true', help='Modo interactivo')
+        parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS,
+                            help='Hilos para las consultas independientes de un partido (1 = secuencial)')
+        parser.add_argument('--batch-file', type=str,
+                            help='Fichero con partidos (JSON o un "Equipo1 vs Equipo2 - YYYY-MM-DD" por línea)')
+        parser.add_argument('--league', type=int, help='ID de liga para extraer una jornada o un rango de fechas')
+        parser.add_argument('--round', type=str, help='Jornada de la liga (ej: "Regular Season - 30")')
+        parser.add_argument('--season', type=str, help='Temporada de la jornada (ej: "2024")')
+        parser.add_argument('--from-date', type=str, help='Fecha inicial del rango (YYYY-MM-DD)')
+        parser.add_argument('--to-date', type=str, help='Fecha final del rango (YYYY-MM-DD)')
+        parser.add_argument('--batch-workers', type=int, default=DEFAULT_BATCH_WORKERS,
+                            help='Partidos que se extraen a la vez en modo lote')
+        parser.add_argument('--archive', action='store_true',
+                            help='Archiva temporadas terminadas de --league (--season admite varias: "2021,2022")')
+        parser.add_argument('--archive-skip-understat', action='store_true',
+                            help='No descargar las páginas de Understat al archivar')
+        parser.add_argument('--migrate-storage', type=str, metavar='FORMATO',
+                            help='Convierte los datos guardados a otro formato (json, json-gz, msgpack, msgpack-zstd)')
+        parser.add_argument('--export', nargs='?', const='', metavar='DIRECTORIO',
+                            help='Exporta los partidos nuevos, equipos y jugadores a Parquet (por defecto data/export)')
+        parser.add_argument('--export-full', action='store_true',
+                            help='Con --export, vuelve a exportar todos los partidos')
+        parser.add_argument('--show', type=str, metavar='CLAVE',
+                            help='Muestra el resumen de un partido guardado (ej: "bologna-napoli-2025-04-07")')
+        parser.add_argument('--prewarm-referees', action='store_true',
+                            help='Carga en el índice de árbitros los de todos los partidos de --league y --season')
+        parser.add_argument('--sqlite', action='store_true',
+                            help='Guarda también los datos en la base SQLite indexada data/football.db')
 
         args = parser.parse_args()
 
+        # Crear instancia del extractor
+        extractor = FootballDataExtractor(max_workers=args.workers, use_sqlite=args.sqlite or None)
+
         # Ejecutar según los argumentos
-        if args.interactive:
+        if args.migrate_storage:
+            extractor.storage.migrate(args.migrate_storage)
+        elif args.export is not None:
+            exporter = DatasetExporter(extractor.data_dir, output_dir=args.export or None)
+            exporter.print_report(exporter.run(full=args.export_full))
+        elif args.show:
+            match_data = extractor.load_match_data(args.show, lazy=True)
+            if match_data is None:
+                print(f"❌ No hay datos guardados para {args.show}")
+                return
+            with match_data:
+                extractor.print_match_summary(match_data)
+        elif args.archive:
+            if not args.league or not args.season:
+                print("❌ Para archivar indica --league y --season")
+                return
+            seasons = [season.strip() for season in args.season.split(",") if season.strip()]
+            backfill = ArchiveBackfill(extractor)
+            report = backfill.run(args.league, seasons, include_understat=not args.archive_skip_understat)
+            backfill.print_report(report)
+        elif args.prewarm_referees:
+            if not args.league or not args.season:
+                print("❌ Para precargar árbitros indica --league y --season")
+                return
+            summary = extractor.referee_api.prewarm_league(args.league, args.season)
+            if summary:
+                extractor.referee_api.print_prewarm_report(summary)
+        elif args.batch_file or args.league:
+            batch = BatchExtractor(extractor, workers=args.batch_workers)
+            if args.batch_file:
+                matches = batch.load_matches_from_file(args.batch_file)
+            elif args.round:
+                if not args.season:
+                    print("❌ Para extraer una jornada indica también --season")
+                    return
+                matches = batch.resolve_round(args.league, args.season, args.round)
+            elif args.from_date:
+                matches = batch.resolve_date_range(args.league, args.from_date, args.to_date or args.from_date,
+                                                   season=args.season)
+            else:
+                print("❌ Con --league indica --round y --season, o --from-date/--to-date")
+                return
+            report = batch.run(matches)
+            batch.print_report(report)
+        elif args.interactive:
             extractor.run_interactive()
         elif args.match:
             # Parsear la entrada del comando
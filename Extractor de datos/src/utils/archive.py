@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import gzip
+import json
+import hashlib
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+# Directorio del archivo histórico por defecto dentro de data/
+DEFAULT_ARCHIVE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "archive"
+)
+
+
+def current_season() -> int:
+    """
+    Año de inicio de la temporada en curso (las temporadas empiezan en julio)
+
+    Returns:
+        int: Año de la temporada
+    """
+    now = datetime.now()
+    return now.year if now.month >= 7 else now.year - 1
+
+
+def is_past_season(year: Optional[Any]) -> bool:
+    """
+    Indica si una temporada ya terminó y sus datos no van a cambiar
+
+    Args:
+        year: Año de la temporada (None = temporada actual)
+
+    Returns:
+        bool: True si es una temporada anterior a la actual
+    """
+    try:
+        return year is not None and int(year) < current_season()
+    except (TypeError, ValueError):
+        return False
+
+
+class ArchiveStore:
+    """
+    Archivo de solo escritura para datos que ya no pueden cambiar
+
+    Guarda partidos terminados, clasificaciones y páginas de temporadas pasadas.
+    Cada objeto se comprime con gzip y se guarda una sola vez con el hash
+    SHA-256 de su contenido como nombre (objects/ab/abcd....json.gz); las
+    referencias (refs/{tipo}/...) asocian una clave legible, como el ID de un
+    partido, al objeto. Una referencia no se sobrescribe nunca.
+    """
+
+    def __init__(self, archive_dir=None):
+        """
+        Args:
+            archive_dir: Directorio del archivo (por defecto data/archive)
+        """
+        self.archive_dir = archive_dir or DEFAULT_ARCHIVE_DIR
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(self.archive_dir, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(self.archive_dir, "refs"), exist_ok=True)
+
+    @staticmethod
+    def request_key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Clave de archivo de una petición a una API
+
+        Args:
+            endpoint: Endpoint o URL de la petición
+            params: Parámetros de la petición
+
+        Returns:
+            str: Clave estable (el orden y el tipo de los parámetros no influyen)
+        """
+        normalized = {str(k): str(v) for k, v in sorted((params or {}).items()) if v is not None}
+        return json.dumps([endpoint, normalized], sort_keys=True, ensure_ascii=False)
+
+    @staticmethod
+    def _encode(data: Any) -> bytes:
+        return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.archive_dir, "objects", digest[:2], f"{digest}.json.gz")
+
+    def _ref_path(self, kind: str, key: Any) -> str:
+        key_hash = hashlib.sha1(str(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.archive_dir, "refs", kind, key_hash[:2], f"{key_hash}.json")
+
+    @staticmethod
+    def _write_atomic(path: str, payload: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+    def put_object(self, data: Any) -> str:
+        """
+        Guarda un objeto por su contenido (si ya existe no se vuelve a escribir)
+
+        Args:
+            data: Objeto serializable en JSON
+
+        Returns:
+            str: Hash SHA-256 del contenido
+        """
+        payload = self._encode(data)
+        digest = hashlib.sha256(payload).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            self._write_atomic(path, gzip.compress(payload))
+        return digest
+
+    def get_object(self, digest: str) -> Optional[Any]:
+        """
+        Lee un objeto por su hash
+
+        Args:
+            digest: Hash SHA-256 del contenido
+
+        Returns:
+            Objeto guardado o None si no existe
+        """
+        try:
+            with gzip.open(self._object_path(digest), "rb") as f:
+                return json.loads(f.read().decode("utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def put(self, kind: str, key: Any, data: Any) -> str:
+        """
+        Archiva un dato bajo una clave; si la clave ya existe se conserva el original
+
+        Args:
+            kind: Tipo de dato (ej. "fixtures", "api-football", "understat")
+            key: Clave del dato dentro de su tipo (ej. ID del partido)
+            data: Datos a archivar
+
+        Returns:
+            str: Hash del objeto al que apunta la clave
+        """
+        ref_path = self._ref_path(kind, key)
+        with self._lock:
+            existing = self._read_ref(ref_path)
+            if existing:
+                return existing["object"]
+            digest = self.put_object(data)
+            self._write_atomic(ref_path, json.dumps({
+                "kind": kind,
+                "key": str(key),
+                "object": digest,
+                "archived_at": datetime.now().isoformat()
+            }, ensure_ascii=False).encode("utf-8"))
+        return digest
+
+    @staticmethod
+    def _read_ref(ref_path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(ref_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get(self, kind: str, key: Any) -> Optional[Any]:
+        """
+        Obtiene un dato archivado
+
+        Args:
+            kind: Tipo de dato
+            key: Clave del dato
+
+        Returns:
+            Datos archivados o None si no están en el archivo
+        """
+        ref = self._read_ref(self._ref_path(kind, key))
+        if not ref:
+            return None
+        return self.get_object(ref["object"])
+
+    def has(self, kind: str, key: Any) -> bool:
+        """Indica si una clave está archivada"""
+        return os.path.exists(self._ref_path(kind, key))
+
+    def keys(self, kind: str) -> Iterator[str]:
+        """
+        Recorre las claves archivadas de un tipo
+
+        Args:
+            kind: Tipo de dato
+
+        Returns:
+            Iterator[str]: Claves archivadas
+        """
+        for root, _, files in os.walk(os.path.join(self.archive_dir, "refs", kind)):
+            for filename in files:
+                if filename.endswith(".json"):
+                    ref = self._read_ref(os.path.join(root, filename))
+                    if ref:
+                        yield ref["key"]
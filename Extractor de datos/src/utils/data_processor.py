@@ -1,7 +1,12 @@
 import re
 from datetime import datetime
 import time
-from src.api.geocoding_api import GeocodingAPI  # Added import
+from src.utils.venue_index import get_venue_index
+from src.utils.distances import haversine
+from src.api.understat_page import extract_datasets
+from src.utils.shots import ShotTable
+from src.utils.fuzzy import NameMatcher
+from src.utils.standings_cache import get_standings_cache, standings_row
 
 class DataProcessor:
     """
@@ -530,8 +535,6 @@ class DataProcessor:
         """
         try:
             from bs4 import BeautifulSoup
-            import json
-            import re
             
             # Verificar que tenemos HTML para procesar
             if not understat_html or "data" not in understat_html:
@@ -541,19 +544,21 @@ class DataProcessor:
                     "message": "No hay datos HTML para procesar"
                 }
                 
-            html_content = understat_html.get("data", "")
-            if not html_content or len(html_content) < 100:
+            html_content = understat_html.get("data", "") or ""
+            # Las temporadas terminadas pueden venir de la caché en disco solo con sus datos
+            if not understat_html.get("datasets") and len(html_content) < 100:
                 print(f"HTML de Understat demasiado corto o vacío: {len(html_content) if html_content else 0} caracteres")
                 return {
                     "status": "error", 
                     "message": "HTML demasiado corto o vacío"
                 }
                 
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
             # Extraer datos incrustados en JavaScript
             # Understat almacena los datos en variables JavaScript como "playersData", "datesData", etc.
-            scripts = soup.find_all("script")
+            # Si la página ya se extrajo al descargarla se reutilizan sus datos sin volver a recorrer el HTML
+            datasets = understat_html.get("datasets")
+            if datasets is None:
+                datasets = extract_datasets(html_content)
             
             stats_data = {}
             players_found = False
@@ -562,85 +567,38 @@ class DataProcessor:
             situation_stats_found = False # Added flag for situation stats
             team_stats_found = False # Added flag for general team stats
 
-            # Función auxiliar para limpiar caracteres de escape en JSON
-            def clean_json_string(json_str):
-                # Reemplazar secuencias de escape comunes
-                cleaned = json_str.replace('\\"', '"')
-                cleaned = cleaned.replace('\\\\', '\\')
-                cleaned = cleaned.replace('\\/', '/')
-                cleaned = cleaned.replace('\\n', '\n')
-                cleaned = cleaned.replace('\\r', '\r')
-                cleaned = cleaned.replace('\\t', '\t')
-                
-                # A veces hay que hacer múltiples pasadas para limpiar correctamente
-                if '\\\\' in cleaned or '\\"' in cleaned:
-                    return clean_json_string(cleaned)
-                return cleaned
-            
-            # Buscar datos de jugadores (playersData)
-            for script in scripts:
-                script_content = script.string
-                if not script_content:
-                    continue
+            # Players Data
+            players = datasets.get("playersData")
+            if players:
+                stats_data["players"] = list(players.values()) if isinstance(players, dict) else players
+                players_found = True
+                print(f"Datos de jugadores de Understat encontrados: {len(stats_data.get('players', []))} jugadores")
 
-                # Players Data
-                if "playersData" in script_content and not players_found:
-                    # ... existing code to parse playersData ...
-                    if players_found:
-                         print(f"Datos de jugadores de Understat encontrados: {len(stats_data.get('players', []))} jugadores")
+            # Matches Data
+            matches = datasets.get("datesData")
+            if matches:
+                stats_data["matches"] = matches
+                matches_found = True
+                print(f"Datos de partidos de Understat encontrados: {len(stats_data.get('matches', []))} partidos")
 
-                # Matches Data
-                if "datesData" in script_content and not matches_found:
-                    # ... existing code to parse datesData ...
-                    if matches_found:
-                        print(f"Datos de partidos de Understat encontrados: {len(stats_data.get('matches', []))} partidos")
+            # Shots Data (for situation analysis)
+            if datasets.get("shotsData"):
+                stats_data["shots"] = datasets["shotsData"]
+                shots_found = True
+                print(f"Datos de remates (shotsData) de Understat encontrados: {len(stats_data['shots'])} remates")
 
-                # Shots Data (for situation analysis)
-                if "shotsData" in script_content and not shots_found:
-                    patterns = [
-                        r'shotsData\s*=\s*JSON\.parse\s*\(\s*\'(.*?)\'\s*\)',
-                        r'shotsData\s*=\s*JSON\.parse\s*\(\s*"(.*?)"\s*\)',
-                        r'shotsData\s*=\s*(.*?);'
-                    ]
-                    for pattern in patterns:
-                        shots_match = re.search(pattern, script_content, re.DOTALL)
-                        if shots_match:
-                            shots_json_str = shots_match.group(1)
-                            try:
-                                cleaned_json = clean_json_string(shots_json_str)
-                                stats_data["shots"] = json.loads(cleaned_json)
-                                shots_found = True
-                                print(f"Datos de remates (shotsData) de Understat encontrados: {len(stats_data['shots'])} remates")
-                                break
-                            except json.JSONDecodeError as e:
-                                print(f"Error al decodificar JSON de remates con patrón {pattern}: {str(e)}")
-                                continue
-
-                # Team Situation Stats (often directly in JS object)
-                if "rosterData" in script_content and not situation_stats_found: # rosterData often contains team-level situation stats
-                    patterns = [
-                        r'rosterData\s*=\s*(\{.*?\});' # Look for a JS object
-                    ]
-                    for pattern in patterns:
-                        situation_match = re.search(pattern, script_content, re.DOTALL)
-                        if situation_match:
-                            situation_json_str = situation_match.group(1)
-                            try:
-                                # This might not be perfect JSON, needs careful parsing or regex
-                                # For now, let's assume it's parseable or extract key parts later
-                                # We might need more robust regex if json.loads fails
-                                stats_data["situation_stats_raw"] = json.loads(situation_json_str) # Store raw for now
-                                situation_stats_found = True
-                                print(f"Datos de situación de equipo (rosterData) encontrados.")
-                                break
-                            except json.JSONDecodeError as e:
-                                print(f"Error al decodificar JSON de situación (rosterData): {str(e)}")
-                                # Could add regex fallback here if needed
-                                continue
+            # Team Situation Stats (rosterData often contains team-level situation stats)
+            if datasets.get("rosterData"):
+                stats_data["situation_stats_raw"] = datasets["rosterData"] # Store raw for now
+                situation_stats_found = True
+                print(f"Datos de situación de equipo (rosterData) encontrados.")
 
             # ... existing code to extract team_stats from tables ...
             team_stats = {}
-            stats_table = soup.select_one('div.team-stats')
+            # El árbol HTML solo se construye si la página tiene tablas de estadísticas
+            has_stats_markup = "team-stats" in html_content or "statistic-name" in html_content
+            soup = BeautifulSoup(html_content, 'html.parser') if has_stats_markup else None
+            stats_table = soup.select_one('div.team-stats') if soup else None
             if stats_table:
                 # Extraer valores de estadísticas
                 stat_items = stats_table.select('div.card-body div.row')
@@ -657,7 +615,7 @@ class DataProcessor:
             else:
                 print("No se encontró el contenedor de estadísticas del equipo")
                 # Intentar buscar otros elementos que contengan estadísticas
-                stat_elements = soup.select('.statistic')
+                stat_elements = soup.select('.statistic') if soup else []
                 if stat_elements:
                     for stat_elem in stat_elements:
                         stat_name = stat_elem.select_one('.statistic-name')
@@ -681,49 +639,14 @@ class DataProcessor:
             }
             if shots_found and stats_data.get("shots"):
                 try:
-                    # shotsData is usually a dictionary keyed by team side ('h' or 'a')
-                    # We need to aggregate across both sides if scraping a match page,
-                    # or just use the single key if it's a team page (might need adjustment)
-                    all_shots = []
-                    shots_dict = stats_data["shots"]
-                    if isinstance(shots_dict, dict):
-                        # Check if it's a team page (keys are player IDs) or match page ('h', 'a')
-                        is_team_page = all(key.isdigit() for key in shots_dict.keys())
-                        if is_team_page:
-                            # Aggregate shots from all players on a team page
-                            for player_shots in shots_dict.values():
-                                if isinstance(player_shots, list):
-                                     all_shots.extend(player_shots)
-                        else:
-                            # Aggregate from home and away on a match page
-                            if 'h' in shots_dict: all_shots.extend(shots_dict['h'])
-                            if 'a' in shots_dict: all_shots.extend(shots_dict['a'])
-                    elif isinstance(shots_dict, list): # Handle case where it's already a list
-                        all_shots = shots_dict
-
-                    for shot in all_shots:
-                        situation = shot.get('situation', 'Unknown')
-                        result = shot.get('result', 'Unknown')
-                        xg = float(shot.get('xG', 0))
-
-                        # Normalize situation names
-                        if situation == 'OpenPlay': situation = 'Open Play'
-                        if situation == 'FromCorner': situation = 'From corner'
-                        if situation == 'SetPiece': situation = 'Set piece'
-                        if situation == 'DirectFreekick': situation = 'Set piece' # Group freekicks
-
+                    # shotsData puede venir por lado ('h', 'a'), por jugador o como lista:
+                    # ShotTable lo aplana y agrega por situación en columnas
+                    summary = ShotTable(stats_data["shots"]).situation_summary()
+                    for situation, totals in summary.items():
                         if situation in processed_situation_stats:
-                            processed_situation_stats[situation]['shots'] += 1
-                            processed_situation_stats[situation]['xG'] += xg
-                            if result == 'Goal':
-                                processed_situation_stats[situation]['goals'] += 1
-                        elif situation == 'Penalty': # Handle penalty separately if not in initial dict
-                             if 'Penalty' not in processed_situation_stats:
-                                 processed_situation_stats['Penalty'] = {'shots': 0, 'goals': 0, 'xG': 0}
-                             processed_situation_stats['Penalty']['shots'] += 1
-                             processed_situation_stats['Penalty']['xG'] += xg
-                             if result == 'Goal':
-                                 processed_situation_stats['Penalty']['goals'] += 1
+                            processed_situation_stats[situation]['shots'] += totals['shots']
+                            processed_situation_stats[situation]['goals'] += totals['goals']
+                            processed_situation_stats[situation]['xG'] += totals['xG']
 
                     # Round xG values
                     for sit in processed_situation_stats:
@@ -816,36 +739,75 @@ class DataProcessor:
         if "latitude" not in venue2 or "longitude" not in venue2:
             return None
         
-        # Importar math localmente para no afectar rendimiento global
-        import math
-        
-        # Extraer coordenadas
-        lat1 = float(venue1["latitude"])
-        lon1 = float(venue1["longitude"])
-        lat2 = float(venue2["latitude"])
-        lon2 = float(venue2["longitude"])
+        distance = haversine(float(venue1["latitude"]), float(venue1["longitude"]),
+                             float(venue2["latitude"]), float(venue2["longitude"]))
         
-        # Radio de la Tierra en km
-        earth_radius = 6371
+        return round(distance, 2)
+    
+    @staticmethod
+    def merge_unavailable_players(injuries_api, injuries_tm):
+        """
+        Combina las bajas de API-Football y de Transfermarkt en una sola lista
         
-        # Convertir grados a radianes
-        lat1_rad = math.radians(lat1)
-        lon1_rad = math.radians(lon1)
-        lat2_rad = math.radians(lat2)
-        lon2_rad = math.radians(lon2)
+        Los nombres no coinciden siempre entre fuentes ("L. Messi" frente a
+        "Lionel Messi", tildes, orden de los apellidos), así que las bajas de
+        Transfermarkt se emparejan con las de la API por similitud de nombre:
+        si el jugador ya está, solo se completa la fecha de regreso.
         
-        # Diferencias
-        d_lat = lat2_rad - lat1_rad
-        d_lon = lon2_rad - lon1_rad
+        Args:
+            injuries_api: Bajas de /injuries (con player.id y player.name)
+            injuries_tm: Bajas extraídas de Transfermarkt (con player_name)
+            
+        Returns:
+            list: Jugadores no disponibles sin duplicados
+        """
+        combined_unavailable = {}
         
-        # Fórmula de Haversine
-        a = math.sin(d_lat/2) * math.sin(d_lat/2) + \
-            math.cos(lat1_rad) * math.cos(lat2_rad) * \
-            math.sin(d_lon/2) * math.sin(d_lon/2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        distance = earth_radius * c
+        if injuries_api and isinstance(injuries_api, list):
+            for injury in injuries_api:
+                # Validate injury data type
+                if not isinstance(injury, dict):
+                    print(f"Invalid injury data format: {injury}")
+                    continue
+                
+                player = injury.get("player", {})
+                player_id = player.get("id")
+                player_name = player.get("name")
+                if player_id and player_name:
+                    combined_unavailable[player_name] = {
+                        "id": player_id,
+                        "name": player_name,
+                        "type": injury.get("type"),
+                        "reason": injury.get("reason") or injury.get("type"),
+                        "source": "API"
+                    }
         
-        return round(distance, 2)
+        if injuries_tm and isinstance(injuries_tm, list):
+            matcher = NameMatcher(combined_unavailable)
+            for injury in injuries_tm:
+                # Validate injury data type
+                if not isinstance(injury, dict):
+                    print(f"Invalid injury data format: {injury}")
+                    continue
+                
+                player_name = injury.get("player_name")
+                if not player_name:
+                    continue
+                known_name = matcher.match(player_name) if combined_unavailable else None
+                if known_name:
+                    # Mismo jugador en las dos fuentes: se conserva el dato de la API
+                    if injury.get("return_date"):
+                        combined_unavailable[known_name].setdefault("return_date", injury.get("return_date"))
+                elif player_name not in combined_unavailable:
+                    combined_unavailable[player_name] = {
+                        "id": None,  # Transfermarkt doesn't provide ID easily
+                        "name": player_name,
+                        "type": injury.get("injury_type"),
+                        "reason": injury.get("injury_type"),
+                        "return_date": injury.get("return_date"),
+                        "source": "Transfermarkt"
+                    }
+        return list(combined_unavailable.values())
     
     @staticmethod
     def optimize_match_data(match_data, travel_distance=None, future_matches=None):
@@ -1012,30 +974,13 @@ class DataProcessor:
             }
 
         # Añadir clasificación de la liga si está disponible
-        standings_raw = match_data.get("standings")
-        if standings_raw and "response" in standings_raw:
+        standings_table = get_standings_cache().table_for(match_data.get("standings"), league_id)
+        if standings_table is not None:
             optimized["standings"] = {}
-            for league_data in standings_raw["response"]:
-                if league_data.get("league", {}).get("id") == league_id:
-                    league_standings = league_data.get("league", {}).get("standings", [])
-                    for group in league_standings:
-                        for team_standing in group:
-                            current_team_id = team_standing.get("team", {}).get("id")
-                            if current_team_id == team1_id:
-                                optimized["standings"]["team1"] = {
-                                    "rank": team_standing.get("rank"),
-                                    "points": team_standing.get("points"),
-                                    "form": team_standing.get("form"),
-                                    "goals_diff": team_standing.get("goalsDiff")
-                                }
-                            elif current_team_id == team2_id:
-                                optimized["standings"]["team2"] = {
-                                    "rank": team_standing.get("rank"),
-                                    "points": team_standing.get("points"),
-                                    "form": team_standing.get("form"),
-                                    "goals_diff": team_standing.get("goalsDiff")
-                                }
-                    break # Found the relevant league
+            for team_key, team_id_val in (("team1", team1_id), ("team2", team2_id)):
+                team_standing = standings_table.row(team_id_val)
+                if team_standing is not None:
+                    optimized["standings"][team_key] = standings_row(team_standing)
 
         # Procesar datos de los equipos (estadísticas, understat, lesiones)
         for team_key, team_id_val, team_name_val in [("team1", team1_id, team1_name), ("team2", team2_id, team2_name)]:
@@ -1146,48 +1091,10 @@ class DataProcessor:
                 }
 
             # Procesar lesiones y sanciones (combinando API y Transfermarkt si existe)
-            injuries_api = team_data_raw.get("injuries", [])
-            injuries_tm = team_data_raw.get("injuries_transfermarkt", [])
-            combined_unavailable = {}
-
-            if injuries_api:
-                for injury in injuries_api:
-                    # Validate injury data type
-                    if not isinstance(injury, dict):
-                        print(f"Invalid injury data format: {injury}")
-                        continue
-
-                    player = injury.get("player", {})
-                    player_id = player.get("id")
-                    player_name = player.get("name")
-                    if player_id and player_name:
-                         combined_unavailable[player_name] = {
-                            "id": player_id,
-                            "name": player_name,
-                            "type": injury.get("type"),
-                            "reason": injury.get("reason"),
-                            "source": "API"
-                        }
-            
-            if injuries_tm:
-                 for injury in injuries_tm:
-                    # Validate injury data type
-                    if not isinstance(injury, dict):
-                        print(f"Invalid injury data format: {injury}")
-                        continue
-
-                    player_name = injury.get("player_name")
-                    if player_name and player_name not in combined_unavailable: # Add if not already present from API
-                        combined_unavailable[player_name] = {
-                            "id": None, # Transfermarkt doesn't provide ID easily
-                            "name": player_name,
-                            "type": injury.get("injury_type"),
-                            "reason": injury.get("injury_type"),
-                            "return_date": injury.get("return_date"),
-                            "source": "Transfermarkt"
-                        }
-            
-            optimized_team["injuries_suspensions"] = list(combined_unavailable.values())
+            optimized_team["injuries_suspensions"] = DataProcessor.merge_unavailable_players(
+                team_data_raw.get("injuries", []),
+                team_data_raw.get("injuries_transfermarkt", [])
+            )
 
             # Initialize market_value_data to avoid UnboundLocalError
             market_value_data = market_value_data if 'market_value_data' in locals() else {}
@@ -1231,6 +1138,13 @@ class DataProcessor:
                             print(f"Error processing future match: {e}")
                             continue
                     optimized["future_matches_summary"][team_label] = summary
+                    
+                    # Kilómetros acumulados en esos partidos (matriz de distancias del índice de estadios)
+                    travel = get_venue_index().distance_matrix().cumulative_travel(
+                        optimized[team_label]["id"], fm_data["response"][:3]
+                    )
+                    if travel:
+                        optimized.setdefault("future_travel", {})[team_label] = travel
 
         # Limpiar valores nulos/vacíos al final
         optimized = DataProcessor.remove_null_values(optimized)
@@ -1388,9 +1302,9 @@ class DataProcessor:
                 "capacity": venue_raw.get("capacity"),
                 "surface": venue_raw.get("surface")
             }
-            # Get coordinates if not already present
+            # Coordenadas del índice de estadios si no vienen en los datos (sin usar la red)
             if "latitude" not in venue_raw or "longitude" not in venue_raw:
-                 coords = GeocodingAPI().get_coordinates_from_venue(venue_raw.get("name"), venue_raw.get("city"))
+                 coords = get_venue_index().lookup(venue_raw.get("id"), venue_raw.get("name"), venue_raw.get("city"))
                  if coords:
                      optimized["venue"].update(coords)
             else:
@@ -1398,47 +1312,10 @@ class DataProcessor:
                  optimized["venue"]["longitude"] = venue_raw.get("longitude")
                 
         # Añadir información de lesiones y suspensiones (combinada)
-        injuries_api = team_data.get("injuries") or team_data.get("injuries_suspensions")
-        injuries_tm = team_data.get("injuries_transfermarkt")
-        combined_unavailable = {}
-
-        if injuries_api and isinstance(injuries_api, list):
-            for injury in injuries_api:
-                # Validate injury data type
-                if not isinstance(injury, dict):
-                    print(f"Invalid injury data format: {injury}")
-                    continue
-
-                player = injury.get("player", {})
-                player_id = player.get("id")
-                player_name = player.get("name")
-                if player_id and player_name:
-                     combined_unavailable[player_name] = {
-                        "id": player_id,
-                        "name": player_name,
-                        "type": injury.get("type"),
-                        "reason": injury.get("reason") or injury.get("type"),
-                        "source": "API"
-                    }
-        
-        if injuries_tm and isinstance(injuries_tm, list):
-             for injury in injuries_tm:
-                # Validate injury data type
-                if not isinstance(injury, dict):
-                    print(f"Invalid injury data format: {injury}")
-                    continue
-
-                player_name = injury.get("player_name")
-                if player_name and player_name not in combined_unavailable:
-                    combined_unavailable[player_name] = {
-                        "id": None,
-                        "name": player_name,
-                        "type": injury.get("injury_type"),
-                        "reason": injury.get("injury_type"),
-                        "return_date": injury.get("return_date"),
-                        "source": "Transfermarkt"
-                    }
-        optimized["injuries_suspensions"] = list(combined_unavailable.values())
+        optimized["injuries_suspensions"] = DataProcessor.merge_unavailable_players(
+            team_data.get("injuries") or team_data.get("injuries_suspensions"),
+            team_data.get("injuries_transfermarkt")
+        )
                 
         # Procesar datos de Understat si están disponibles
         understat_data = team_data.get("understat")
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Radio de la Tierra en kilómetros
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    Distancia haversine en kilómetros entre coordenadas en grados
+
+    Acepta números o arrays de NumPy (con broadcasting), de modo que la misma
+    función calcula una distancia o una matriz completa.
+
+    Args:
+        lat1: Latitud(es) del primer punto
+        lon1: Longitud(es) del primer punto
+        lat2: Latitud(es) del segundo punto
+        lon2: Longitud(es) del segundo punto
+
+    Returns:
+        float o np.ndarray: Distancia(s) en kilómetros
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    return float(distance) if np.ndim(distance) == 0 else distance
+
+
+class DistanceMatrix:
+    """
+    Matriz de distancias entre todos los estadios de un índice
+
+    Se calcula una sola vez con NumPy (N×N) y después cada distancia entre dos
+    estadios o dos equipos es una consulta a la matriz, sin trigonometría ni
+    geocodificación.
+    """
+
+    def __init__(self, venues: List[Dict[str, Any]], teams: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            venues: Estadios con key, latitude y longitude (y opcionalmente id)
+            teams: ID de equipo -> clave de su estadio
+        """
+        venues = [v for v in venues if v.get("latitude") is not None and v.get("longitude") is not None]
+        self.keys = [v["key"] for v in venues]
+        self.positions = {key: i for i, key in enumerate(self.keys)}
+        self.ids = {str(v["id"]): v["key"] for v in venues if v.get("id") is not None}
+        self.teams = dict(teams or {})
+        latitudes = np.array([float(v["latitude"]) for v in venues])
+        longitudes = np.array([float(v["longitude"]) for v in venues])
+        self.matrix = haversine(latitudes[:, None], longitudes[:, None], latitudes[None, :], longitudes[None, :]) \
+            if venues else np.zeros((0, 0))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _position(self, key: Optional[str]) -> Optional[int]:
+        return self.positions.get(key) if key is not None else None
+
+    def distance(self, key1: str, key2: str) -> Optional[float]:
+        """
+        Distancia entre dos estadios del índice
+
+        Args:
+            key1: Clave del primer estadio
+            key2: Clave del segundo estadio
+
+        Returns:
+            float: Distancia en kilómetros o None si falta alguno
+        """
+        i, j = self._position(key1), self._position(key2)
+        if i is None or j is None:
+            return None
+        return round(float(self.matrix[i, j]), 2)
+
+    def team_distance(self, team1_id: Any, team2_id: Any) -> Optional[float]:
+        """
+        Distancia entre los estadios de dos equipos
+
+        Args:
+            team1_id: ID del primer equipo
+            team2_id: ID del segundo equipo
+
+        Returns:
+            float: Distancia en kilómetros o None si falta alguno
+        """
+        return self.distance(self.teams.get(str(team1_id)), self.teams.get(str(team2_id)))
+
+    def venue_key(self, venue_id: Any = None, home_team_id: Any = None) -> Optional[str]:
+        """
+        Clave del estadio de un partido: por su ID o, si no, el del equipo local
+
+        Args:
+            venue_id: ID del estadio en API-Football
+            home_team_id: ID del equipo local
+
+        Returns:
+            str: Clave del estadio o None si no está en el índice
+        """
+        key = self.ids.get(str(venue_id)) if venue_id is not None else None
+        if key is None and home_team_id is not None:
+            key = self.teams.get(str(home_team_id))
+        return key
+
+    def cumulative_travel(self, team_id: Any, fixtures: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Kilómetros que recorre un equipo en una serie de partidos
+
+        Se parte del estadio del equipo y se suma cada desplazamiento entre
+        sedes consecutivas (un partido en casa tras otro en casa no suma nada).
+
+        Args:
+            team_id: ID del equipo
+            fixtures: Partidos en el formato de /fixtures (ej. get_next_matches()["response"])
+
+        Returns:
+            dict: total_km, tramos por partido y partidos sin sede conocida,
+                o None si no se conoce el estadio del equipo
+        """
+        current = self.teams.get(str(team_id))
+        if current is None or current not in self.positions:
+            return None
+        ordered = sorted(fixtures or [], key=lambda f: (f.get("fixture") or {}).get("date") or "")
+        keys = []
+        for fixture in ordered:
+            info = fixture.get("fixture") or {}
+            home_id = ((fixture.get("teams") or {}).get("home") or {}).get("id")
+            keys.append(self.venue_key((info.get("venue") or {}).get("id"), home_id))
+
+        # Un solo acceso vectorizado a la matriz para todos los tramos
+        known = [key for key in keys if key in self.positions]
+        route = [self.positions[current]] + [self.positions[key] for key in known]
+        leg_distances = self.matrix[route[:-1], route[1:]] if len(route) > 1 else np.zeros(0)
+
+        legs = []
+        known_index = 0
+        for fixture, key in zip(ordered, keys):
+            info = fixture.get("fixture") or {}
+            leg = None
+            if key in self.positions:
+                leg = round(float(leg_distances[known_index]), 2)
+                known_index += 1
+            legs.append({"fixture_id": info.get("id"), "date": (info.get("date") or "")[:10], "km": leg})
+        return {
+            "total_km": round(float(leg_distances.sum()), 2),
+            "legs": legs,
+            "unknown_venues": sum(1 for leg in legs if leg["km"] is None)
+        }
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Un lock por fichero para los hilos del mismo proceso
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _thread_lock(path: str) -> threading.Lock:
+    with _thread_locks_guard:
+        return _thread_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+@contextmanager
+def file_lock(path: str):
+    """
+    Bloqueo exclusivo entre hilos y procesos sobre un fichero de lock
+
+    Usa flock en POSIX y msvcrt.locking en Windows; el bloqueo se libera al
+    salir del bloque aunque se produzca una excepción.
+
+    Args:
+        path: Ruta del fichero de lock (se crea si no existe)
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with _thread_lock(path):
+        with open(path, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Puntuación mínima (0-1) para considerar que dos nombres son la misma persona o equipo
+DEFAULT_MATCH_THRESHOLD = 0.85
+
+
+def levenshtein_distance(s1: str, s2: str, max_distance: Optional[int] = None) -> int:
+    """
+    Calcula la distancia de Levenshtein entre dos cadenas
+
+    Usa el algoritmo bit-paralelo de Myers/Hyyrö: cada carácter de la cadena
+    larga se procesa con unas pocas operaciones sobre enteros, en lugar de
+    recorrer una fila completa de la matriz.
+
+    Args:
+        s1 (str): Primera cadena
+        s2 (str): Segunda cadena
+        max_distance (int, optional): Distancia a partir de la cual no interesa
+            el valor exacto; si se supera se devuelve max_distance + 1 sin
+            terminar el cálculo
+
+    Returns:
+        int: Distancia de Levenshtein (o max_distance + 1 si la supera)
+    """
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    text, pattern = s1, s2
+    if max_distance is not None and len(text) - len(pattern) > max_distance:
+        return max_distance + 1
+    if not pattern:
+        return len(text)
+
+    # Máscara de posiciones de cada carácter en el patrón
+    peq = {}
+    for i, char in enumerate(pattern):
+        peq[char] = peq.get(char, 0) | (1 << i)
+    mask = (1 << len(pattern)) - 1
+    high_bit = 1 << (len(pattern) - 1)
+
+    positive, negative = mask, 0
+    score = len(pattern)
+    remaining = len(text)
+    for char in text:
+        remaining -= 1
+        eq = peq.get(char, 0)
+        xv = eq | negative
+        xh = (((eq & positive) + positive) ^ positive) | eq
+        horizontal_pos = (negative | ~(xh | positive)) & mask
+        horizontal_neg = positive & xh
+        if horizontal_pos & high_bit:
+            score += 1
+        elif horizontal_neg & high_bit:
+            score -= 1
+        # Cada carácter restante puede reducir la distancia como mucho en 1
+        if max_distance is not None and score - remaining > max_distance:
+            return max_distance + 1
+        horizontal_pos = (horizontal_pos << 1) | 1
+        horizontal_neg = horizontal_neg << 1
+        positive = (horizontal_neg | ~(xv | horizontal_pos)) & mask
+        negative = horizontal_pos & xv & mask
+
+    return score
+
+
+def normalize_name(name: Optional[str]) -> Tuple[str, ...]:
+    """
+    Tokens de un nombre sin tildes, mayúsculas ni signos, ordenados y sin repetir
+
+    Al comparar conjuntos de tokens el orden deja de importar ("Vinícius
+    Júnior" = "Junior Vinicius").
+
+    Args:
+        name: Nombre de un jugador o equipo
+
+    Returns:
+        tuple: Tokens normalizados y ordenados
+    """
+    text = unicodedata.normalize("NFKD", str(name or "")).encode("ascii", "ignore").decode("ascii")
+    return tuple(sorted(set(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())))
+
+
+def _ratio(a: str, b: str, threshold: float) -> float:
+    """Similitud 1 - distancia/longitud, o 0 si no alcanza el umbral"""
+    longest = max(len(a), len(b))
+    if not longest:
+        return 1.0
+    max_distance = int((1 - threshold) * longest)
+    distance = levenshtein_distance(a, b, max_distance)
+    return 1 - distance / longest if distance <= max_distance else 0.0
+
+
+def _initials_match(short: Tuple[str, ...], full: Tuple[str, ...]) -> bool:
+    """True si los tokens coinciden salvo iniciales ("l messi" frente a "lionel messi")"""
+    remaining = list(full)
+    for token in sorted(short, key=len, reverse=True):
+        match = next((t for t in remaining if t == token
+                      or (len(token) == 1 and t.startswith(token))
+                      or (len(t) == 1 and token.startswith(t))), None)
+        if match is None:
+            return False
+        remaining.remove(match)
+    return True
+
+
+def token_set_similarity(name1, name2, threshold: float = 0.0) -> float:
+    """
+    Similitud entre dos nombres (0-1) comparando sus conjuntos de tokens
+
+    Se comprueban en orden, del más barato al más caro: tokens idénticos,
+    los mismos tokens salvo nombres abreviados a su inicial ("L. Messi" y
+    "Lionel Messi") y, por último, distancia de edición entre los tokens
+    unidos, que se corta en cuanto se sabe que no llega al umbral. Un token
+    de más no se da por bueno: "Real Madrid" y "Real Madrid Castilla" son
+    equipos distintos.
+
+    Args:
+        name1: Nombre o tokens de normalize_name()
+        name2: Nombre o tokens de normalize_name()
+        threshold: Puntuación mínima de interés (las inferiores se devuelven como 0)
+
+    Returns:
+        float: Similitud entre 0 y 1
+    """
+    tokens1 = name1 if isinstance(name1, tuple) else normalize_name(name1)
+    tokens2 = name2 if isinstance(name2, tuple) else normalize_name(name2)
+    if not tokens1 or not tokens2:
+        return 0.0
+    if tokens1 == tokens2:
+        return 1.0
+    short, full = (tokens1, tokens2) if len(tokens1) <= len(tokens2) else (tokens2, tokens1)
+    if len(short) >= 2 and len(short) == len(full) and _initials_match(short, full):
+        # Los mismos tokens, con algún nombre abreviado a su inicial
+        return 0.95
+    return _ratio(" ".join(tokens1), " ".join(tokens2), threshold)
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Trigramas de un texto (con espacios de relleno para dar peso a los extremos)
+
+    Args:
+        text (str): Texto ya normalizado
+
+    Returns:
+        set: Trigramas del texto
+    """
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameMatcher:
+    """
+    Busca nombres en una lista de candidatos (ej. los jugadores de una plantilla)
+
+    Los candidatos se normalizan una sola vez y se indexan por token, de modo
+    que cada búsqueda compara solo con los que comparten alguna palabra o
+    inicial; si no hay ninguno se recurre a la distancia de edición acotada
+    sobre los de longitud parecida.
+    """
+
+    def __init__(self, names: Iterable[str], threshold: float = DEFAULT_MATCH_THRESHOLD):
+        """
+        Args:
+            names: Nombres candidatos
+            threshold: Similitud mínima para aceptar una coincidencia
+        """
+        self.threshold = threshold
+        self._candidates = {}  # tokens normalizados -> nombre original
+        self._by_token = {}    # token (o inicial) -> tokens de los candidatos que lo contienen
+        for name in names:
+            tokens = normalize_name(name)
+            if not tokens or tokens in self._candidates:
+                continue
+            self._candidates[tokens] = name
+            for token in tokens:
+                self._by_token.setdefault(token, set()).add(tokens)
+                self._by_token.setdefault(token[0], set()).add(tokens)
+
+    def match(self, name: str) -> Optional[str]:
+        """
+        Candidato más parecido a un nombre
+
+        Args:
+            name: Nombre a buscar
+
+        Returns:
+            str: Nombre del candidato o None si ninguno alcanza el umbral
+        """
+        tokens = normalize_name(name)
+        if not tokens:
+            return None
+        if tokens in self._candidates:
+            return self._candidates[tokens]
+
+        candidates = set()
+        for token in tokens:
+            candidates.update(self._by_token.get(token, ()))
+        if not candidates:
+            length = len(" ".join(tokens))
+            max_difference = int((1 - self.threshold) * length) + 1
+            candidates = [c for c in self._candidates if abs(len(" ".join(c)) - length) <= max_difference]
+
+        best_name, best_score = None, 0.0
+        for candidate in sorted(candidates):
+            score = token_set_similarity(tokens, candidate, max(self.threshold, best_score))
+            if score >= self.threshold and score > best_score:
+                best_name, best_score = self._candidates[candidate], score
+        return best_name
+
+    def match_all(self, names: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Busca varios nombres a la vez
+
+        Args:
+            names: Nombres a buscar
+
+        Returns:
+            dict: Nombre buscado -> candidato encontrado o None
+        """
+        return {name: self.match(name) for name in names}
+
+
+def best_match(name: str, candidates: List[str], threshold: float = DEFAULT_MATCH_THRESHOLD) -> Optional[str]:
+    """
+    Candidato más parecido a un nombre (atajo para búsquedas sueltas)
+
+    Args:
+        name: Nombre a buscar
+        candidates: Nombres candidatos
+        threshold: Similitud mínima
+
+    Returns:
+        str: Candidato encontrado o None
+    """
+    return NameMatcher(candidates, threshold).match(name)
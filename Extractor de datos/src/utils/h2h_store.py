@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utils.file_lock import file_lock
+from src.utils.serialization import get_backend, read_document, write_document
+
+# Directorio de enfrentamientos directos por defecto dentro de data/
+DEFAULT_H2H_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "h2h"
+)
+
+# Estados de partido que cuentan para el historial
+H2H_FINISHED_STATUSES = ("FT",)
+
+
+def pair_key(team1_id: Any, team2_id: Any) -> Tuple[str, str]:
+    """
+    Pareja de equipos sin orden: (ID menor, ID mayor)
+
+    Args:
+        team1_id: ID de un equipo
+        team2_id: ID del otro equipo
+
+    Returns:
+        tuple: IDs ordenados como texto
+    """
+    return tuple(sorted((str(team1_id), str(team2_id)), key=lambda t: (len(t), t)))
+
+
+def _empty_aggregates() -> Dict[str, int]:
+    return {"total": 0, "a_wins": 0, "b_wins": 0, "draws": 0, "a_goals": 0, "b_goals": 0}
+
+
+def compact_fixture(fixture: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Resumen de un partido de /fixtures con lo necesario para el historial
+
+    Args:
+        fixture: Partido en el formato de /fixtures
+
+    Returns:
+        dict: id, fecha, liga, equipos y goles, o None si no ha terminado
+    """
+    info = fixture.get("fixture") or {}
+    if info.get("id") is None or (info.get("status") or {}).get("short") not in H2H_FINISHED_STATUSES:
+        return None
+    teams = fixture.get("teams") or {}
+    goals = fixture.get("goals") or {}
+    return {
+        "id": info["id"],
+        "date": (info.get("date") or "")[:10],
+        "league": (fixture.get("league") or {}).get("name", ""),
+        "home_id": (teams.get("home") or {}).get("id"),
+        "home_name": (teams.get("home") or {}).get("name"),
+        "away_id": (teams.get("away") or {}).get("id"),
+        "away_name": (teams.get("away") or {}).get("name"),
+        "home_goals": goals.get("home", 0) or 0,
+        "away_goals": goals.get("away", 0) or 0
+    }
+
+
+class H2HStore:
+    """
+    Historial completo de enfrentamientos directos por pareja de equipos
+
+    Cada pareja (sin orden) se guarda en data/h2h/{id_menor}-{id_mayor} con
+    todos sus partidos terminados, la fecha del más reciente y los agregados
+    (victorias, empates y goles) desde el punto de vista del ID menor. Los
+    partidos terminados no cambian, así que al refrescar solo se piden los
+    posteriores al último guardado y los agregados se actualizan sumando los
+    nuevos, sin recorrer el historial.
+    """
+
+    def __init__(self, store_dir: Optional[str] = None, backend=None):
+        """
+        Args:
+            store_dir: Directorio del historial (por defecto data/h2h)
+            backend: Backend de serialización (por defecto el de STORAGE_FORMAT)
+        """
+        self.store_dir = store_dir or DEFAULT_H2H_DIR
+        self.backend = backend or get_backend()
+
+    def _base_path(self, pair: Tuple[str, str]) -> str:
+        return os.path.join(self.store_dir, f"{pair[0]}-{pair[1]}")
+
+    def load(self, team1_id: Any, team2_id: Any) -> Optional[Dict[str, Any]]:
+        """
+        Historial guardado de una pareja
+
+        Args:
+            team1_id: ID de un equipo
+            team2_id: ID del otro equipo
+
+        Returns:
+            dict: Documento de la pareja o None si no hay historial
+        """
+        try:
+            return read_document(self._base_path(pair_key(team1_id, team2_id)), self.backend)
+        except Exception as e:
+            print(f"⚠️ No se pudo leer el historial H2H {team1_id}-{team2_id}: {e}")
+            return None
+
+    def add_fixtures(self, team1_id: Any, team2_id: Any, fixtures: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Añade al historial los partidos terminados que aún no estaban
+
+        Args:
+            team1_id: ID de un equipo
+            team2_id: ID del otro equipo
+            fixtures: Partidos en el formato de /fixtures
+
+        Returns:
+            list: Partidos (en el formato de /fixtures) que eran nuevos
+        """
+        pair = pair_key(team1_id, team2_id)
+        base_path = self._base_path(pair)
+        with file_lock(f"{base_path}.lock"):
+            document = read_document(base_path, self.backend) or {
+                "teams": list(pair), "fixtures": {}, "newest_date": None, "aggregates": _empty_aggregates()
+            }
+            aggregates = document["aggregates"]
+            added = []
+            for fixture in fixtures or []:
+                summary = compact_fixture(fixture)
+                if summary is None or str(summary["id"]) in document["fixtures"]:
+                    continue
+                document["fixtures"][str(summary["id"])] = summary
+                added.append(fixture)
+
+                # Actualizar los agregados solo con el partido nuevo
+                home_is_a = str(summary["home_id"]) == pair[0]
+                a_goals = summary["home_goals"] if home_is_a else summary["away_goals"]
+                b_goals = summary["away_goals"] if home_is_a else summary["home_goals"]
+                aggregates["total"] += 1
+                aggregates["a_goals"] += a_goals
+                aggregates["b_goals"] += b_goals
+                if a_goals > b_goals:
+                    aggregates["a_wins"] += 1
+                elif a_goals < b_goals:
+                    aggregates["b_wins"] += 1
+                else:
+                    aggregates["draws"] += 1
+                if summary["date"] and (document["newest_date"] or "") < summary["date"]:
+                    document["newest_date"] = summary["date"]
+
+            document["checked_at"] = datetime.now().isoformat()
+            write_document(base_path, document, self.backend)
+        return added
+
+    def stats(self, team1_id: Any, team2_id: Any) -> Optional[Dict[str, Any]]:
+        """
+        Agregados del historial desde el punto de vista de team1_id
+
+        Args:
+            team1_id: ID del primer equipo
+            team2_id: ID del segundo equipo
+
+        Returns:
+            dict: total, team1_wins, team2_wins, draws, goles y los partidos
+                ordenados del más reciente al más antiguo, o None sin historial
+        """
+        document = self.load(team1_id, team2_id)
+        if not document:
+            return None
+        aggregates = document["aggregates"]
+        team1_is_a = str(team1_id) == document["teams"][0]
+        a, b = ("a", "b") if team1_is_a else ("b", "a")
+        return {
+            "total": aggregates["total"],
+            "team1_wins": aggregates[f"{a}_wins"],
+            "team2_wins": aggregates[f"{b}_wins"],
+            "draws": aggregates["draws"],
+            "total_goals": aggregates["a_goals"] + aggregates["b_goals"],
+            "team1_goals": aggregates[f"{a}_goals"],
+            "team2_goals": aggregates[f"{b}_goals"],
+            "newest_date": document.get("newest_date"),
+            "fixtures": sorted(document["fixtures"].values(), key=lambda f: f["date"], reverse=True)
+        }
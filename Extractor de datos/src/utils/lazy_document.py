@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import json
+import mmap
+import threading
+from collections.abc import Mapping
+from typing import Any, Dict, Optional, Tuple
+
+# Extensión del índice de desplazamientos que acompaña a cada fichero .json
+INDEX_SUFFIX = ".idx"
+
+# Niveles de claves indexados (1 = claves raíz, 2 = también sus hijos)
+INDEX_DEPTH = 2
+
+WHITESPACE_PATTERN = re.compile(r"[ \t\n\r]*")
+
+_decoder = json.JSONDecoder()
+
+_memory_indexes = {}
+_memory_indexes_lock = threading.Lock()
+
+
+def build_offset_index(buffer, max_depth: int = INDEX_DEPTH) -> Dict[Tuple[str, ...], Tuple[int, int]]:
+    """
+    Calcula la posición en bytes del valor de cada clave de un documento JSON
+
+    El contenido se lee como latin-1 (un carácter por byte), de modo que las
+    posiciones del escáner de json coinciden con las del fichero UTF-8 y
+    después se puede decodificar cualquier subárbol por separado.
+
+    Args:
+        buffer: Contenido del fichero (bytes o mmap)
+        max_depth: Niveles de objetos anidados que se indexan
+
+    Returns:
+        dict: Ruta de claves (tupla) -> (inicio, fin) del valor en bytes
+    """
+    text = bytes(buffer).decode("latin-1")
+    index = {}
+    position = WHITESPACE_PATTERN.match(text, 0).end()
+    if text[position:position + 1] == "{":
+        _index_object(text, position, (), max_depth, index)
+    return index
+
+
+def _index_object(text: str, position: int, path: Tuple[str, ...], max_depth: int, index) -> int:
+    """Indexa el objeto que empieza en position y devuelve la posición tras su cierre"""
+    position = WHITESPACE_PATTERN.match(text, position + 1).end()
+    if text[position] == "}":
+        return position + 1
+    while True:
+        _, key_end = json.decoder.scanstring(text, position + 1)
+        key = json.loads(text[position:key_end].encode("latin-1"))
+        position = WHITESPACE_PATTERN.match(text, key_end).end()  # ':'
+        start = WHITESPACE_PATTERN.match(text, position + 1).end()
+        if len(path) + 1 < max_depth and text[start] == "{":
+            end = _index_object(text, start, path + (key,), max_depth, index)
+        else:
+            _, end = _decoder.raw_decode(text, start)
+        index[path + (key,)] = (start, end)
+        position = WHITESPACE_PATTERN.match(text, end).end()
+        if text[position] == ",":
+            position = WHITESPACE_PATTERN.match(text, position + 1).end()
+            continue
+        return position + 1
+
+
+def _index_path(path: str) -> str:
+    return path + INDEX_SUFFIX
+
+
+def _stat_key(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def load_offset_index(path: str, buffer) -> Dict[Tuple[str, ...], Tuple[int, int]]:
+    """
+    Obtiene el índice de desplazamientos de un fichero JSON
+
+    El índice se guarda junto al fichero ({fichero}.idx) con su tamaño y fecha
+    de modificación, y se recalcula solo cuando el fichero cambia.
+
+    Args:
+        path: Ruta del fichero .json
+        buffer: Contenido del fichero (bytes o mmap)
+
+    Returns:
+        dict: Ruta de claves -> (inicio, fin)
+    """
+    stat_key = _stat_key(path)
+    with _memory_indexes_lock:
+        cached = _memory_indexes.get(path)
+    if cached and cached[0] == stat_key:
+        return cached[1]
+
+    index = None
+    try:
+        with open(_index_path(path), "r", encoding="utf-8") as f:
+            stored = json.load(f)
+        if [stored.get("size"), stored.get("mtime_ns")] == list(stat_key):
+            index = {tuple(entry[0]): (entry[1], entry[2]) for entry in stored["keys"]}
+    except (OSError, ValueError, KeyError, TypeError):
+        index = None
+
+    if index is None:
+        index = build_offset_index(buffer)
+        try:
+            tmp_path = f"{_index_path(path)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "size": stat_key[0],
+                    "mtime_ns": stat_key[1],
+                    "keys": [[list(key), start, end] for key, (start, end) in index.items()]
+                }, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, _index_path(path))
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar el índice de {path}: {e}")
+
+    with _memory_indexes_lock:
+        _memory_indexes[path] = (stat_key, index)
+    return index
+
+
+_MISSING = object()
+
+
+class LazyDocument(Mapping):
+    """
+    Documento JSON guardado que se decodifica por partes bajo demanda
+
+    El fichero se proyecta en memoria con mmap y, con el índice de
+    desplazamientos, cada clave de primer o segundo nivel se decodifica solo
+    cuando se consulta. Se comporta como un diccionario de solo lectura, así
+    que puede pasarse a funciones que usan .get() (ej. print_match_summary).
+    Los documentos en formatos comprimidos o binarios se cargan completos.
+    """
+
+    def __init__(self, path: Optional[str] = None, data: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            path: Ruta de un fichero .json
+            data: Datos ya cargados (para formatos que no admiten acceso parcial)
+        """
+        self.path = path
+        self._data = data
+        self._map = None
+        self._index = {}
+        self._decoded = {}
+        if data is None and path is not None:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    self._data = {}
+                else:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._map is not None:
+                self._index = load_offset_index(path, self._map)
+
+    def _decode(self, path: Tuple[str, ...]) -> Any:
+        if path not in self._decoded:
+            if self._map is None:
+                raise ValueError(f"El documento {self.path} está cerrado")
+            start, end = self._index[path]
+            self._decoded[path] = json.loads(self._map[start:end].decode("utf-8"))
+        return self._decoded[path]
+
+    def get_path(self, *keys: str, default: Any = None) -> Any:
+        """
+        Obtiene un valor anidado decodificando solo su subárbol
+
+        Args:
+            *keys: Ruta de claves (ej. "squad", "1234")
+            default: Valor si la ruta no existe
+
+        Returns:
+            Valor encontrado o default
+        """
+        if self._data is not None:
+            value = self._data
+        else:
+            # Decodificar el prefijo indexado más largo y recorrer el resto
+            depth = len(keys)
+            while depth and keys[:depth] not in self._index:
+                depth -= 1
+            if depth == 0:
+                return default
+            value = self._decode(keys[:depth])
+            keys = keys[depth:]
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                return default
+            value = value[key]
+        return value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get_path(key, default=_MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        if self._data is not None:
+            return iter(self._data)
+        return (path[0] for path in self._index if len(path) == 1)
+
+    def __len__(self) -> int:
+        if self._data is not None:
+            return len(self._data)
+        return sum(1 for path in self._index if len(path) == 1)
+
+    def __contains__(self, key: object) -> bool:
+        if self._data is not None:
+            return key in self._data
+        return (key,) in self._index
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Decodifica el documento completo"""
+        if self._data is not None:
+            return self._data
+        if self._map is None:
+            raise ValueError(f"El documento {self.path} está cerrado")
+        return json.loads(self._map[:].decode("utf-8"))
+
+    def close(self):
+        """Libera la proyección en memoria del fichero"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
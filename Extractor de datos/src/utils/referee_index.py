@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from src.utils.fuzzy import NameMatcher, normalize_name
+from src.utils.serialization import JSONBackend, read_document, write_document
+
+# Índice de árbitros por defecto dentro de data/
+DEFAULT_INDEX_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "referees"
+)
+
+# Vigencia del perfil de un árbitro (sus estadísticas cambian una vez por jornada)
+PROFILE_TTL = 3 * 24 * 3600
+
+# Segundos que se espera antes de volver a buscar un árbitro que no se encontró
+MISS_RETRY_SECONDS = 7 * 24 * 3600
+
+
+def normalize_referee_key(name: Optional[str]) -> str:
+    """
+    Clave normalizada de un árbitro
+
+    API-Football devuelve los árbitros como "Michael Oliver, England"; se quita
+    el país y se normalizan tildes, mayúsculas y orden de las palabras.
+
+    Args:
+        name: Nombre del árbitro
+
+    Returns:
+        str: Clave del árbitro
+    """
+    return " ".join(normalize_name(str(name or "").split(",")[0]))
+
+
+class RefereeIndex:
+    """
+    Índice persistente de árbitros
+
+    Guarda por cada árbitro la URL de su página en Transfermarkt y el último
+    perfil descargado (estadísticas por competición), de modo que en una
+    extracción normal el árbitro se resuelve sin usar la red. Cuando el
+    perfil caduca se vuelve a descargar directamente de su URL, sin pasar
+    por el buscador. El índice se guarda en data/referees.json.
+    """
+
+    def __init__(self, index_path: Optional[str] = None, ttl: float = PROFILE_TTL):
+        """
+        Args:
+            index_path: Ruta del índice sin extensión (por defecto data/referees)
+            ttl: Vigencia en segundos de los perfiles
+        """
+        self.index_path = index_path or DEFAULT_INDEX_PATH
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._key_locks = {}
+        self._referees = {}  # clave normalizada -> entrada
+        self._aliases = {}   # otras claves (ej. "m oliver") -> clave de la entrada
+        self._matcher = None
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        try:
+            stored = read_document(self.index_path)
+        except Exception as e:
+            print(f"⚠️ No se pudo leer el índice de árbitros: {e}")
+            return
+        for entry in (stored or {}).get("referees", []):
+            if entry.get("key"):
+                self._referees[entry["key"]] = entry
+                for alias in entry.get("aliases", []):
+                    self._aliases[alias] = entry["key"]
+
+    def _save(self):
+        with self._lock:
+            data = {
+                "updated_at": datetime.now().isoformat(),
+                "referees": list(self._referees.values())
+            }
+            write_document(self.index_path, data, JSONBackend())
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def _find_key(self, name: str) -> Optional[str]:
+        key = normalize_referee_key(name)
+        if not key:
+            return None
+        if key in self._referees:
+            return key
+        if key in self._aliases:
+            return self._aliases[key]
+        # "M. Oliver" frente a "Michael Oliver"
+        if self._matcher is None:
+            self._matcher = NameMatcher(self._referees)
+        return self._matcher.match(key)
+
+    def lookup(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Entrada de un árbitro en el índice (sin usar la red)
+
+        Args:
+            name: Nombre del árbitro
+
+        Returns:
+            dict: Copia de la entrada (url, profile, updated_at...) o None
+        """
+        with self._lock:
+            key = self._find_key(name)
+            entry = self._referees.get(key) if key else None
+            return dict(entry) if entry else None
+
+    def is_fresh(self, entry: Optional[Dict[str, Any]]) -> bool:
+        """
+        Indica si el perfil de una entrada sigue vigente
+
+        Args:
+            entry: Entrada devuelta por lookup()
+
+        Returns:
+            bool: True si tiene perfil y no ha caducado
+        """
+        return bool(entry and entry.get("profile")) and time.time() - entry.get("fetched_at", 0) < self.ttl
+
+    def recently_missed(self, entry: Optional[Dict[str, Any]]) -> bool:
+        """True si el árbitro se buscó sin éxito hace poco (no merece la pena repetir la búsqueda)"""
+        return bool(entry and entry.get("missed_at")) and time.time() - entry["missed_at"] < MISS_RETRY_SECONDS
+
+    def key_lock(self, name: str) -> threading.Lock:
+        """Lock por árbitro para que dos hilos no descarguen el mismo perfil"""
+        key = normalize_referee_key(name)
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    # ------------------------------------------------------------------
+    # Altas
+    # ------------------------------------------------------------------
+
+    def _entry(self, name: str) -> Dict[str, Any]:
+        """Entrada existente del árbitro o una nueva"""
+        key = self._find_key(name)
+        if key is None or key not in self._referees:
+            key = normalize_referee_key(name)
+            self._referees[key] = {"key": key, "name": name.split(",")[0].strip(), "aliases": []}
+            self._matcher = None
+        alias = normalize_referee_key(name)
+        entry = self._referees[key]
+        if alias != key and alias not in entry["aliases"]:
+            entry["aliases"].append(alias)
+            self._aliases[alias] = key
+        return entry
+
+    def put(self, name: str, profile: Dict[str, Any]):
+        """
+        Guarda el perfil descargado de un árbitro
+
+        Args:
+            name: Nombre con el que se ha buscado
+            profile: Resultado de RefereeAPI con status "success"
+        """
+        with self._lock:
+            entry = self._entry(name)
+            entry.update({
+                "url": profile.get("source_url") or entry.get("url"),
+                "profile": profile,
+                "fetched_at": time.time(),
+                "updated_at": datetime.now().isoformat(),
+                "missed_at": None
+            })
+            self._save()
+
+    def put_miss(self, name: str):
+        """
+        Registra que un árbitro no se encontró (para no repetir la búsqueda en cada partido)
+
+        Args:
+            name: Nombre del árbitro
+        """
+        with self._lock:
+            entry = self._entry(name)
+            entry["missed_at"] = time.time()
+            self._save()
+
+    def __len__(self) -> int:
+        return len(self._referees)
+
+
+# Índice compartido por todos los clientes del proceso
+_shared_index = None
+_shared_index_lock = threading.Lock()
+
+
+def get_referee_index() -> RefereeIndex:
+    """
+    Devuelve el índice de árbitros compartido del proceso
+
+    Returns:
+        RefereeIndex: Índice compartido
+    """
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            _shared_index = RefereeIndex()
+        return _shared_index
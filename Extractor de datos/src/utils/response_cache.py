@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+# Directorio de caché por defecto dentro de data/
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "cache"
+)
+
+# Tamaño máximo por defecto de la caché de respuestas (en MB)
+DEFAULT_MAX_MB = int(os.getenv("RESPONSE_CACHE_MAX_MB", "200"))
+
+
+class CachedResponse:
+    """
+    Respuesta servida desde la caché con la interfaz mínima de requests.Response
+    """
+
+    def __init__(self, data, status_code=200, headers=None, stored_at=None):
+        self._data = data
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.from_cache = True
+        self.stored_at = stored_at if stored_at is not None else time.time()  # Momento de la descarga
+
+    @property
+    def text(self):
+        return json.dumps(self._data, ensure_ascii=False)
+
+    def json(self):
+        return self._data
+
+    def raise_for_status(self):
+        return None
+
+
+class ResponseCache:
+    """
+    Caché en disco de respuestas HTTP indexada por (endpoint, parámetros normalizados)
+
+    Cada entrada guarda su fecha de expiración (None = no expira nunca) y los
+    validadores ETag/Last-Modified para poder revalidarla con peticiones
+    condicionales. El tamaño total está acotado con una política LRU.
+    """
+
+    def __init__(self, cache_dir=None, namespace="api-football", max_bytes=None):
+        """
+        Args:
+            cache_dir: Directorio base de la caché (por defecto data/cache)
+            namespace: Subdirectorio para separar cachés de distintas fuentes
+            max_bytes: Tamaño máximo en bytes (por defecto RESPONSE_CACHE_MAX_MB)
+        """
+        self.cache_dir = os.path.join(cache_dir or DEFAULT_CACHE_DIR, namespace)
+        self.max_bytes = max_bytes if max_bytes is not None else DEFAULT_MAX_MB * 1024 * 1024
+        self._lock = threading.Lock()
+        self._index = None  # clave -> [tamaño, último acceso]
+        self._total_bytes = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def normalize_params(params: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        Normaliza los parámetros para que el orden y el tipo no cambien la clave
+
+        Args:
+            params: Parámetros de la petición
+
+        Returns:
+            dict: Parámetros ordenados, sin valores None y como texto
+        """
+        if not params:
+            return {}
+        return {str(k): str(v) for k, v in sorted(params.items()) if v is not None}
+
+    def make_key(self, endpoint: str, params: Optional[Dict[str, Any]]) -> str:
+        """
+        Calcula la clave de caché de una petición
+
+        Args:
+            endpoint: Endpoint de la petición (ej. "/fixtures")
+            params: Parámetros de la petición
+
+        Returns:
+            str: Hash hexadecimal de la petición
+        """
+        raw = json.dumps([endpoint, self.normalize_params(params)], sort_keys=True)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load_index(self):
+        """Construye el índice LRU a partir de los ficheros existentes (solo la primera vez)"""
+        if self._index is not None:
+            return
+        index = {}
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for filename in files:
+                if not filename.endswith(".json"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, filename))
+                except OSError:
+                    continue
+                index[filename[:-5]] = [stat.st_size, stat.st_mtime]
+                total += stat.st_size
+        self._index = index
+        self._total_bytes = total
+
+    def get(self, endpoint: str, params: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene una entrada de la caché, esté vigente o no
+
+        Args:
+            endpoint: Endpoint de la petición
+            params: Parámetros de la petición
+
+        Returns:
+            dict: Entrada con data, expires_at, etag y last_modified, o None si no existe
+        """
+        key = self.make_key(endpoint, params)
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # Marcar la entrada como usada recientemente
+        now = time.time()
+        with self._lock:
+            self._load_index()
+            if key in self._index:
+                self._index[key][1] = now
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        return entry
+
+    @staticmethod
+    def is_fresh(entry: Optional[Dict[str, Any]]) -> bool:
+        """
+        Indica si una entrada sigue vigente
+
+        Args:
+            entry: Entrada devuelta por get()
+
+        Returns:
+            bool: True si la entrada no ha expirado
+        """
+        if not entry:
+            return False
+        expires_at = entry.get("expires_at")
+        return expires_at is None or expires_at > time.time()
+
+    def put(self, endpoint: str, params: Optional[Dict[str, Any]], data: Any, ttl: Optional[float],
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Guarda una respuesta en la caché
+
+        Args:
+            endpoint: Endpoint de la petición
+            params: Parámetros de la petición
+            data: Respuesta JSON ya decodificada
+            ttl: Segundos de vigencia (None = no expira nunca)
+            etag: Cabecera ETag de la respuesta
+            last_modified: Cabecera Last-Modified de la respuesta
+
+        Returns:
+            dict: Entrada guardada
+        """
+        now = time.time()
+        entry = {
+            "endpoint": endpoint,
+            "params": self.normalize_params(params),
+            "stored_at": now,
+            "expires_at": None if ttl is None else now + ttl,
+            "etag": etag,
+            "last_modified": last_modified,
+            "data": data
+        }
+        self._write(self.make_key(endpoint, params), entry)
+        return entry
+
+    def refresh(self, entry: Dict[str, Any], ttl: Optional[float]):
+        """
+        Renueva la vigencia de una entrada revalidada (respuesta 304)
+
+        Args:
+            entry: Entrada devuelta por get()
+            ttl: Segundos de vigencia (None = no expira nunca)
+        """
+        now = time.time()
+        entry["stored_at"] = now
+        entry["expires_at"] = None if ttl is None else now + ttl
+        self._write(self.make_key(entry["endpoint"], entry["params"]), entry)
+
+    def invalidate(self, endpoint: str, params: Optional[Dict[str, Any]]):
+        """
+        Elimina una entrada de la caché
+
+        Args:
+            endpoint: Endpoint de la petición
+            params: Parámetros de la petición
+        """
+        key = self.make_key(endpoint, params)
+        with self._lock:
+            self._load_index()
+            self._remove(key)
+
+    def _write(self, key: str, entry: Dict[str, Any]):
+        """Escribe una entrada de forma atómica y aplica el límite de tamaño"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._load_index()
+            previous = self._index.get(key)
+            if previous:
+                self._total_bytes -= previous[0]
+            self._index[key] = [len(payload), time.time()]
+            self._total_bytes += len(payload)
+            self._evict()
+
+    def _evict(self):
+        """Elimina las entradas usadas hace más tiempo hasta respetar el tamaño máximo"""
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key, _ in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._remove(key)
+
+    def _remove(self, key: str):
+        """Elimina una entrada del disco y del índice (requiere tener el lock)"""
+        info = self._index.pop(key, None)
+        if info:
+            self._total_bytes -= info[0]
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
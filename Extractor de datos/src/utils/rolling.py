@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+# Puntos por resultado en los datos de Understat ("w", "d", "l")
+RESULT_POINTS = {"w": 3.0, "d": 1.0, "l": 0.0}
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def match_points(match: Dict[str, Any]) -> float:
+    """
+    Puntos obtenidos en un partido, por el resultado o por el marcador
+
+    Args:
+        match: Partido con result o goals_for/goals_against
+
+    Returns:
+        float: 3, 1, 0 o NaN si no hay información
+    """
+    result = str(match.get("result") or "").lower()
+    if result in RESULT_POINTS:
+        return RESULT_POINTS[result]
+    goals_for = _to_float(match.get("goals_for"))
+    goals_against = _to_float(match.get("goals_against"))
+    if np.isnan(goals_for) or np.isnan(goals_against):
+        return np.nan
+    if goals_for > goals_against:
+        return 3.0
+    return 1.0 if goals_for == goals_against else 0.0
+
+
+def match_ppda(match: Dict[str, Any]) -> float:
+    """
+    PPDA de un partido (pases permitidos por acción defensiva)
+
+    Understat lo da como {"att": pases, "def": acciones}; también se acepta un número.
+
+    Args:
+        match: Partido con la clave ppda
+
+    Returns:
+        float: PPDA o NaN si no hay información
+    """
+    ppda = match.get("ppda")
+    if isinstance(ppda, dict):
+        passes = _to_float(ppda.get("att"))
+        actions = _to_float(ppda.get("def"))
+        if np.isnan(passes) or not actions or np.isnan(actions):
+            return np.nan
+        return passes / actions
+    return _to_float(ppda)
+
+
+# Métricas por defecto: nombre de la tendencia -> clave del partido o función que la calcula
+DEFAULT_METRICS: Dict[str, Union[str, Callable[[Dict[str, Any]], float]]] = {
+    "goals": "goals_for",
+    "xG": "xG_for",
+    "shots": "shots",
+    "goals_against": "goals_against",
+    "xGA": "xG_against",
+    "points": match_points,
+    "ppda": match_ppda
+}
+
+
+class RollingStats:
+    """
+    Estadísticas móviles de una serie de partidos calculadas con sumas acumuladas
+
+    Las métricas se leen una sola vez en una matriz (partidos x métricas) y cada
+    ventana se obtiene restando dos sumas acumuladas, de modo que el coste es
+    lineal en el número de partidos sea cual sea el tamaño de la ventana. Los
+    valores que faltan no cuentan en la media de su ventana.
+    """
+
+    def __init__(self, matches: List[Dict[str, Any]], metrics: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            matches: Partidos en orden cronológico
+            metrics: Métricas a calcular (por defecto DEFAULT_METRICS)
+        """
+        self.metrics = dict(metrics or DEFAULT_METRICS)
+        self.names = list(self.metrics)
+        self.values = np.full((len(matches), len(self.names)), np.nan)
+        for column, name in enumerate(self.names):
+            source = self.metrics[name]
+            if callable(source):
+                self.values[:, column] = [source(m) for m in matches]
+            else:
+                self.values[:, column] = [_to_float(m.get(source)) for m in matches]
+
+    def __len__(self):
+        return self.values.shape[0]
+
+    def _as_dict(self, matrix: np.ndarray) -> Dict[str, List[Optional[float]]]:
+        """Convierte una matriz (posiciones x métricas) en listas por métrica con None donde no hay datos"""
+        result = {}
+        for column, name in enumerate(self.names):
+            series = matrix[:, column].astype(object)
+            series[np.isnan(matrix[:, column])] = None
+            result[name] = series.tolist()
+        return result
+
+    def rolling_mean(self, window: int = 5) -> Dict[str, List[Optional[float]]]:
+        """
+        Media móvil de todas las métricas con ventanas completas
+
+        Args:
+            window: Número de partidos por ventana
+
+        Returns:
+            dict: Métrica -> una media por cada posición de la ventana
+        """
+        n = len(self)
+        if window <= 0 or n < window:
+            return {name: [] for name in self.names}
+        present = ~np.isnan(self.values)
+        sums = np.vstack([np.zeros(len(self.names)), np.cumsum(np.where(present, self.values, 0.0), axis=0)])
+        counts = np.vstack([np.zeros(len(self.names)), np.cumsum(present, axis=0)])
+        window_sums = sums[window:] - sums[:-window]
+        window_counts = counts[window:] - counts[:-window]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(window_counts > 0, window_sums / np.maximum(window_counts, 1), np.nan)
+        return self._as_dict(means)
+
+    def ewm(self, span: Optional[float] = None, alpha: Optional[float] = None) -> Dict[str, List[Optional[float]]]:
+        """
+        Media móvil exponencial de todas las métricas
+
+        Args:
+            span: Periodo equivalente (alpha = 2 / (span + 1))
+            alpha: Factor de suavizado entre 0 y 1 (tiene prioridad sobre span)
+
+        Returns:
+            dict: Métrica -> un valor suavizado por partido
+        """
+        if alpha is None:
+            alpha = 2.0 / ((span or 5) + 1.0)
+        smoothed = np.full(self.values.shape, np.nan)
+        current = np.full(len(self.names), np.nan)
+        # Una pasada por los partidos, vectorizada sobre las métricas
+        for row in range(len(self)):
+            values = self.values[row]
+            present = ~np.isnan(values)
+            first = present & np.isnan(current)
+            current = np.where(first, values, current)
+            update = present & ~first
+            current = np.where(update, alpha * values + (1 - alpha) * current, current)
+            smoothed[row] = current
+        return self._as_dict(smoothed)
+
+    def trends(self, window: int = 5, ewm_span: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Tendencias de todas las métricas en el formato de los informes
+
+        Args:
+            window: Número de partidos de la media móvil
+            ewm_span: Periodo de la media exponencial (None = no se calcula)
+
+        Returns:
+            dict: "{métrica}_trend" con las medias móviles y, si se pidió, "ewm"
+        """
+        trends = {f"{name}_trend": series for name, series in self.rolling_mean(window).items()}
+        trends["window_size"] = window
+        if ewm_span:
+            trends["ewm"] = {f"{name}_trend": series for name, series in self.ewm(span=ewm_span).items()}
+            trends["ewm_span"] = ewm_span
+        return trends
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import inspect
+import functools
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+
+def _freeze(value: Any) -> Hashable:
+    """
+    Convierte un argumento en una clave hashable y estable
+
+    Los escalares se comparan como texto para que 2024 y "2024" coincidan.
+
+    Args:
+        value: Valor del argumento
+
+    Returns:
+        Hashable: Representación inmutable del valor
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items() if v is not None))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return str(value)
+
+
+class RunCache:
+    """
+    Memoización limitada a una ejecución (un partido o un lote de partidos)
+
+    Agrupa las llamadas idénticas: si una llamada ya terminó se reutiliza su
+    resultado y si está en curso en otro hilo se espera a que termine en lugar
+    de repetirla. Los resultados se comparten entre quienes los piden, por lo
+    que no deben modificarse. Un resultado con el atributo run_cacheable a
+    False se entrega a quienes lo esperaban pero no se memoriza.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_call(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        """
+        Devuelve el resultado memorizado para la clave o ejecuta la función
+
+        Args:
+            key: Clave de la llamada
+            func: Función a ejecutar si no hay resultado
+            *args: Argumentos posicionales de la función
+            **kwargs: Argumentos con nombre de la función
+
+        Returns:
+            Any: Resultado de la función
+        """
+        with self._lock:
+            future = self._entries.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._entries[key] = future
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            # Las excepciones se propagan a quien espera, pero no se memorizan
+            with self._lock:
+                self._entries.pop(key, None)
+            future.set_exception(e)
+            raise
+        if not getattr(result, "run_cacheable", True):
+            with self._lock:
+                self._entries.pop(key, None)
+        future.set_result(result)
+        return result
+
+    def invalidate(self, key: Hashable):
+        """
+        Olvida el resultado memorizado para una clave
+
+        Quien ya lo estuviera esperando lo recibe igualmente; la siguiente
+        llamada con la clave vuelve a ejecutar la función.
+
+        Args:
+            key: Clave de la llamada
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Olvida todos los resultados memorizados"""
+        with self._lock:
+            self._entries.clear()
+
+
+def memoized_per_run(method: Callable) -> Callable:
+    """
+    Decorador para métodos de clientes con un atributo run_cache
+
+    Si el cliente no tiene una RunCache activa la llamada se ejecuta tal cual.
+    El método envuelto tiene un atributo invalidate(self, *args, **kwargs)
+    para descartar el resultado memorizado de una llamada concreta.
+
+    Args:
+        method: Método a memorizar
+
+    Returns:
+        Callable: Método envuelto
+    """
+    signature = inspect.signature(method)
+
+    def make_key(self, args, kwargs):
+        # Normalizar argumentos posicionales, con nombre y por defecto
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = tuple((name, _freeze(value)) for name, value in bound.arguments.items() if name != "self")
+        return type(self).__name__, method.__name__, arguments
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        run_cache = getattr(self, "run_cache", None)
+        if run_cache is None:
+            return method(self, *args, **kwargs)
+        return run_cache.get_or_call(make_key(self, args, kwargs), method, self, *args, **kwargs)
+
+    def invalidate(self, *args, **kwargs):
+        run_cache = getattr(self, "run_cache", None)
+        if run_cache is not None:
+            run_cache.invalidate(make_key(self, args, kwargs))
+
+    wrapper.invalidate = invalidate
+    return wrapper
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import gzip
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+try:
+    import msgpack
+except ImportError:  # msgpack es opcional
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard es opcional
+    zstandard = None
+
+# Formato con el que se guardan los datos por defecto (json, json-gz, msgpack o msgpack-zstd)
+DEFAULT_FORMAT = os.getenv("STORAGE_FORMAT", "json")
+
+
+class JSONBackend:
+    """
+    JSON legible con sangría (el formato original de data/)
+    """
+    name = "json"
+    extension = ".json"
+
+    def dumps(self, data: Any) -> bytes:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+    def loads(self, payload: bytes) -> Any:
+        return json.loads(payload.decode("utf-8"))
+
+
+class CompactJSONBackend(JSONBackend):
+    """
+    JSON sin espacios comprimido con gzip
+    """
+    name = "json-gz"
+    extension = ".json.gz"
+
+    def dumps(self, data: Any) -> bytes:
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return gzip.compress(payload, compresslevel=6)
+
+    def loads(self, payload: bytes) -> Any:
+        return json.loads(gzip.decompress(payload).decode("utf-8"))
+
+
+class MsgpackBackend:
+    """
+    MessagePack binario (requiere el paquete msgpack)
+    """
+    name = "msgpack"
+    extension = ".msgpack"
+
+    def dumps(self, data: Any) -> bytes:
+        return msgpack.packb(data, use_bin_type=True)
+
+    def loads(self, payload: bytes) -> Any:
+        return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+
+
+class MsgpackZstdBackend(MsgpackBackend):
+    """
+    MessagePack comprimido con zstd (requiere msgpack y zstandard)
+    """
+    name = "msgpack-zstd"
+    extension = ".msgpack.zst"
+
+    def dumps(self, data: Any) -> bytes:
+        return zstandard.ZstdCompressor(level=6).compress(super().dumps(data))
+
+    def loads(self, payload: bytes) -> Any:
+        return super().loads(zstandard.ZstdDecompressor().decompress(payload))
+
+
+def available_backends() -> Dict[str, Any]:
+    """
+    Backends que se pueden usar con las dependencias instaladas
+
+    Returns:
+        dict: Nombre del formato -> backend
+    """
+    backends = {"json": JSONBackend(), "json-gz": CompactJSONBackend()}
+    if msgpack is not None:
+        backends["msgpack"] = MsgpackBackend()
+        if zstandard is not None:
+            backends["msgpack-zstd"] = MsgpackZstdBackend()
+    return backends
+
+
+def get_backend(name: Optional[str] = None):
+    """
+    Obtiene el backend de un formato
+
+    Si el formato necesita una dependencia que no está instalada se usa JSON
+    comprimido con gzip.
+
+    Args:
+        name: Nombre del formato (por defecto STORAGE_FORMAT o "json")
+
+    Returns:
+        Backend de serialización
+    """
+    name = (name or DEFAULT_FORMAT).lower()
+    backends = available_backends()
+    if name in backends:
+        return backends[name]
+    if name in ("msgpack", "msgpack-zstd"):
+        print(f"⚠️ El formato {name} necesita msgpack/zstandard instalados, se usa json-gz")
+        return backends["json-gz"]
+    print(f"⚠️ Formato de almacenamiento desconocido: {name}, se usa json")
+    return backends["json"]
+
+
+# Extensiones reconocidas por el lector (las más largas primero)
+KNOWN_EXTENSIONS = [".msgpack.zst", ".json.gz", ".msgpack", ".json"]
+
+
+def _backend_for_extension(extension: str):
+    for backend in (MsgpackZstdBackend(), CompactJSONBackend(), MsgpackBackend(), JSONBackend()):
+        if backend.extension == extension:
+            return backend
+    return None
+
+
+def split_extension(path: str):
+    """
+    Separa la ruta base y la extensión de un documento guardado
+
+    Args:
+        path: Ruta del fichero
+
+    Returns:
+        tuple: (ruta sin extensión, extensión) o (path, "") si no es un formato conocido
+    """
+    for extension in KNOWN_EXTENSIONS:
+        if path.endswith(extension):
+            return path[:-len(extension)], extension
+    return path, ""
+
+
+def existing_paths(base_path: str) -> List[str]:
+    """
+    Ficheros existentes de un documento en cualquiera de los formatos
+
+    Args:
+        base_path: Ruta del documento sin extensión
+
+    Returns:
+        list: Rutas existentes
+    """
+    return [base_path + ext for ext in KNOWN_EXTENSIONS if os.path.exists(base_path + ext)]
+
+
+def read_document(base_path: str, backend=None) -> Optional[Any]:
+    """
+    Lee un documento guardado en cualquier formato, incluido el JSON original
+
+    Args:
+        base_path: Ruta del documento sin extensión
+        backend: Backend preferido (se prueba primero su extensión)
+
+    Returns:
+        Datos del documento o None si no existe
+    """
+    extensions = list(KNOWN_EXTENSIONS)
+    if backend is not None:
+        extensions.remove(backend.extension)
+        extensions.insert(0, backend.extension)
+    for extension in extensions:
+        path = base_path + extension
+        if not os.path.exists(path):
+            continue
+        reader = backend if backend is not None and backend.extension == extension else _backend_for_extension(extension)
+        if reader is None or (isinstance(reader, MsgpackBackend) and msgpack is None) \
+                or (isinstance(reader, MsgpackZstdBackend) and zstandard is None):
+            print(f"⚠️ No se puede leer {path}: falta la dependencia de su formato")
+            continue
+        with open(path, "rb") as f:
+            return reader.loads(f.read())
+    return None
+
+
+def write_document(base_path: str, data: Any, backend=None) -> str:
+    """
+    Guarda un documento con el backend indicado y elimina sus copias en otros formatos
+
+    La escritura se hace en un fichero temporal que después se renombra, de
+    forma que un lector nunca ve un documento a medio escribir.
+
+    Args:
+        base_path: Ruta del documento sin extensión
+        data: Datos a guardar
+        backend: Backend de serialización (por defecto el de STORAGE_FORMAT)
+
+    Returns:
+        str: Ruta del fichero guardado
+    """
+    backend = backend or get_backend()
+    path = base_path + backend.extension
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(backend.dumps(data))
+    os.replace(tmp_path, path)
+
+    # No dejar versiones antiguas en otro formato que el lector pudiera preferir
+    for other in existing_paths(base_path):
+        if other != path:
+            try:
+                os.remove(other)
+            except OSError:
+                pass
+    return path
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Zonas del campo según la coordenada X (y la Y para el área pequeña)
+ZONE_NAMES = np.array(["six_yard_box", "penalty_area", "edge_of_box", "long_range", "very_long_range"])
+
+# Nombres de situación de Understat -> nombres usados en los informes
+SITUATION_LABELS = {
+    "OpenPlay": "Open Play",
+    "FromCorner": "From corner",
+    "SetPiece": "Set piece",
+    "DirectFreekick": "Set piece"
+}
+
+
+def flatten_shots(shots: Any) -> List[Dict[str, Any]]:
+    """
+    Convierte cualquier forma de shotsData de Understat en una lista de remates
+
+    En la página de un partido shotsData es {"h": [...], "a": [...]} y en la de
+    un equipo puede venir agrupado por jugador.
+
+    Args:
+        shots: shotsData tal como lo devuelve Understat
+
+    Returns:
+        list: Remates como diccionarios
+    """
+    if not shots:
+        return []
+    if isinstance(shots, list):
+        return shots
+    if isinstance(shots, dict):
+        flat = []
+        for group in shots.values():
+            if isinstance(group, list):
+                flat.extend(group)
+        return flat
+    return []
+
+
+def _float_column(values: List[Any]) -> np.ndarray:
+    """Convierte una columna de texto/números a float, con NaN donde no hay valor válido"""
+    try:
+        # NumPy convierte de una vez tanto números como textos numéricos ("0.85")
+        return np.asarray(values, dtype=float).reshape(-1)
+    except (TypeError, ValueError):
+        pass
+    column = np.empty(len(values), dtype=float)
+    for i, value in enumerate(values):
+        try:
+            column[i] = float(value)
+        except (TypeError, ValueError):
+            column[i] = np.nan
+    return column
+
+
+class ShotTable:
+    """
+    Remates de Understat en columnas tipadas de NumPy
+
+    Los remates se cargan una sola vez (X, Y, xG, minuto, situación, resultado,
+    jugador y partido) y las clasificaciones y agregaciones se calculan como
+    operaciones vectorizadas sobre las columnas.
+    """
+
+    def __init__(self, shots: Any = None):
+        """
+        Args:
+            shots: Lista de remates o shotsData de Understat (opcional)
+        """
+        records = flatten_shots(shots)
+        self.X = _float_column([s.get("X") for s in records])
+        self.Y = _float_column([s.get("Y") for s in records])
+        self.xG = np.nan_to_num(_float_column([s.get("xG") for s in records]))
+        self.minute = _float_column([s.get("minute") for s in records])
+        self.situation = np.array([s.get("situation") or "Unknown" for s in records], dtype=object)
+        self.result = np.array([s.get("result") or "Unknown" for s in records], dtype=object)
+        self.player = np.array([s.get("player") for s in records], dtype=object)
+        self.match_id = np.array([s.get("match_id") for s in records], dtype=object)
+
+    def __len__(self):
+        return len(self.xG)
+
+    @property
+    def is_goal(self) -> np.ndarray:
+        """Máscara booleana de los remates que acabaron en gol"""
+        return self.result == "Goal"
+
+    def zones(self) -> np.ndarray:
+        """
+        Clasifica cada remate en una zona del campo
+
+        Returns:
+            np.ndarray: Nombre de la zona de cada remate
+        """
+        x = np.nan_to_num(self.X, nan=0.0)
+        y = np.nan_to_num(self.Y, nan=0.0)
+        conditions = [
+            (x >= 0.8) & (y >= 0.4) & (y <= 0.6),
+            x >= 0.8,
+            x >= 0.6,
+            x >= 0.4
+        ]
+        index = np.select(conditions, [0, 1, 2, 3], default=4)
+        return ZONE_NAMES[index]
+
+    @staticmethod
+    def _count(values: np.ndarray) -> Dict[str, int]:
+        """Cuenta las apariciones de cada valor conservando el orden de primera aparición"""
+        if not len(values):
+            return {}
+        labels, first_seen, counts = np.unique(values.astype(str), return_index=True, return_counts=True)
+        order = np.argsort(first_seen)
+        return {str(labels[i]): int(counts[i]) for i in order}
+
+    def zone_counts(self) -> Dict[str, int]:
+        """Número de remates por zona del campo"""
+        return self._count(self.zones())
+
+    def situation_counts(self, goals_only: bool = False) -> Dict[str, int]:
+        """
+        Número de remates (o goles) por situación de juego
+
+        Args:
+            goals_only: Contar solo los remates que acabaron en gol
+
+        Returns:
+            dict: Situación -> número de remates
+        """
+        situations = self.situation[self.is_goal] if goals_only else self.situation
+        return self._count(situations)
+
+    def situation_summary(self, labels: Optional[Dict[str, str]] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Agrega remates, goles y xG por situación de juego
+
+        Args:
+            labels: Renombrado de situaciones (por defecto SITUATION_LABELS)
+
+        Returns:
+            dict: Situación -> {"shots", "goals", "xG"}
+        """
+        if not len(self):
+            return {}
+        labels = SITUATION_LABELS if labels is None else labels
+        situations = np.array([labels.get(s, s) for s in self.situation], dtype=object).astype(str)
+        names, inverse = np.unique(situations, return_inverse=True)
+        shots = np.bincount(inverse, minlength=len(names))
+        goals = np.bincount(inverse, weights=self.is_goal.astype(float), minlength=len(names))
+        xg = np.bincount(inverse, weights=self.xG, minlength=len(names))
+        return {
+            str(name): {"shots": int(shots[i]), "goals": int(goals[i]), "xG": float(xg[i])}
+            for i, name in enumerate(names)
+        }
+
+    def patterns(self) -> Dict[str, Dict[str, int]]:
+        """
+        Patrones de tiro: zonas, situaciones de los goles y situaciones de todos los remates
+
+        Returns:
+            dict: shot_locations, goal_patterns y play_patterns
+        """
+        return {
+            "shot_locations": self.zone_counts(),
+            "goal_patterns": self.situation_counts(goals_only=True),
+            "play_patterns": self.situation_counts()
+        }
+
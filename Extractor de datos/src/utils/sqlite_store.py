@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+# Base de datos por defecto dentro de data/
+DEFAULT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "football.db"
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    match_key TEXT PRIMARY KEY,
+    fixture_id INTEGER,
+    date TEXT,
+    season INTEGER,
+    league_id INTEGER,
+    league_name TEXT,
+    round TEXT,
+    home_team_id INTEGER,
+    home_team_name TEXT,
+    away_team_id INTEGER,
+    away_team_name TEXT,
+    status TEXT,
+    venue TEXT,
+    referee TEXT,
+    travel_distance_km REAL,
+    updated_at TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_matches_date ON matches(date);
+CREATE INDEX IF NOT EXISTS idx_matches_home ON matches(home_team_id, date);
+CREATE INDEX IF NOT EXISTS idx_matches_away ON matches(away_team_id, date);
+CREATE INDEX IF NOT EXISTS idx_matches_league ON matches(league_id, season, date);
+CREATE INDEX IF NOT EXISTS idx_matches_referee ON matches(referee, date);
+CREATE INDEX IF NOT EXISTS idx_matches_fixture ON matches(fixture_id);
+
+CREATE TABLE IF NOT EXISTS teams (
+    team_id INTEGER PRIMARY KEY,
+    name TEXT,
+    updated_at TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_teams_name ON teams(name);
+
+CREATE TABLE IF NOT EXISTS players (
+    team_id INTEGER NOT NULL,
+    player_id TEXT NOT NULL,
+    name TEXT,
+    position TEXT,
+    updated_at TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (team_id, player_id)
+);
+CREATE INDEX IF NOT EXISTS idx_players_name ON players(name);
+
+CREATE TABLE IF NOT EXISTS fixtures (
+    fixture_id INTEGER PRIMARY KEY,
+    date TEXT,
+    season INTEGER,
+    league_id INTEGER,
+    round TEXT,
+    home_team_id INTEGER,
+    away_team_id INTEGER,
+    home_goals INTEGER,
+    away_goals INTEGER,
+    status TEXT,
+    referee TEXT,
+    updated_at TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_fixtures_date ON fixtures(date);
+CREATE INDEX IF NOT EXISTS idx_fixtures_home ON fixtures(home_team_id, date);
+CREATE INDEX IF NOT EXISTS idx_fixtures_away ON fixtures(away_team_id, date);
+CREATE INDEX IF NOT EXISTS idx_fixtures_league ON fixtures(league_id, season, date);
+CREATE INDEX IF NOT EXISTS idx_fixtures_referee ON fixtures(referee, date);
+
+CREATE TABLE IF NOT EXISTS h2h (
+    team_a INTEGER NOT NULL,
+    team_b INTEGER NOT NULL,
+    fixture_id INTEGER NOT NULL,
+    date TEXT,
+    PRIMARY KEY (team_a, team_b, fixture_id)
+);
+CREATE INDEX IF NOT EXISTS idx_h2h_pair_date ON h2h(team_a, team_b, date);
+"""
+
+FIXTURE_INSERT = "INSERT OR REPLACE INTO fixtures VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)"
+
+
+def _season_for_date(date_str: Optional[str]) -> Optional[int]:
+    """Temporada (año de inicio) de una fecha YYYY-MM-DD"""
+    try:
+        match_date = datetime.strptime(str(date_str)[:10], "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+    return match_date.year - 1 if match_date.month < 7 else match_date.year
+
+
+class SQLiteStore:
+    """
+    Almacén indexado opcional de partidos, equipos, jugadores, fixtures y H2H
+
+    Las columnas indexadas permiten consultar por equipo, liga, temporada,
+    árbitro o rango de fechas sin recorrer data/; el documento original se
+    guarda completo en la columna payload. Cada hilo usa su propia conexión y
+    cada escritura es una transacción.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Args:
+            db_path: Ruta de la base de datos (por defecto data/football.db)
+        """
+        self.db_path = db_path or DEFAULT_DB_PATH
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._local = threading.local()
+        with self.transaction() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        Ejecuta un bloque de escrituras como una única transacción
+
+        Yields:
+            sqlite3.Connection: Conexión del hilo actual
+        """
+        conn = self._connection()
+        with conn:
+            yield conn
+
+    def _write(self, statements: List[tuple]) -> bool:
+        """
+        Ejecuta varias sentencias (sql, filas) en una transacción
+
+        Un error de la base de datos no interrumpe la extracción: la
+        transacción se deshace y se informa por consola.
+
+        Returns:
+            bool: True si se guardó todo
+        """
+        try:
+            with self.transaction() as conn:
+                for sql, rows in statements:
+                    conn.executemany(sql, rows)
+            return True
+        except sqlite3.Error as e:
+            print(f"⚠️ Error al escribir en {self.db_path}: {e}")
+            return False
+
+    @staticmethod
+    def _dumps(data: Any) -> str:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now().isoformat()
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def save_match(self, match_key: str, data: Dict[str, Any]) -> bool:
+        """
+        Guarda un partido optimizado (salida de DataProcessor.optimize_match_data)
+
+        Args:
+            match_key: Clave del partido (nombre de su fichero en data/matches)
+            data: Datos del partido
+
+        Returns:
+            bool: True si se guardó correctamente
+        """
+        info = data.get("match_info") or {}
+        league = info.get("league") or {}
+        referee = data.get("referee") or {}
+        venue = data.get("venue") or {}
+        row = (
+            match_key, info.get("fixture_id"), info.get("date"), _season_for_date(info.get("date")),
+            league.get("id"), league.get("name"), league.get("round"),
+            info.get("team1_id"), info.get("team1_name"), info.get("team2_id"), info.get("team2_name"),
+            info.get("status"), venue.get("name"), referee.get("name"), data.get("travel_distance_km"),
+            self._now(), self._dumps(data)
+        )
+        return self._write([("INSERT OR REPLACE INTO matches VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)", [row])])
+
+    def save_team(self, team_id: Any, data: Dict[str, Any]) -> bool:
+        """
+        Guarda los datos de un equipo
+
+        Args:
+            team_id: ID del equipo
+            data: Datos del equipo
+
+        Returns:
+            bool: True si se guardó correctamente
+        """
+        name = data.get("name") or (data.get("team") or {}).get("name")
+        return self._write([("INSERT OR REPLACE INTO teams VALUES (?,?,?,?)",
+                             [(team_id, name, self._now(), self._dumps(data))])])
+
+    def save_players(self, team_id: Any, players: Iterable[Dict[str, Any]]) -> bool:
+        """
+        Guarda la plantilla de un equipo en una sola transacción
+
+        Args:
+            team_id: ID del equipo
+            players: Jugadores con id y name (o player_name)
+
+        Returns:
+            bool: True si se guardó correctamente
+        """
+        now = self._now()
+        rows = [
+            (team_id, str(p.get("id")), p.get("name") or p.get("player_name"), p.get("position"), now, self._dumps(p))
+            for p in players if isinstance(p, dict) and p.get("id") is not None
+        ]
+        return self._write([("INSERT OR REPLACE INTO players VALUES (?,?,?,?,?,?)", rows)])
+
+    @staticmethod
+    def _fixture_row(fixture: Dict[str, Any], now: str, payload: str):
+        info = fixture.get("fixture") or {}
+        league = fixture.get("league") or {}
+        teams = fixture.get("teams") or {}
+        goals = fixture.get("goals") or {}
+        date = (info.get("date") or "")[:10] or None
+        return (
+            info.get("id"), date, league.get("season") or _season_for_date(date), league.get("id"),
+            league.get("round"), (teams.get("home") or {}).get("id"), (teams.get("away") or {}).get("id"),
+            goals.get("home"), goals.get("away"), (info.get("status") or {}).get("short"),
+            info.get("referee"), now, payload
+        )
+
+    def save_fixtures(self, fixtures: Iterable[Dict[str, Any]]) -> bool:
+        """
+        Guarda partidos en el formato de /fixtures de API-Football
+
+        Args:
+            fixtures: Partidos de la respuesta de la API
+
+        Returns:
+            bool: True si se guardó correctamente
+        """
+        now = self._now()
+        rows = [self._fixture_row(f, now, self._dumps(f)) for f in fixtures
+                if isinstance(f, dict) and (f.get("fixture") or {}).get("id")]
+        if not rows:
+            return True
+        return self._write([(FIXTURE_INSERT, rows)])
+
+    def save_h2h(self, team1_id: Any, team2_id: Any, fixtures: Iterable[Dict[str, Any]]) -> bool:
+        """
+        Guarda los enfrentamientos directos entre dos equipos y sus partidos
+
+        Args:
+            team1_id: ID de un equipo
+            team2_id: ID del otro equipo
+            fixtures: Partidos entre ambos en el formato de /fixtures
+
+        Returns:
+            bool: True si se guardó correctamente
+        """
+        fixtures = [f for f in fixtures if isinstance(f, dict) and (f.get("fixture") or {}).get("id")]
+        if not fixtures:
+            return True
+        team_a, team_b = sorted((int(team1_id), int(team2_id)))
+        now = self._now()
+        return self._write([
+            (FIXTURE_INSERT, [self._fixture_row(f, now, self._dumps(f)) for f in fixtures]),
+            ("INSERT OR REPLACE INTO h2h VALUES (?,?,?,?)", [
+                (team_a, team_b, f["fixture"]["id"], (f["fixture"].get("date") or "")[:10] or None)
+                for f in fixtures
+            ])
+        ])
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _rows(cursor, include_payload: bool) -> List[Dict[str, Any]]:
+        rows = []
+        for row in cursor.fetchall():
+            item = dict(row)
+            payload = item.pop("payload", None)
+            if include_payload and payload is not None:
+                item["payload"] = json.loads(payload)
+            rows.append(item)
+        return rows
+
+    def _query(self, table: str, filters: List[tuple], order_by: str, limit: Optional[int],
+               include_payload: bool) -> List[Dict[str, Any]]:
+        clauses = [clause for clause, _ in filters]
+        params = [value for _, values in filters for value in values]
+        sql = f"SELECT * FROM {table}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order_by}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return self._rows(self._connection().execute(sql, params), include_payload)
+
+    @staticmethod
+    def _common_filters(team_id=None, league_id=None, season=None, referee=None, from_date=None, to_date=None):
+        filters = []
+        if team_id is not None:
+            filters.append(("(home_team_id = ? OR away_team_id = ?)", (team_id, team_id)))
+        if league_id is not None:
+            filters.append(("league_id = ?", (league_id,)))
+        if season is not None:
+            filters.append(("season = ?", (int(season),)))
+        if referee:
+            filters.append(("referee = ?", (referee,)))
+        if from_date:
+            filters.append(("date >= ?", (from_date,)))
+        if to_date:
+            filters.append(("date <= ?", (to_date,)))
+        return filters
+
+    def get_match(self, match_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene un partido guardado por su clave
+
+        Args:
+            match_key: Clave del partido
+
+        Returns:
+            dict: Datos del partido o None si no existe
+        """
+        row = self._connection().execute("SELECT payload FROM matches WHERE match_key = ?", (match_key,)).fetchone()
+        return json.loads(row["payload"]) if row else None
+
+    def find_matches(self, team_id=None, league_id=None, season=None, referee=None, from_date=None,
+                     to_date=None, limit=None, include_payload=False) -> List[Dict[str, Any]]:
+        """
+        Busca partidos guardados usando los índices
+
+        Args:
+            team_id: ID de un equipo (local o visitante)
+            league_id: ID de la liga
+            season: Temporada (año de inicio)
+            referee: Nombre del árbitro
+            from_date: Fecha mínima (YYYY-MM-DD)
+            to_date: Fecha máxima (YYYY-MM-DD)
+            limit: Número máximo de resultados
+            include_payload: Incluir el documento completo de cada partido
+
+        Returns:
+            list: Partidos ordenados por fecha
+        """
+        filters = self._common_filters(team_id, league_id, season, referee, from_date, to_date)
+        return self._query("matches", filters, "date, match_key", limit, include_payload)
+
+    def find_fixtures(self, team_id=None, league_id=None, season=None, referee=None, from_date=None,
+                      to_date=None, status=None, limit=None, include_payload=False) -> List[Dict[str, Any]]:
+        """
+        Busca fixtures de API-Football guardados usando los índices
+
+        Args:
+            team_id: ID de un equipo (local o visitante)
+            league_id: ID de la liga
+            season: Temporada (año de inicio)
+            referee: Nombre del árbitro tal como lo da la API
+            from_date: Fecha mínima (YYYY-MM-DD)
+            to_date: Fecha máxima (YYYY-MM-DD)
+            status: Estado corto del partido (ej. "FT")
+            limit: Número máximo de resultados
+            include_payload: Incluir la respuesta completa de cada fixture
+
+        Returns:
+            list: Fixtures ordenados por fecha
+        """
+        filters = self._common_filters(team_id, league_id, season, referee, from_date, to_date)
+        if status:
+            filters.append(("status = ?", (status,)))
+        return self._query("fixtures", filters, "date, fixture_id", limit, include_payload)
+
+    def get_h2h(self, team1_id: Any, team2_id: Any, limit=None, include_payload=False) -> List[Dict[str, Any]]:
+        """
+        Enfrentamientos directos guardados entre dos equipos, del más reciente al más antiguo
+
+        Args:
+            team1_id: ID de un equipo
+            team2_id: ID del otro equipo
+            limit: Número máximo de partidos
+            include_payload: Incluir la respuesta completa de cada fixture
+
+        Returns:
+            list: Fixtures entre ambos equipos
+        """
+        team_a, team_b = sorted((int(team1_id), int(team2_id)))
+        sql = ("SELECT f.* FROM h2h h JOIN fixtures f ON f.fixture_id = h.fixture_id "
+               "WHERE h.team_a = ? AND h.team_b = ? ORDER BY h.date DESC")
+        params = [team_a, team_b]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return self._rows(self._connection().execute(sql, params), include_payload)
+
+    def get_team(self, team_id: Any) -> Optional[Dict[str, Any]]:
+        """Datos guardados de un equipo o None"""
+        row = self._connection().execute("SELECT payload FROM teams WHERE team_id = ?", (team_id,)).fetchone()
+        return json.loads(row["payload"]) if row else None
+
+    def get_players(self, team_id: Any, include_payload=False) -> List[Dict[str, Any]]:
+        """Jugadores guardados de un equipo ordenados por nombre"""
+        return self._query("players", [("team_id = ?", (team_id,))], "name", None, include_payload)
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# Duración máxima de un partido en segundos: un partido que empezó antes de
+# (descarga - MATCH_WINDOW) ya estaba terminado cuando se descargó la clasificación
+MATCH_WINDOW_SECONDS = 3 * 3600
+
+# Estados con los que un partido cambia la clasificación
+STANDINGS_FINISHED_STATUSES = ("FT", "AET", "PEN")
+
+
+def standings_row(team_standing: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Datos de un equipo en la clasificación que se guardan en el partido optimizado
+
+    Args:
+        team_standing: Fila de la clasificación de /standings
+
+    Returns:
+        dict: rank, points, form y goals_diff
+    """
+    return {
+        "rank": team_standing.get("rank"),
+        "points": team_standing.get("points"),
+        "form": team_standing.get("form"),
+        "goals_diff": team_standing.get("goalsDiff")
+    }
+
+
+def _kickoff(fixture_info: Dict[str, Any]) -> Optional[float]:
+    if fixture_info.get("timestamp"):
+        return float(fixture_info["timestamp"])
+    try:
+        return datetime.fromisoformat(str(fixture_info.get("date"))).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class StandingsTable:
+    """
+    Clasificación de una liga y temporada con un índice por ID de equipo
+    """
+
+    def __init__(self, data: Dict[str, Any], league_id: Any = None, season: Any = None,
+                 round_name: Optional[str] = None, fetched_at: Optional[float] = None):
+        """
+        Args:
+            data: Respuesta de /standings
+            league_id: Liga de la que se indexan las filas (None = todas las de la respuesta)
+            season: Temporada de la clasificación
+            round_name: Última jornada terminada que se ha visto de la liga
+            fetched_at: Momento en que se descargó la respuesta (por defecto ahora)
+        """
+        self.data = data
+        self.league_id = league_id
+        self.season = season
+        self.round = round_name
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        self.rows = {}  # ID de equipo -> fila de la clasificación
+        for league_data in (data or {}).get("response") or []:
+            league = league_data.get("league") or {}
+            if league_id is not None and str(league.get("id")) != str(league_id):
+                continue
+            for group in league.get("standings") or []:
+                for team_standing in group:
+                    team_id = (team_standing.get("team") or {}).get("id")
+                    if team_id is not None:
+                        self.rows.setdefault(str(team_id), team_standing)
+
+    def row(self, team_id: Any) -> Optional[Dict[str, Any]]:
+        """
+        Fila de un equipo en la clasificación
+
+        Args:
+            team_id: ID del equipo
+
+        Returns:
+            dict: Fila de /standings o None si el equipo no está
+        """
+        return self.rows.get(str(team_id))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+class StandingsCache:
+    """
+    Clasificaciones compartidas por todos los partidos de una liga
+
+    Cada (liga, temporada) se descarga e indexa una sola vez, y la tabla se
+    reutiliza hasta que se ve terminar un partido nuevo de esa liga (en
+    cualquier respuesta de /fixtures): entonces se descarta y la siguiente
+    consulta la vuelve a descargar. Si el partido se ve antes de cargar la
+    tabla y la copia cacheada de /standings es anterior, también se descarga
+    de nuevo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._tables = {}      # (liga, temporada) -> StandingsTable
+        self._stale = set()    # (liga, temporada) cuya respuesta cacheada hay que descartar
+        self._finished = {}    # (liga, temporada) -> IDs de partidos terminados ya vistos
+        self._rounds = {}      # (liga, temporada) -> última jornada terminada vista
+        self._last_finish = {}  # (liga, temporada) -> (inicio del último partido terminado, cuándo se vio)
+
+    @staticmethod
+    def _key(league_id: Any, season: Any):
+        return str(league_id), str(season)
+
+    def _key_lock(self, key) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _predates_finish(self, key, fetched_at: Optional[float]) -> bool:
+        """True si una clasificación descargada en fetched_at puede no incluir el último partido terminado"""
+        last_finish = self._last_finish.get(key)
+        if last_finish is None or fetched_at is None:
+            return False
+        kickoff, seen_at = last_finish
+        return fetched_at < seen_at and fetched_at < kickoff + MATCH_WINDOW_SECONDS
+
+    def get(self, league_id: Any, season: Any,
+            fetch: Callable[[bool], Tuple[Optional[Dict[str, Any]], Optional[float]]]) -> Optional[StandingsTable]:
+        """
+        Clasificación de una liga, descargándola solo si no hay una vigente
+
+        Args:
+            league_id: ID de la liga
+            season: Temporada
+            fetch: Función que descarga /standings; recibe True si la copia
+                cacheada de la respuesta ya no es válida y devuelve la
+                respuesta y el momento en que se descargó (puede ser una
+                copia de la caché en disco de hace horas)
+
+        Returns:
+            StandingsTable: Clasificación indexada o None si no se pudo obtener
+        """
+        key = self._key(league_id, season)
+        with self._lock:
+            table = self._tables.get(key)
+        if table is not None:
+            return table
+
+        with self._key_lock(key):
+            with self._lock:
+                table = self._tables.get(key)
+                stale = key in self._stale
+            if table is not None:
+                return table
+            data, fetched_at = fetch(stale)
+            if not stale:
+                with self._lock:
+                    stale = self._predates_finish(key, fetched_at)
+                if stale:
+                    # Copia cacheada anterior a un partido que terminó antes de cargar la tabla
+                    data, fetched_at = fetch(True)
+            if not data or not data.get("response"):
+                return None
+            table = StandingsTable(data, league_id, season, self._rounds.get(key), fetched_at)
+            with self._lock:
+                self._tables[key] = table
+                self._stale.discard(key)
+            return table
+
+    def observe_fixtures(self, fixtures: Iterable[Dict[str, Any]]) -> int:
+        """
+        Revisa partidos recibidos y descarta las clasificaciones que hayan cambiado
+
+        Args:
+            fixtures: Partidos en el formato de /fixtures
+
+        Returns:
+            int: Clasificaciones descartadas
+        """
+        invalidated = 0
+        with self._lock:
+            for fixture in fixtures or []:
+                info = fixture.get("fixture") or {}
+                league = fixture.get("league") or {}
+                if info.get("id") is None or league.get("id") is None \
+                        or (info.get("status") or {}).get("short") not in STANDINGS_FINISHED_STATUSES:
+                    continue
+                key = self._key(league["id"], league.get("season"))
+                finished = self._finished.setdefault(key, set())
+                if info["id"] in finished:
+                    continue
+                finished.add(info["id"])
+                if league.get("round"):
+                    self._rounds[key] = league["round"]
+
+                # Solo cuenta si pudo terminar después de descargar la clasificación
+                table = self._tables.get(key)
+                kickoff = _kickoff(info)
+                if kickoff is not None:
+                    self._last_finish[key] = (max(kickoff, self._last_finish.get(key, (0, 0))[0]), time.time())
+                if table is None and kickoff is None:
+                    self._stale.add(key)
+                elif table is not None and (kickoff is None or kickoff >= table.fetched_at - MATCH_WINDOW_SECONDS):
+                    del self._tables[key]
+                    self._stale.add(key)
+                    invalidated += 1
+        return invalidated
+
+    def table_for(self, data: Optional[Dict[str, Any]], league_id: Any) -> Optional[StandingsTable]:
+        """
+        Tabla indexada de una respuesta de /standings
+
+        Si la respuesta es la de una tabla cacheada se reutiliza su índice;
+        si no (ej. un partido cargado de disco) se indexa una vez.
+
+        Args:
+            data: Respuesta de /standings
+            league_id: ID de la liga
+
+        Returns:
+            StandingsTable: Tabla indexada o None si no hay datos
+        """
+        if not data or "response" not in data:
+            return None
+        with self._lock:
+            for table in self._tables.values():
+                if table.data is data and str(table.league_id) == str(league_id):
+                    return table
+        return StandingsTable(data, league_id)
+
+
+# Caché compartida por todos los clientes del proceso
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_standings_cache() -> StandingsCache:
+    """
+    Devuelve la caché de clasificaciones compartida del proceso
+
+    Returns:
+        StandingsCache: Caché compartida
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = StandingsCache()
+        return _shared_cache
@@ -2,24 +2,38 @@
 # -*- coding: utf-8 -*-
 
 import os
-import json
 from datetime import datetime
 import time
 import uuid
 
+from src.utils.serialization import (get_backend, read_document, write_document,
+                                     split_extension, existing_paths, KNOWN_EXTENSIONS)
+from src.utils.file_lock import file_lock
+from src.utils.lazy_document import LazyDocument
+
 class LocalStorage:
     """
-    Clase para gestionar el almacenamiento local de datos en formato JSON
+    Clase para gestionar el almacenamiento local de datos
+    
+    El formato de los ficheros lo decide un backend de serialización (JSON,
+    JSON comprimido o MessagePack, ver STORAGE_FORMAT); la lectura reconoce
+    cualquiera de ellos, incluidos los ficheros JSON antiguos. Si se indica un
+    índice (SQLiteStore), cada partido, equipo y plantilla guardados se
+    registran también en él.
     """
     
-    def __init__(self, data_dir="data"):
+    def __init__(self, data_dir="data", storage_format=None, index=None):
         """
         Inicializa el almacenamiento local
         
         Args:
             data_dir (str): Directorio donde se guardarán los datos
+            storage_format (str): Formato de los ficheros (por defecto STORAGE_FORMAT o "json")
+            index (SQLiteStore): Almacén indexado donde replicar los datos (opcional)
         """
         self.data_dir = data_dir
+        self.backend = get_backend(storage_format)
+        self.index = index
         os.makedirs(data_dir, exist_ok=True)
         os.makedirs(os.path.join(data_dir, "matches"), exist_ok=True)
         os.makedirs(os.path.join(data_dir, "teams"), exist_ok=True)
@@ -38,19 +52,28 @@ class LocalStorage:
         # Añadir timestamp
         data["timestamp"] = datetime.now().isoformat()
         
-        # Sanitizar nombre de archivo
-        filename = match_key.replace(" ", "_").lower()
-        filename = ''.join(c for c in filename if c.isalnum() or c in ['_', '-'])
-        
-        # Ruta completa del archivo
-        file_path = os.path.join(self.data_dir, "matches", f"{filename}.json")
-        
         # Guardar datos
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        filename = self.match_filename(match_key)
+        file_path = self._write(os.path.join(self.data_dir, "matches", filename), data)
+        if self.index is not None:
+            self.index.save_match(filename, data)
             
         print(f"Datos guardados en: {file_path}")
         return file_path
+    
+    @staticmethod
+    def match_filename(match_key):
+        """
+        Nombre de fichero (sin extensión) de un partido
+        
+        Args:
+            match_key (str): Clave del partido (ej. "Bologna-Napoli-2025-04-07")
+            
+        Returns:
+            str: Clave en minúsculas, con "_" en lugar de espacios y sin otros signos
+        """
+        filename = match_key.replace(" ", "_").lower()
+        return ''.join(c for c in filename if c.isalnum() or c in ['_', '-'])
         
     def load_match_data(self, match_key):
         """
@@ -62,27 +85,51 @@ class LocalStorage:
         Returns:
             dict: Datos del partido o None si no existe
         """
-        # Sanitizar nombre de archivo
-        filename = match_key.replace(" ", "_").lower()
-        filename = ''.join(c for c in filename if c.isalnum() or c in ['_', '-'])
-        
-        # Ruta completa del archivo
-        file_path = os.path.join(self.data_dir, "matches", f"{filename}.json")
-        
-        # Verificar si existe el archivo
-        if not os.path.exists(file_path):
-            return None
+        filename = self.match_filename(match_key)
+        if self.index is not None:
+            data = self.index.get_match(filename)
+            if data is not None:
+                return data
+        
+        # Ruta del archivo sin extensión (el formato se detecta al leer)
+        base_path = os.path.join(self.data_dir, "matches", filename)
+        # Versiones anteriores del extractor no quitaban los signos (ej. "st._pauli-...")
+        legacy_path = os.path.join(self.data_dir, "matches", match_key.lower().replace(" ", "_"))
             
         # Cargar datos
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = self._read(base_path)
+            if data is None and legacy_path != base_path:
+                data = self._read(legacy_path)
+                base_path = legacy_path
+            if data is None:
+                return None
                 
-            print(f"Datos cargados desde: {file_path}")
+            print(f"Datos cargados desde: {base_path}")
             return data
         except Exception as e:
             print(f"Error al cargar datos: {str(e)}")
             return None
+    
+    def open_match_data(self, match_key):
+        """
+        Abre los datos de un partido sin decodificarlos completos
+        
+        Args:
+            match_key (str): Clave única para el partido
+            
+        Returns:
+            LazyDocument: Documento de solo lectura o None si no existe
+        """
+        filename = self.match_filename(match_key)
+        legacy_filename = match_key.lower().replace(" ", "_")
+        for name in (filename, legacy_filename):
+            document = self._open(os.path.join(self.data_dir, "matches", name))
+            if document is not None:
+                return document
+        # Partidos que solo están en el almacén indexado
+        data = self.index.get_match(filename) if self.index is not None else None
+        return LazyDocument(data=data) if data is not None else None
             
     def save_team_data(self, team_id, data):
         """
@@ -98,13 +145,10 @@ class LocalStorage:
         # Añadir timestamp
         data["timestamp"] = datetime.now().isoformat()
         
-        # Ruta completa del archivo
-        file_path = os.path.join(self.data_dir, "teams", f"{team_id}.json")
-        
         # Guardar datos
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-            
+        file_path = self._write(os.path.join(self.data_dir, "teams", str(team_id)), data)
+        if self.index is not None:
+            self.index.save_team(team_id, data)
         return file_path
         
     def load_team_data(self, team_id):
@@ -117,22 +161,25 @@ class LocalStorage:
         Returns:
             dict: Datos del equipo o None si no existe
         """
-        # Ruta completa del archivo
-        file_path = os.path.join(self.data_dir, "teams", f"{team_id}.json")
-        
-        # Verificar si existe el archivo
-        if not os.path.exists(file_path):
-            return None
-            
         # Cargar datos
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            return data
+            return self._read(os.path.join(self.data_dir, "teams", str(team_id)))
         except Exception as e:
             print(f"Error al cargar datos del equipo: {str(e)}")
             return None
     
+    def open_team_data(self, team_id):
+        """
+        Abre los datos de un equipo sin decodificarlos completos
+        
+        Args:
+            team_id (int): ID del equipo
+            
+        Returns:
+            LazyDocument: Documento de solo lectura o None si no existe
+        """
+        return self._open(os.path.join(self.data_dir, "teams", str(team_id)))
+    
     def save_team_statistics(self, team_id, league_id, stats_data):
         """
         Guarda las estadísticas de un equipo en una liga específica
@@ -151,17 +198,13 @@ class LocalStorage:
             os.makedirs(stats_folder)
         
         # Generar nombre de archivo
-        filename = f"team_{team_id}_league_{league_id}.json"
-        file_path = os.path.join(stats_folder, filename)
+        filename = f"team_{team_id}_league_{league_id}"
         
         # Añadir timestamp de guardado
         stats_data['timestamp'] = datetime.now().isoformat()
         
-        # Guardar datos en formato JSON
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(stats_data, f, ensure_ascii=False, indent=2)
-        
-        return file_path
+        # Guardar datos
+        return self._write(os.path.join(stats_folder, filename), stats_data)
     
     def load_team_statistics(self, team_id, league_id):
         """
@@ -180,33 +223,35 @@ class LocalStorage:
             return None
         
         # Generar nombre de archivo
-        filename = f"team_{team_id}_league_{league_id}.json"
+        filename = f"team_{team_id}_league_{league_id}"
         file_path = os.path.join(stats_folder, filename)
         
-        # Verificar si existe el archivo
-        if not os.path.exists(file_path):
-            return None
-        
         # Cargar datos
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self._read(file_path)
         except Exception as e:
             print(f"Error al cargar archivo {file_path}: {e}")
             return None
     
     def save_players_data(self, team_id, team_name, players_data):
         """
-        Guarda los datos de los jugadores en archivos separados
+        Guarda la plantilla de un equipo en un único documento
+        
+        Toda la plantilla (índice y datos de cada jugador) se escribe de una vez
+        en players/{team_id}/squad con un fichero temporal que después se
+        renombra, y bajo un lock de fichero, de modo que una interrupción o dos
+        extracciones simultáneas del mismo equipo nunca dejan una plantilla a
+        medias o mezclada.
         
         Args:
             team_id: ID del equipo
             team_name: Nombre del equipo
             players_data: Lista de datos de los jugadores
+            
+        Returns:
+            dict: Índice de jugadores guardado
         """
-        # Crear directorio del equipo si no existe
         team_players_dir = os.path.join(self.data_dir, 'players', str(team_id))
-        os.makedirs(team_players_dir, exist_ok=True)
         
         # Diccionario para almacenar el índice de jugadores
         players_index = {
@@ -214,41 +259,58 @@ class LocalStorage:
             "team_name": team_name,
             "players": []
         }
+        squad = {}
+        
+        # Los jugadores de Understat llegan como diccionario {id: jugador}
+        if isinstance(players_data, dict):
+            players_data = list(players_data.values())
         
-        # Guardar cada jugador en un archivo separado
         for player in players_data:
-            player_id = player.get("id", str(uuid.uuid4()))
-            player_name = player.get("name", "Unknown Player")
-            
-            # Añadir información del equipo
-            player["team_id"] = team_id
-            player["team_name"] = team_name
+            if not player or not isinstance(player, dict):
+                continue
+            player_id = str(player.get("id") or uuid.uuid4())
+            player_name = player.get("name") or player.get("player_name", "Unknown Player")
             
-            # Crear un nombre de archivo seguro
-            filename = f"{player_id}.json"
-            file_path = os.path.join(team_players_dir, filename)
-            
-            # Guardar datos del jugador
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(player, f, ensure_ascii=False, indent=2)
+            # Añadir información del equipo (sin modificar el dato original, que puede estar compartido)
+            player = dict(player, team_id=team_id, team_name=team_name)
+            squad[player_id] = player
             
             # Añadir al índice
             players_index["players"].append({
                 "id": player_id,
                 "name": player_name,
-                "filename": filename,
                 "position": player.get("position", ""),
                 "injured": player.get("injured", False),
                 "likely_starter": player.get("likely_starter", False)
             })
         
-        # Guardar el índice de jugadores
-        index_path = os.path.join(team_players_dir, "index.json")
-        with open(index_path, 'w', encoding='utf-8') as f:
-            json.dump(players_index, f, ensure_ascii=False, indent=2)
+        # Guardar índice y jugadores como una sola unidad
+        with file_lock(os.path.join(team_players_dir, ".lock")):
+            self._write(os.path.join(team_players_dir, "squad"),
+                        dict(players_index, updated_at=datetime.now().isoformat(), squad=squad))
+            self._remove_legacy_player_files(team_players_dir)
+        if self.index is not None:
+            self.index.save_players(team_id, list(squad.values()))
             
         return players_index
     
+    @staticmethod
+    def _remove_legacy_player_files(team_players_dir):
+        """Elimina los ficheros por jugador y el index de versiones anteriores (si quedan)"""
+        if not existing_paths(os.path.join(team_players_dir, "index")):
+            return
+        for entry in os.scandir(team_players_dir):
+            base_path, extension = split_extension(entry.path)
+            if extension and os.path.basename(base_path) != "squad":
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+    
+    def _load_squad(self, team_id):
+        """Documento de plantilla de un equipo (decodificado bajo demanda) o None si no existe"""
+        return self._open(os.path.join(self.data_dir, 'players', str(team_id), "squad"))
+    
     def load_players_data(self, team_id):
         """
         Carga el índice de jugadores para un equipo
@@ -259,13 +321,12 @@ class LocalStorage:
         Returns:
             dict: Índice de jugadores o None si no existe
         """
-        index_path = os.path.join(self.data_dir, 'players', str(team_id), "index.json")
-        
-        if not os.path.exists(index_path):
-            return None
-            
-        with open(index_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        squad = self._load_squad(team_id)
+        if squad is not None:
+            with squad:
+                return {key: squad[key] for key in squad if key not in ("squad", "updated_at")}
+        # Plantillas guardadas por versiones anteriores (un fichero por jugador)
+        return self._read(os.path.join(self.data_dir, 'players', str(team_id), "index"))
     
     def load_player_data(self, team_id, player_id):
         """
@@ -278,14 +339,73 @@ class LocalStorage:
         Returns:
             dict: Datos del jugador o None si no existe
         """
-        # Verificar si player_id es un nombre de archivo
-        if player_id.endswith('.json'):
-            file_path = os.path.join(self.data_dir, 'players', str(team_id), player_id)
-        else:
-            file_path = os.path.join(self.data_dir, 'players', str(team_id), f"{player_id}.json")
+        # Si player_id es un nombre de archivo se descarta su extensión
+        player_id, _ = split_extension(str(player_id))
+        squad = self._load_squad(team_id)
+        if squad is not None:
+            with squad:
+                return squad.get_path("squad", player_id)
+        return self._read(os.path.join(self.data_dir, 'players', str(team_id), player_id))
+    
+    def _write(self, base_path, data):
+        """Guarda un documento con el backend configurado (base_path sin extensión)"""
+        return write_document(base_path, data, self.backend)
+    
+    def _read(self, base_path):
+        """Lee un documento en cualquier formato conocido (base_path sin extensión)"""
+        return read_document(base_path, self.backend)
+    
+    def _open(self, base_path):
+        """
+        Abre un documento para leerlo por partes (base_path sin extensión)
         
-        if not os.path.exists(file_path):
+        Los ficheros .json se proyectan en memoria y se decodifican bajo
+        demanda; los demás formatos se cargan completos.
+        """
+        try:
+            if os.path.exists(base_path + ".json"):
+                return LazyDocument(base_path + ".json")
+            data = self._read(base_path)
+            return LazyDocument(data=data) if data is not None else None
+        except Exception as e:
+            print(f"Error al abrir {base_path}: {e}")
             return None
+    
+    def migrate(self, storage_format=None):
+        """
+        Convierte todos los documentos de data/ al formato indicado
+        
+        Args:
+            storage_format (str): Formato de destino (por defecto el configurado)
             
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f) 
\ No newline at end of file
+        Returns:
+            dict: Número de documentos convertidos, ya convertidos y con error
+        """
+        backend = get_backend(storage_format) if storage_format else self.backend
+        summary = {"converted": 0, "skipped": 0, "failed": 0, "bytes_before": 0, "bytes_after": 0}
+        for folder in ("matches", "teams", "players", "statistics"):
+            for root, _, files in os.walk(os.path.join(self.data_dir, folder)):
+                for filename in files:
+                    base_path, extension = split_extension(os.path.join(root, filename))
+                    if extension not in KNOWN_EXTENSIONS:
+                        continue
+                    if extension == backend.extension:
+                        summary["skipped"] += 1
+                        continue
+                    path = base_path + extension
+                    if not os.path.exists(path):
+                        # Ya se eliminó al convertir otra copia del mismo documento
+                        continue
+                    try:
+                        size_before = os.path.getsize(path)
+                        data = read_document(base_path)
+                        new_path = write_document(base_path, data, backend)
+                        summary["bytes_before"] += size_before
+                        summary["bytes_after"] += os.path.getsize(new_path)
+                        summary["converted"] += 1
+                    except Exception as e:
+                        print(f"❌ No se pudo convertir {path}: {e}")
+                        summary["failed"] += 1
+        print(f"✅ Convertidos {summary['converted']} documentos a {backend.name} "
+              f"({summary['bytes_before']} -> {summary['bytes_after']} bytes)")
+        return summary 
\ No newline at end of file
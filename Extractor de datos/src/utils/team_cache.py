@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+from datetime import datetime, timedelta
+
+from src.utils.file_lock import file_lock
+from src.utils.serialization import read_document, write_document
+
+# Vigencia de cada campo cacheado de un equipo
+FIELD_TTLS = {
+    "statistics": timedelta(hours=24),
+    "last_matches": timedelta(hours=12),
+    "next_matches": timedelta(hours=12),
+    "understat": timedelta(hours=24),
+    "game_situations": timedelta(hours=24),
+    "injuries": timedelta(hours=6)
+}
+
+# Campos demasiado grandes para el archivo del equipo (tiros, partidos y
+# jugadores de toda la temporada): se guardan en data/cache/teams/{id}/
+BLOB_FIELDS = {"understat", "game_situations"}
+
+
+class TeamCache:
+    """
+    Caché de datos por equipo con caducidad independiente para cada campo
+
+    Los campos pequeños se guardan dentro del archivo del equipo
+    (data/teams/{id}.json) bajo la clave "cached_fields", junto a la fecha en
+    que se obtuvieron, de forma que varios partidos del mismo equipo
+    reutilizan los mismos datos. Los campos nuevos se acumulan en memoria y
+    flush() los escribe de una vez por equipo, releyendo el archivo bajo un
+    lock para no pisar lo que haya guardado otro proceso. Los campos de
+    BLOB_FIELDS van en documentos aparte dentro de data/cache/teams.
+    """
+
+    def __init__(self, storage, ttls=None, cache_dir=None):
+        """
+        Inicializa la caché de equipos
+
+        Args:
+            storage: Instancia de LocalStorage donde se guardan los equipos
+            ttls: Vigencias por campo que sustituyen a las de FIELD_TTLS (opcional)
+            cache_dir: Directorio de los campos grandes y los locks (por defecto data/cache/teams)
+        """
+        self.storage = storage
+        self.ttls = dict(FIELD_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.cache_dir = cache_dir or os.path.join(storage.data_dir, "cache", "teams")
+        self._lock = threading.Lock()
+        self._team_locks = {}
+        self._teams = {}
+        self._pending = {}  # ID de equipo -> campos pendientes de escribir
+
+    def _team_lock(self, team_id):
+        with self._lock:
+            return self._team_locks.setdefault(str(team_id), threading.Lock())
+
+    def _load_team(self, team_id):
+        """Carga el archivo del equipo una sola vez (requiere el lock del equipo)"""
+        key = str(team_id)
+        if key not in self._teams:
+            self._teams[key] = self.storage.load_team_data(team_id) or {"id": team_id}
+        return self._teams[key]
+
+    @staticmethod
+    def _field_key(field, variant=None):
+        return f"{field}:{variant}" if variant is not None else field
+
+    def _blob_path(self, team_id, field, variant=None):
+        name = f"{field}-{variant}" if variant is not None else field
+        return os.path.join(self.cache_dir, str(team_id), name)
+
+    def _file_lock_path(self, team_id):
+        return os.path.join(self.cache_dir, str(team_id), "team.lock")
+
+    def get(self, team_id, field, variant=None):
+        """
+        Obtiene un campo cacheado si sigue vigente
+
+        Args:
+            team_id: ID del equipo
+            field: Nombre del campo (ver FIELD_TTLS)
+            variant: Variante del campo, por ejemplo la temporada (opcional)
+
+        Returns:
+            Valor cacheado o None si no existe o está caducado
+        """
+        if not team_id:
+            return None
+        if field in BLOB_FIELDS:
+            try:
+                entry = read_document(self._blob_path(team_id, field, variant))
+            except Exception as e:
+                print(f"⚠️ No se pudo leer {field} del equipo {team_id}: {e}")
+                entry = None
+        else:
+            with self._team_lock(team_id):
+                entry = self._load_team(team_id).get("cached_fields", {}).get(self._field_key(field, variant))
+        if not entry:
+            return None
+        try:
+            updated_at = datetime.fromisoformat(entry["updated_at"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        if datetime.now() - updated_at > self.ttls.get(field, timedelta(hours=12)):
+            return None
+        return entry.get("value")
+
+    def put(self, team_id, field, value, variant=None):
+        """
+        Guarda un campo del equipo con la fecha actual
+
+        Los campos de BLOB_FIELDS se escriben en el momento; los demás quedan
+        pendientes hasta flush().
+
+        Args:
+            team_id: ID del equipo
+            field: Nombre del campo (ver FIELD_TTLS)
+            value: Valor a guardar
+            variant: Variante del campo, por ejemplo la temporada (opcional)
+        """
+        if not team_id:
+            return
+        entry = {"updated_at": datetime.now().isoformat(), "value": value}
+        if field in BLOB_FIELDS:
+            write_document(self._blob_path(team_id, field, variant), entry)
+            return
+        key = self._field_key(field, variant)
+        with self._team_lock(team_id):
+            self._load_team(team_id).setdefault("cached_fields", {})[key] = entry
+            with self._lock:
+                self._pending.setdefault(str(team_id), {})[key] = entry
+
+    def flush(self):
+        """
+        Escribe los campos pendientes con una sola escritura por equipo
+
+        El archivo del equipo se vuelve a leer con el lock tomado y solo se
+        añaden los campos pendientes, de modo que se conservan los que haya
+        guardado otro proceso. Se eliminan de paso los campos grandes que
+        versiones anteriores guardaban dentro del archivo.
+        """
+        with self._lock:
+            team_ids = list(self._pending)
+        for team_id in team_ids:
+            with self._team_lock(team_id):
+                with self._lock:
+                    pending = self._pending.pop(team_id, None)
+                if not pending:
+                    continue
+                try:
+                    with file_lock(self._file_lock_path(team_id)):
+                        team_data = self.storage.load_team_data(team_id) or {"id": team_id}
+                        cached_fields = team_data.setdefault("cached_fields", {})
+                        for key in [k for k in cached_fields if k.split(":")[0] in BLOB_FIELDS]:
+                            del cached_fields[key]
+                        cached_fields.update(pending)
+                        self.storage.save_team_data(team_id, team_data)
+                    self._teams[team_id] = team_data
+                except Exception as e:
+                    print(f"⚠️ No se pudo guardar la caché del equipo {team_id}: {e}")
+
+    def get_or_fetch(self, team_id, field, fetch, variant=None, is_valid=bool):
+        """
+        Devuelve el campo cacheado o lo obtiene con fetch y lo guarda
+
+        Args:
+            team_id: ID del equipo
+            field: Nombre del campo (ver FIELD_TTLS)
+            fetch: Función sin argumentos que obtiene el valor
+            variant: Variante del campo, por ejemplo la temporada (opcional)
+            is_valid: Función que indica si el valor obtenido se puede cachear
+
+        Returns:
+            Valor cacheado u obtenido
+        """
+        value = self.get(team_id, field, variant)
+        if value is not None:
+            return value
+        value = fetch()
+        if is_valid(value):
+            self.put(team_id, field, value, variant)
+        return value
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import heapq
+import threading
+import unicodedata
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from src.utils.fuzzy import levenshtein_distance, trigrams
+from src.utils.serialization import JSONBackend, read_document, write_document
+
+# Índice de equipos por defecto dentro de data/
+DEFAULT_INDEX_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "team_index"
+)
+
+# Palabras que no distinguen a un equipo de otro ("FC Barcelona" = "Barcelona")
+GENERIC_TOKENS = {"fc", "cf", "afc", "cfc", "club", "the"}
+
+# Candidatos por trigramas que se comparan con Levenshtein en la búsqueda aproximada
+FUZZY_CANDIDATES = 8
+
+# Equipos conocidos: ID de API-Football (si se conoce), nombre, alias y nombres
+# en Understat y Transfermarkt. Antes estaban repartidos en varios diccionarios
+# de FootballAPI y UnderstatAPI.
+SEED_TEAMS = [
+    {"id": 33, "name": "Manchester United", "aliases": ["man utd", "man united", "manchester utd"],
+     "understat": "Manchester_United", "transfermarkt": "manchester-united"},
+    {"id": 50, "name": "Manchester City", "aliases": ["man city"],
+     "understat": "Manchester_City", "transfermarkt": "manchester-city"},
+    {"id": 40, "name": "Liverpool", "understat": "Liverpool", "transfermarkt": "fc-liverpool"},
+    {"id": 42, "name": "Arsenal", "understat": "Arsenal", "transfermarkt": "fc-arsenal"},
+    {"id": 49, "name": "Chelsea", "understat": "Chelsea", "transfermarkt": "fc-chelsea"},
+    {"id": 47, "name": "Tottenham", "aliases": ["spurs", "tottenham hotspur"],
+     "understat": "Tottenham", "transfermarkt": "tottenham-hotspur"},
+    {"id": None, "name": "Newcastle", "aliases": ["newcastle united"], "understat": "Newcastle_United"},
+    {"id": None, "name": "West Ham", "aliases": ["west ham united"], "understat": "West_Ham"},
+    {"id": None, "name": "Aston Villa", "understat": "Aston_Villa"},
+    {"id": None, "name": "Everton", "understat": "Everton"},
+    {"id": None, "name": "Leicester", "aliases": ["leicester city"], "understat": "Leicester"},
+    {"id": 529, "name": "Barcelona", "understat": "Barcelona", "transfermarkt": "fc-barcelona"},
+    {"id": 541, "name": "Real Madrid", "understat": "Real_Madrid", "transfermarkt": "real-madrid"},
+    {"id": 530, "name": "Atletico Madrid", "aliases": ["atletico"],
+     "understat": "Atletico_Madrid", "transfermarkt": "atletico-madrid"},
+    {"id": 157, "name": "Bayern Munich", "aliases": ["bayern", "bayern munchen"],
+     "understat": "Bayern_Munich", "transfermarkt": "bayern-munchen"},
+    {"id": 165, "name": "Borussia Dortmund", "aliases": ["dortmund"],
+     "understat": "Borussia_Dortmund", "transfermarkt": "borussia-dortmund"},
+    {"id": None, "name": "RB Leipzig", "aliases": ["leipzig"], "understat": "RB_Leipzig"},
+    {"id": 85, "name": "Paris Saint Germain", "aliases": ["psg", "paris sg"],
+     "understat": "Paris_Saint_Germain", "transfermarkt": "paris-saint-germain"},
+    {"id": 496, "name": "Juventus", "understat": "Juventus", "transfermarkt": "juventus-turin"},
+    {"id": 489, "name": "AC Milan", "aliases": ["milan"], "understat": "AC_Milan", "transfermarkt": "ac-mailand"},
+    {"id": 505, "name": "Inter", "aliases": ["inter milan"], "understat": "Inter", "transfermarkt": "inter-mailand"},
+    {"id": 492, "name": "Napoli", "aliases": ["ssc napoli"], "understat": "Napoli"},
+    {"id": 497, "name": "AS Roma", "aliases": ["roma"], "understat": "Roma"},
+    {"id": 194, "name": "Ajax", "aliases": ["afc ajax"]},
+    {"id": None, "name": "PSV", "aliases": ["psv eindhoven"]},
+    {"id": None, "name": "Feyenoord"},
+    {"id": 211, "name": "Benfica"},
+    {"id": 212, "name": "FC Porto", "aliases": ["porto"]}
+]
+
+
+def normalize_team_name(name: Optional[str]) -> str:
+    """
+    Nombre de equipo normalizado para buscarlo en el índice
+
+    Se quitan tildes, mayúsculas, signos y palabras genéricas como "FC", de
+    modo que "Atlético Madrid", "atletico-madrid" y "Atletico Madrid FC"
+    coinciden.
+
+    Args:
+        name: Nombre del equipo (o slug de Understat/Transfermarkt)
+
+    Returns:
+        str: Nombre normalizado
+    """
+    text = unicodedata.normalize("NFKD", str(name or "")).encode("ascii", "ignore").decode("ascii")
+    tokens = re.sub(r"[^a-z0-9]+", " ", text.lower()).split()
+    significant = [token for token in tokens if token not in GENERIC_TOKENS]
+    return " ".join(significant or tokens)
+
+
+class TeamIndex:
+    """
+    Índice persistente de identidades de equipos
+
+    Cada equipo tiene una entrada con su ID de API-Football, su nombre, sus
+    alias y sus nombres en Understat y Transfermarkt. Todos los nombres y
+    slugs conocidos se resuelven con una consulta a un diccionario; los que
+    no coinciden se buscan de forma aproximada (trigramas + Levenshtein) sin
+    comparar subcadenas, para que "Inter" no coincida con "Internacional".
+    El índice aprende de cada búsqueda resuelta por la API y se guarda en
+    data/team_index.json.
+    """
+
+    def __init__(self, index_path: Optional[str] = None):
+        """
+        Args:
+            index_path: Ruta del índice sin extensión (por defecto data/team_index)
+        """
+        self.index_path = index_path or DEFAULT_INDEX_PATH
+        self._lock = threading.RLock()
+        self._teams = {}     # clave del equipo -> entrada
+        self._by_id = {}     # ID de API-Football -> clave del equipo
+        self._names = {}     # nombre normalizado -> clave del equipo
+        self._trigrams = {}  # trigrama -> nombres normalizados que lo contienen
+        self._trigram_counts = {}  # nombre normalizado -> número de trigramas
+        for team in SEED_TEAMS:
+            self._add(team)
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        try:
+            stored = read_document(self.index_path)
+        except Exception as e:
+            print(f"⚠️ No se pudo leer el índice de equipos: {e}")
+            return
+        for team in (stored or {}).get("teams", []):
+            self._add(team)
+
+    def _save(self):
+        with self._lock:
+            data = {
+                "updated_at": datetime.now().isoformat(),
+                "teams": list(self._teams.values())
+            }
+            write_document(self.index_path, data, JSONBackend())
+
+    # ------------------------------------------------------------------
+    # Altas
+    # ------------------------------------------------------------------
+
+    def _register_name(self, name: str, key: str) -> bool:
+        """Asocia un nombre normalizado a un equipo; devuelve True si es nuevo"""
+        if not name or self._names.get(name) == key:
+            return False
+        self._names[name] = key
+        name_trigrams = trigrams(name)
+        self._trigram_counts[name] = len(name_trigrams)
+        for trigram in name_trigrams:
+            self._trigrams.setdefault(trigram, set()).add(name)
+        return True
+
+    def _add(self, team: Dict[str, Any]) -> bool:
+        """Añade o completa la entrada de un equipo; devuelve True si algo cambió"""
+        with self._lock:
+            team_id = str(team["id"]) if team.get("id") is not None else None
+            names = [team.get("name")] + list(team.get("aliases") or [])
+            for slug_field in ("understat", "transfermarkt"):
+                if team.get(slug_field):
+                    names.append(team[slug_field])
+            normalized = [n for n in dict.fromkeys(normalize_team_name(n) for n in names if n) if n]
+            if not normalized:
+                return False
+
+            # Entrada existente: por ID o por cualquiera de sus nombres
+            key = self._by_id.get(team_id) if team_id else None
+            if key is None:
+                key = next((self._names[n] for n in normalized if n in self._names), None)
+            existing = self._teams.get(key) if key else None
+            if existing and team_id and existing.get("id") is not None and str(existing["id"]) != team_id:
+                # El nombre pertenece a otro equipo: no se mezclan identidades
+                existing, key = None, None
+
+            changed = existing is None
+            if existing is None:
+                key = f"id:{team_id}" if team_id else f"name:{normalized[0]}"
+                existing = {"key": key, "id": None, "name": team.get("name"), "aliases": [],
+                            "understat": None, "transfermarkt": None, "transfermarkt_id": None}
+                self._teams[key] = existing
+            if team_id and existing.get("id") is None:
+                existing["id"] = team.get("id")
+                changed = True
+            for field in ("understat", "transfermarkt", "transfermarkt_id"):
+                if team.get(field) and existing.get(field) != team[field]:
+                    existing[field] = team[field]
+                    changed = True
+            if existing["id"] is not None:
+                self._by_id[str(existing["id"])] = key
+            for name in [team.get("name")] + list(team.get("aliases") or []):
+                if name and normalize_team_name(name) != normalize_team_name(existing["name"]) \
+                        and name not in existing["aliases"]:
+                    existing["aliases"].append(name)
+                    changed = True
+            for name in normalized:
+                changed = self._register_name(name, key) or changed
+            return changed
+
+    def learn(self, team_id: Any, name: str, aliases: Iterable[str] = (), **sources) -> bool:
+        """
+        Registra una resolución correcta (ej. una búsqueda respondida por la API)
+
+        Args:
+            team_id: ID del equipo en API-Football (puede ser None)
+            name: Nombre oficial del equipo
+            aliases: Otros nombres con los que se ha buscado
+            **sources: understat, transfermarkt o transfermarkt_id del equipo
+
+        Returns:
+            bool: True si el índice ha cambiado (y se ha guardado)
+        """
+        if not name:
+            return False
+        team = {"id": team_id, "name": name, "aliases": [a for a in aliases if a]}
+        team.update({field: value for field, value in sources.items() if value})
+        with self._lock:
+            changed = self._add(team)
+            if changed:
+                try:
+                    self._save()
+                except Exception as e:
+                    print(f"⚠️ No se pudo guardar el índice de equipos: {e}")
+        return changed
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def _fuzzy_key(self, normalized: str) -> Optional[str]:
+        """Equipo cuyo nombre está a menos distancia de edición del buscado"""
+        query_trigrams = trigrams(normalized)
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(self._trigrams.get(trigram, ()))
+        if not shared:
+            return None
+
+        # Solo se calcula Levenshtein para los nombres con más trigramas en común
+        def dice(name):
+            return 2 * shared[name] / (len(query_trigrams) + self._trigram_counts[name])
+        candidates = heapq.nlargest(FUZZY_CANDIDATES, shared, key=dice)
+        max_distance = max(1, len(normalized) // 4)
+        best_name, best_distance = None, max_distance + 1
+        for name in candidates:
+            # Solo interesan distancias menores que la mejor encontrada
+            distance = levenshtein_distance(normalized, name, best_distance - 1)
+            if distance < best_distance:
+                best_name, best_distance = name, distance
+        return self._names[best_name] if best_name else None
+
+    def resolve(self, name: Optional[str], fuzzy: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Equipo al que corresponde un nombre, alias o slug
+
+        Args:
+            name: Nombre a buscar
+            fuzzy: Permitir coincidencias aproximadas (erratas, variantes); pueden
+                ser otro equipo, así que su ID debe confirmarse con la API
+
+        Returns:
+            dict: Copia de la entrada del equipo o None si no se conoce
+        """
+        normalized = normalize_team_name(name)
+        if not normalized:
+            return None
+        with self._lock:
+            key = self._names.get(normalized)
+            if key is None and fuzzy:
+                key = self._fuzzy_key(normalized)
+            team = self._teams.get(key) if key else None
+            return dict(team, aliases=list(team["aliases"])) if team else None
+
+    def resolve_id(self, team_id: Any) -> Optional[Dict[str, Any]]:
+        """
+        Entrada de un equipo por su ID de API-Football
+
+        Args:
+            team_id: ID del equipo
+
+        Returns:
+            dict: Copia de la entrada o None
+        """
+        with self._lock:
+            key = self._by_id.get(str(team_id))
+            team = self._teams.get(key) if key else None
+            return dict(team, aliases=list(team["aliases"])) if team else None
+
+    def understat_slug(self, name: str) -> Optional[str]:
+        """Nombre del equipo en las URLs de Understat, o None si el nombre no es uno conocido"""
+        # Sin coincidencias aproximadas: "Barcelona SC" no debe descargar los datos del Barcelona
+        team = self.resolve(name, fuzzy=False)
+        return team.get("understat") if team else None
+
+    def transfermarkt_slug(self, name: str) -> Optional[str]:
+        """Nombre del equipo en las URLs de Transfermarkt, o None si el nombre no es uno conocido"""
+        team = self.resolve(name, fuzzy=False)
+        return team.get("transfermarkt") if team else None
+
+    def __len__(self) -> int:
+        return len(self._teams)
+
+
+# Índice compartido por todos los clientes del proceso
+_shared_index = None
+_shared_index_lock = threading.Lock()
+
+
+def get_team_index() -> TeamIndex:
+    """
+    Devuelve el índice de equipos compartido del proceso
+
+    Returns:
+        TeamIndex: Índice compartido
+    """
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            _shared_index = TeamIndex()
+        return _shared_index
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import time
+import threading
+import unicodedata
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from src.utils.distances import DistanceMatrix
+from src.utils.serialization import JSONBackend, read_document, split_extension, write_document, KNOWN_EXTENSIONS
+
+# Índice de estadios por defecto dentro de data/
+DEFAULT_INDEX_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "venues"
+)
+
+# Segundos que se espera antes de volver a geocodificar un estadio no encontrado
+MISS_RETRY_SECONDS = 24 * 3600
+
+
+def normalize_venue_key(name: Optional[str], city: Optional[str] = None) -> str:
+    """
+    Clave normalizada de un estadio a partir de su nombre y ciudad
+
+    Se quitan tildes, mayúsculas y signos para que "Estadio Cívitas
+    Metropolitano, Madrid" y "estadio civitas metropolitano, madrid" coincidan.
+
+    Args:
+        name: Nombre del estadio
+        city: Ciudad del estadio
+
+    Returns:
+        str: Clave "nombre|ciudad"
+    """
+    def normalize(text):
+        text = unicodedata.normalize("NFKD", str(text or "")).encode("ascii", "ignore").decode("ascii")
+        return re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
+    return f"{normalize(name)}|{normalize(city)}"
+
+
+def _coordinates(entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, float]]:
+    if not entry or entry.get("latitude") is None or entry.get("longitude") is None:
+        return None
+    return {"latitude": entry["latitude"], "longitude": entry["longitude"]}
+
+
+class VenueIndex:
+    """
+    Índice persistente de coordenadas de estadios
+
+    Los estadios se buscan por ID de API-Football o por nombre y ciudad
+    normalizados, y cada equipo se asocia a su estadio. El índice se guarda en
+    data/venues.json; la primera vez se rellena con los estadios que ya hay en
+    los ficheros de equipo y después solo se consulta el geocodificador cuando
+    un estadio no está en el índice.
+    """
+
+    def __init__(self, index_path: Optional[str] = None, teams_dir: Optional[str] = None):
+        """
+        Args:
+            index_path: Ruta del índice sin extensión (por defecto data/venues)
+            teams_dir: Carpeta de ficheros de equipo para el relleno inicial (por defecto data/teams)
+        """
+        self.index_path = index_path or DEFAULT_INDEX_PATH
+        self.teams_dir = teams_dir or os.path.join(os.path.dirname(self.index_path), "teams")
+        self._lock = threading.RLock()
+        self._key_locks = {}
+        self._misses = {}
+        self._venues = {}   # clave normalizada -> estadio
+        self._by_id = {}    # ID de estadio -> clave normalizada
+        self._teams = {}    # ID de equipo -> clave normalizada
+        self._version = 0   # Cambia con cada estadio o equipo añadido (invalida las matrices)
+        self._matrices = {}
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        stored = None
+        try:
+            stored = read_document(self.index_path)
+        except Exception as e:
+            print(f"⚠️ No se pudo leer el índice de estadios: {e}")
+        if stored is None:
+            seeded = self.seed_from_teams()
+            if seeded:
+                print(f"✅ Índice de estadios creado con {seeded} estadios de los ficheros de equipo")
+            return
+        for venue in stored.get("venues", []):
+            self._add(venue, persist=False)
+        for team_id, key in stored.get("teams", {}).items():
+            if key in self._venues:
+                self._teams[str(team_id)] = key
+
+    def _save(self):
+        with self._lock:
+            data = {
+                "updated_at": datetime.now().isoformat(),
+                "venues": list(self._venues.values()),
+                "teams": dict(self._teams)
+            }
+            write_document(self.index_path, data, JSONBackend())
+
+    def _add(self, venue: Dict[str, Any], team_id: Any = None, persist: bool = True) -> Optional[str]:
+        """Añade o actualiza un estadio con coordenadas y devuelve su clave"""
+        if _coordinates(venue) is None or not venue.get("name"):
+            return None
+        key = normalize_venue_key(venue.get("name"), venue.get("city"))
+        with self._lock:
+            entry = dict(self._venues.get(key, {}))
+            entry.update({k: v for k, v in venue.items() if v is not None})
+            entry["key"] = key
+            self._venues[key] = entry
+            if entry.get("id") is not None:
+                self._by_id[str(entry["id"])] = key
+            if team_id is not None:
+                self._teams[str(team_id)] = key
+            self._version += 1
+            if persist:
+                self._save()
+        return key
+
+    def seed_from_teams(self) -> int:
+        """
+        Añade al índice los estadios con coordenadas de los ficheros de equipo
+
+        Returns:
+            int: Número de estadios añadidos
+        """
+        added = 0
+        if not os.path.isdir(self.teams_dir):
+            return added
+        seen = set()
+        for filename in sorted(os.listdir(self.teams_dir)):
+            base_path, extension = split_extension(os.path.join(self.teams_dir, filename))
+            if extension not in KNOWN_EXTENSIONS or base_path in seen:
+                continue
+            seen.add(base_path)
+            try:
+                team = read_document(base_path) or {}
+            except Exception:
+                continue
+            team_id = team.get("id") or os.path.basename(base_path)
+            candidates = [team.get("venue"), (team.get("team") or {}).get("venue")]
+            cached = (team.get("cached_fields") or {}).get("venue") or {}
+            if isinstance(cached.get("value"), dict):
+                value = cached["value"]
+                candidates.append(dict(name=value.get("name"), city=value.get("city"), **(value.get("coordinates") or {})))
+            for venue in candidates:
+                if isinstance(venue, dict) and self._add(venue, team_id=team_id, persist=False):
+                    added += 1
+                    break
+        if added:
+            self._save()
+        return added
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def lookup(self, venue_id: Any = None, name: Optional[str] = None,
+               city: Optional[str] = None) -> Optional[Dict[str, float]]:
+        """
+        Coordenadas de un estadio si están en el índice (sin usar la red)
+
+        Args:
+            venue_id: ID del estadio en API-Football
+            name: Nombre del estadio
+            city: Ciudad del estadio
+
+        Returns:
+            dict: {latitude, longitude} o None si no está en el índice
+        """
+        with self._lock:
+            return _coordinates(self._venues.get(self._find_key(venue_id, name, city)))
+
+    def _find_key(self, venue_id: Any, name: Optional[str], city: Optional[str]) -> Optional[str]:
+        key = self._by_id.get(str(venue_id)) if venue_id is not None else None
+        if key is None and name:
+            key = normalize_venue_key(name, city)
+        return key
+
+    def lookup_team(self, team_id: Any) -> Optional[Dict[str, Any]]:
+        """
+        Estadio asociado a un equipo
+
+        Args:
+            team_id: ID del equipo
+
+        Returns:
+            dict: Estadio con id, name, city, latitude y longitude o None
+        """
+        with self._lock:
+            key = self._teams.get(str(team_id))
+            venue = self._venues.get(key) if key else None
+            return dict(venue) if venue else None
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get_coordinates(self, venue_id: Any = None, name: Optional[str] = None, city: Optional[str] = None,
+                        geocode: Optional[Callable[[str, str], Optional[Dict[str, float]]]] = None,
+                        team_id: Any = None) -> Optional[Dict[str, float]]:
+        """
+        Coordenadas de un estadio, geocodificándolo solo si no está en el índice
+
+        Args:
+            venue_id: ID del estadio en API-Football
+            name: Nombre del estadio
+            city: Ciudad del estadio
+            geocode: Función (nombre, ciudad) -> coordenadas para los estadios nuevos
+            team_id: Equipo al que pertenece el estadio (se asocia en el índice)
+
+        Returns:
+            dict: {latitude, longitude} o None si no se encuentran
+        """
+        coordinates = self.lookup(venue_id, name, city)
+        if coordinates is not None or geocode is None or not name:
+            if coordinates is not None and team_id is not None:
+                with self._lock:
+                    key = self._find_key(venue_id, name, city)
+                    if self._teams.get(str(team_id)) != key:
+                        self._teams[str(team_id)] = key
+                        self._version += 1
+                        self._save()
+            return coordinates
+
+        key = normalize_venue_key(name, city)
+        with self._key_lock(key):
+            # Otro hilo pudo geocodificarlo mientras se esperaba el lock
+            coordinates = self.lookup(venue_id, name, city)
+            if coordinates is not None:
+                return coordinates
+            if time.time() - self._misses.get(key, 0) < MISS_RETRY_SECONDS:
+                return None
+            coordinates = geocode(name, city)
+            if not coordinates:
+                self._misses[key] = time.time()
+                return None
+            self._add(dict(id=venue_id, name=name, city=city, source="geocoding",
+                           updated_at=datetime.now().isoformat(), **coordinates), team_id=team_id)
+            return _coordinates(coordinates)
+
+    def distance_matrix(self, team_ids=None) -> DistanceMatrix:
+        """
+        Matriz de distancias entre los estadios del índice
+
+        La matriz se calcula una vez y se reutiliza hasta que se añade un
+        estadio o cambia el estadio de un equipo.
+
+        Args:
+            team_ids: Limitar la matriz a los estadios de estos equipos (ej. los de una liga)
+
+        Returns:
+            DistanceMatrix: Matriz de distancias
+        """
+        cache_key = tuple(sorted(str(t) for t in team_ids)) if team_ids is not None else None
+        with self._lock:
+            cached = self._matrices.get(cache_key)
+            if cached is not None and cached[0] == self._version:
+                return cached[1]
+            if cache_key is None:
+                venues, teams = list(self._venues.values()), dict(self._teams)
+            else:
+                teams = {t: self._teams[t] for t in cache_key if t in self._teams}
+                venues = [self._venues[key] for key in dict.fromkeys(teams.values())]
+            matrix = DistanceMatrix(venues, teams)
+            self._matrices[cache_key] = (self._version, matrix)
+            return matrix
+
+    def __len__(self) -> int:
+        return len(self._venues)
+
+
+# Índice compartido por todos los clientes del proceso
+_shared_index = None
+_shared_index_lock = threading.Lock()
+
+
+def get_venue_index() -> VenueIndex:
+    """
+    Devuelve el índice de estadios compartido del proceso
+
+    Returns:
+        VenueIndex: Índice compartido
+    """
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            _shared_index = VenueIndex()
+        return _shared_index